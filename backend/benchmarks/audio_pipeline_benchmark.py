@@ -0,0 +1,121 @@
+"""
+Whisper audio preparation benchmark
+
+Compares the two ways of turning a downloaded audio stream into a Whisper upload,
+on a local fixture file (no network):
+
+  mp3    - previous path: re-encode to 192 kbps MP3 in a temporary file, read it back
+  opus   - current path: ffmpeg to 16 kHz mono Opus on a pipe, kept in memory
+
+and reports wall time, ffmpeg CPU time, bytes written to disk and upload size.
+Without --fixture, a speech-like fixture (tone bursts with pauses over noise)
+of --minutes length is generated with ffmpeg first.
+
+    python benchmarks/audio_pipeline_benchmark.py --minutes 10 --runs 3
+    python benchmarks/audio_pipeline_benchmark.py --fixture lecture.webm
+"""
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.audio_chunker import SPEECH_AUDIO_ARGS  # noqa: E402
+
+
+def make_fixture(path: str, minutes: float):
+    """48 kHz stereo Opus/WebM, like YouTube's bestaudio, with speech-like on/off bursts"""
+    seconds = int(minutes * 60)
+    subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin", "-y",
+            "-f", "lavfi", "-i", f"sine=frequency=220:sample_rate=48000:duration={seconds}",
+            "-f", "lavfi", "-i", f"anoisesrc=color=pink:amplitude=0.02:sample_rate=48000:duration={seconds}",
+            "-filter_complex",
+            "[0]volume='if(lt(mod(t,7),5),1,0)':eval=frame[speech];[speech][1]amix=inputs=2,aformat=channel_layouts=stereo",
+            "-c:a", "libopus", "-b:a", "128k", path,
+        ],
+        check=True,
+    )
+
+
+def children_cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_mp3(fixture: str):
+    """Previous path: 192 kbps MP3 temp file, read back for the upload"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "audio.mp3")
+        subprocess.run(
+            [
+                "ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin", "-y", "-i", fixture,
+                "-vn", "-c:a", "libmp3lame", "-b:a", "192k", path,
+            ],
+            check=True,
+        )
+        with open(path, "rb") as f:
+            upload = f.read()
+        return len(upload), len(upload)
+
+
+def run_opus(fixture: str):
+    """Current path: speech-grade Opus straight into memory"""
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin", "-i", fixture, *SPEECH_AUDIO_ARGS, "pipe:1"],
+        check=True,
+        stdout=subprocess.PIPE,
+    )
+    return 0, len(result.stdout)
+
+
+def measure(name: str, fn, fixture: str, runs: int):
+    walls, cpus = [], []
+    for _ in range(runs):
+        cpu_before = children_cpu_seconds()
+        started = time.perf_counter()
+        disk_bytes, upload_bytes = fn(fixture)
+        walls.append(time.perf_counter() - started)
+        cpus.append(children_cpu_seconds() - cpu_before)
+    return name, min(walls), min(cpus), disk_bytes, upload_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Whisper audio preparation paths")
+    parser.add_argument("--fixture", help="Local audio/video file (generated if omitted)")
+    parser.add_argument("--minutes", type=float, default=10, help="Length of the generated fixture")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixture = args.fixture
+        if not fixture:
+            fixture = os.path.join(tmp, "fixture.webm")
+            print(f"Generating {args.minutes:g} minute fixture...")
+            make_fixture(fixture, args.minutes)
+
+        print(f"Fixture: {fixture} ({os.path.getsize(fixture) / 1e6:.1f} MB), best of {args.runs} runs\n")
+        print(f"{'path':<6} {'wall s':>8} {'cpu s':>8} {'disk MB':>9} {'upload MB':>10}")
+
+        results = [
+            measure("mp3", run_mp3, fixture, args.runs),
+            measure("opus", run_opus, fixture, args.runs),
+        ]
+        for name, wall, cpu, disk_bytes, upload_bytes in results:
+            print(f"{name:<6} {wall:>8.2f} {cpu:>8.2f} {disk_bytes / 1e6:>9.2f} {upload_bytes / 1e6:>10.2f}")
+
+        (_, mp3_wall, mp3_cpu, _, mp3_upload), (_, opus_wall, opus_cpu, _, opus_upload) = results
+        print(
+            f"\nopus vs mp3: {mp3_upload / max(1, opus_upload):.1f}x smaller upload, "
+            f"{mp3_cpu / max(1e-9, opus_cpu):.1f}x less encode CPU, {mp3_wall / max(1e-9, opus_wall):.1f}x faster"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+LLM gateway benchmark against a rate-limited fake OpenAI server
+
+Starts a fake /v1/chat/completions endpoint that allows --rpm requests per
+minute (a token bucket holding --burst requests), answers 429 with
+x-ratelimit-* headers like OpenAI beyond that, and otherwise returns valid
+questions after --latency seconds. Flashcards for --segments segments are
+then generated one request per segment, three ways:
+
+  before  - a plain AsyncOpenAI client per service (the SDK's 2 default retries)
+  backoff - the LLM gateway with rate-limit pacing off: jittered backoff only
+  gateway - the LLM gateway: backoff plus pacing by the rate-limit headers,
+            with gpt-4o's limit configured as --rpm (LLM_REQUESTS_PER_MINUTE)
+            so pacing starts with the first call rather than the first response
+
+Reported are the wall time, the completions served per second, the 429s the
+server answered and the segments that ended up with a fallback question.
+
+    python benchmarks/llm_gateway_benchmark.py --segments 120 --rpm 300 --burst 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("SUPABASE_URL", "https://benchmark.supabase.co")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.e30.benchmark")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import uvicorn  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from openai import AsyncOpenAI  # noqa: E402
+
+from models import VideoSegment  # noqa: E402
+from services.llm_cache import llm_cache  # noqa: E402
+from services.llm_gateway import LLMGateway  # noqa: E402
+from services.question_generator import QuestionGenerator  # noqa: E402
+
+QUESTION = {
+    "question_text": "Why does the approach work?",
+    "options": ["Because of A", "Because of B", "Because of C", "Because of D"],
+    "correct_answer": 0,
+    "explanation": "A is the reason.",
+    "difficulty": "medium",
+}
+
+
+def fake_openai_app(latency: float, rpm: int, burst: int, stats: dict) -> FastAPI:
+    app = FastAPI()
+    rate = rpm / 60
+    bucket = {"available": float(burst), "updated": time.monotonic()}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions():
+        now = time.monotonic()
+        bucket["available"] = min(burst, bucket["available"] + (now - bucket["updated"]) * rate)
+        bucket["updated"] = now
+
+        headers = {"x-ratelimit-limit-requests": str(rpm)}
+        if bucket["available"] < 1:
+            stats["rate_limited"] += 1
+            headers["x-ratelimit-remaining-requests"] = "0"
+            headers["x-ratelimit-reset-requests"] = f"{(1 - bucket['available']) / rate * 1000:.0f}ms"
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached for requests", "type": "requests", "code": "rate_limit_exceeded"}},
+                status_code=429,
+                headers=headers
+            )
+        bucket["available"] -= 1
+        stats["served"] += 1
+        headers["x-ratelimit-remaining-requests"] = str(int(bucket["available"]))
+        headers["x-ratelimit-reset-requests"] = f"{(burst - bucket['available']) / rate:.3f}s"
+
+        await asyncio.sleep(latency)
+        return JSONResponse({
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "gpt-4o",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": json.dumps({"questions": [QUESTION]})},
+            }],
+            "usage": {"prompt_tokens": 1000, "completion_tokens": 100, "total_tokens": 1100},
+        }, headers=headers)
+
+    return app
+
+
+def start_server(latency: float, rpm: int, burst: int, stats: dict) -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(fake_openai_app(latency, rpm, burst, stats), port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}/v1"
+
+
+class SDKClient:
+    """The previous setup: an AsyncOpenAI client with the SDK's own retries"""
+
+    def __init__(self, client: AsyncOpenAI):
+        self.client = client
+
+    async def chat(self, **kwargs):
+        return await self.client.chat.completions.create(**kwargs)
+
+
+async def run(llm, segments) -> tuple:
+    generator = QuestionGenerator()
+    generator.llm = llm
+    generator.batch_size = 1
+    started = time.perf_counter()
+    flashcards = await generator.generate_flashcards(segments)
+    elapsed = time.perf_counter() - started
+    fallbacks = sum(1 for fc in flashcards if fc.question.question_text.startswith("What was discussed"))
+    return elapsed, fallbacks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the LLM gateway against a rate-limited fake OpenAI server")
+    parser.add_argument("--segments", type=int, default=120)
+    parser.add_argument("--latency", type=float, default=1.0, help="Seconds the fake server takes per completion")
+    parser.add_argument("--rpm", type=int, default=300, help="Requests per minute the fake server allows")
+    parser.add_argument("--burst", type=int, default=20, help="Requests the fake server allows at once")
+    args = parser.parse_args()
+
+    # Every run sends the same prompts - measure the calls, not the response cache
+    llm_cache.ttl_seconds = 0
+
+    stats = {"served": 0, "rate_limited": 0}
+    base_url = start_server(args.latency, args.rpm, args.burst, stats)
+    segments = [
+        VideoSegment(start_time=i * 120, end_time=(i + 1) * 120, text=f"Segment {i} explains concept {i}.")
+        for i in range(args.segments)
+    ]
+
+    print(f"{args.segments} segments, {args.rpm} requests/min (burst {args.burst}), {args.latency}s per completion\n")
+    print(f"{'':>8} {'total s':>8} {'completions/s':>14} {'429s':>6} {'fallbacks':>10}")
+    for name, make_llm in (
+        ("before", lambda: SDKClient(AsyncOpenAI(api_key="benchmark", base_url=base_url))),
+        ("backoff", lambda: LLMGateway("benchmark", base_url=base_url, rate_limit_pacing=False)),
+        ("gateway", lambda: LLMGateway("benchmark", base_url=base_url, requests_per_minute={"gpt-4o": args.rpm})),
+    ):
+        # Let the server's bucket refill between runs
+        time.sleep(args.burst * 60 / args.rpm)
+        stats.update(served=0, rate_limited=0)
+        elapsed, fallbacks = asyncio.run(run(make_llm(), segments))
+        print(
+            f"{name:>8} {elapsed:>8.2f} {stats['served'] / elapsed:>14.2f} "
+            f"{stats['rate_limited']:>6} {fallbacks:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
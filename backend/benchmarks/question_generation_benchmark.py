@@ -0,0 +1,199 @@
+"""
+Flashcard generation benchmark against a local fake OpenAI server
+
+Starts a fake /v1/chat/completions endpoint that answers every request with
+valid questions after --latency seconds, then generates flashcards for a video
+of --segments segments three ways:
+
+  before     - the previous path: synchronous OpenAI client called from async
+               code, one segment after another
+  concurrent - QuestionGenerator with QUESTION_BATCH_SIZE=1: AsyncOpenAI, one
+               request per segment, segments generated concurrently
+  batched    - QuestionGenerator with --batch-size segments per request
+
+While generating, a probe task sleeps 10 ms in a loop and records how late it
+wakes up: the event-loop lag every other request in the process would see.
+Requests and request body volume (a stand-in for prompt tokens) are counted
+by the fake server. With --malformed, that share of the batched answers'
+segments comes back without questions, to exercise the per-segment retries.
+
+    python benchmarks/question_generation_benchmark.py --segments 30 --latency 1.5 --batch-size 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import sys
+import threading
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("SUPABASE_URL", "https://benchmark.supabase.co")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.e30.benchmark")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import uvicorn  # noqa: E402
+from fastapi import FastAPI, Request  # noqa: E402
+from openai import OpenAI  # noqa: E402
+
+from models import FlashCard, VideoSegment  # noqa: E402
+from services.llm_cache import llm_cache  # noqa: E402
+from services.llm_gateway import LLMGateway  # noqa: E402
+from services.question_generator import QuestionGenerator  # noqa: E402
+
+QUESTION = {
+    "question_text": "Why does the approach work?",
+    "options": ["Because of A", "Because of B", "Because of C", "Because of D"],
+    "correct_answer": 0,
+    "explanation": "A is the reason.",
+    "difficulty": "medium",
+}
+DIFFICULTIES = ("easy", "medium", "hard")
+
+
+def fake_openai_app(latency: float, malformed: float, stats: dict) -> FastAPI:
+    app = FastAPI()
+    rng = random.Random(7)
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.body()
+        stats["requests"] += 1
+        stats["bytes"] += len(body)
+        payload = json.loads(body)
+        prompt = payload["messages"][-1]["content"]
+        requested = re.search(r"Generate (\d+) question", prompt)
+        questions = [
+            {**QUESTION, "difficulty": DIFFICULTIES[i % len(DIFFICULTIES)]}
+            for i in range(int(requested.group(1)) if requested else 1)
+        ]
+
+        if payload.get("response_format", {}).get("type") == "json_schema":
+            indexes = [int(i) for i in re.findall(r"### Segment (\d+)", prompt)]
+            content = {"segments": [
+                {"segment_index": i, "questions": [] if rng.random() < malformed else questions}
+                for i in indexes
+            ]}
+        else:
+            content = {"questions": questions}
+
+        await asyncio.sleep(latency)
+        return {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "gpt-4o",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": json.dumps(content)},
+            }],
+            "usage": {"prompt_tokens": 1000, "completion_tokens": 100, "total_tokens": 1100},
+        }
+
+    return app
+
+
+def start_server(latency: float, malformed: float, stats: dict) -> str:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(fake_openai_app(latency, malformed, stats), port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}/v1"
+
+
+class BlockingClient:
+    """The previous client: a synchronous create() awaited from async code"""
+
+    def __init__(self, client: OpenAI):
+        self.client = client
+
+    async def chat(self, **kwargs):
+        return self.client.chat.completions.create(**kwargs)
+
+
+async def sequential_flashcards(generator: QuestionGenerator, segments):
+    """The previous generate_flashcards loop: one segment at a time"""
+    flashcards = []
+    for i, segment in enumerate(segments):
+        questions = await generator.generate_questions_for_segment(
+            segment, num_questions=1, context_segments=generator._context_segments(segments, i)
+        )
+        flashcards.append(FlashCard(question=questions[0], show_at_timestamp=segment.end_time))
+    return flashcards
+
+
+async def measure(generate) -> tuple:
+    lags = []
+    done = asyncio.Event()
+
+    async def probe():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            lags.append(time.perf_counter() - started - 0.01)
+
+    probe_task = asyncio.create_task(probe())
+    await asyncio.sleep(0)  # let the probe start its first sleep
+    started = time.perf_counter()
+    flashcards = await generate()
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe_task
+
+    fallbacks = sum(1 for fc in flashcards if fc.question.question_text.startswith("What was discussed"))
+    return elapsed, max(lags), fallbacks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark flashcard generation against a fake OpenAI server")
+    parser.add_argument("--segments", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=1.5, help="Seconds the fake server takes per completion")
+    parser.add_argument("--batch-size", type=int, default=5)
+    parser.add_argument("--malformed", type=float, default=0.0, help="Share of batched segments answered malformed")
+    args = parser.parse_args()
+
+    # Every path sends the same prompts - measure the calls, not the response cache
+    llm_cache.ttl_seconds = 0
+
+    stats = {"requests": 0, "bytes": 0}
+    base_url = start_server(args.latency, args.malformed, stats)
+    segments = [
+        VideoSegment(start_time=i * 120, end_time=(i + 1) * 120, text=f"Segment {i} explains concept {i}.")
+        for i in range(args.segments)
+    ]
+
+    before = QuestionGenerator()
+    before.llm = BlockingClient(OpenAI(api_key="benchmark", base_url=base_url))
+    concurrent = QuestionGenerator()
+    concurrent.llm = LLMGateway("benchmark", base_url=base_url)
+    concurrent.batch_size = 1
+    batched = QuestionGenerator()
+    batched.llm = LLMGateway("benchmark", base_url=base_url)
+    batched.batch_size = args.batch_size
+
+    print(f"{args.segments} segments, {args.latency}s per completion, batches of {args.batch_size}\n")
+    print(f"{'':>10} {'total s':>8} {'max loop lag ms':>16} {'requests':>9} {'request KB':>11} {'fallbacks':>10}")
+    for name, generate in (
+        ("before", lambda: sequential_flashcards(before, segments)),
+        ("concurrent", lambda: concurrent.generate_flashcards(segments)),
+        ("batched", lambda: batched.generate_flashcards(segments)),
+    ):
+        stats.update(requests=0, bytes=0)
+        elapsed, lag, fallbacks = asyncio.run(measure(generate))
+        print(
+            f"{name:>10} {elapsed:>8.2f} {lag * 1000:>16.0f} {stats['requests']:>9} "
+            f"{stats['bytes'] / 1024:>11.1f} {fallbacks:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Quiz generation benchmark: generated on request vs sampled from the question pool
+
+  before - QuestionGenerator.generate_final_quiz against the fake OpenAI server
+           of question_generation_benchmark.py (--latency seconds per completion),
+           as POST /api/quiz/generate did while the user waited
+  pool   - QuestionPool.assemble over a pool of --per-segment questions per
+           segment, built once up front through the same fake server; the pool
+           table is kept in memory here, so add one select and one RPC round
+           trip to Supabase for the real endpoint
+
+Both run --quizzes times for a video of --segments segments; adaptive quizzes
+(every other one) carry weak questions on two segments.
+
+    python benchmarks/quiz_assembly_benchmark.py --segments 30 --latency 1.5 --quizzes 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("SUPABASE_URL", "https://benchmark.supabase.co")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "eyJhbGciOiJIUzI1NiJ9.e30.benchmark")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from database import db  # noqa: E402
+from models import VideoSegment  # noqa: E402
+from services.llm_cache import llm_cache  # noqa: E402
+from services.llm_gateway import LLMGateway  # noqa: E402
+from services.question_generator import question_generator  # noqa: E402
+from services.question_pool import QuestionPool  # noqa: E402
+from question_generation_benchmark import start_server  # noqa: E402
+
+
+class MemoryPoolTable:
+    """The question_pool table and its db methods, in memory"""
+
+    def __init__(self):
+        self.rows = []
+
+    async def get_question_pool(self, video_id):
+        return [dict(row) for row in self.rows]
+
+    async def store_pool_questions(self, video_id, questions):
+        self.rows += [{**q, "times_served": 0} for q in questions]
+
+    async def mark_pool_questions_served(self, question_ids):
+        served = set(question_ids)
+        for row in self.rows:
+            if row["id"] in served:
+                row["times_served"] += 1
+
+
+async def get_questions(video_id):
+    return []
+
+
+def analysis_for(quiz: int, table: MemoryPoolTable) -> dict:
+    if quiz % 2 == 0 or not table.rows:
+        return None
+    weak = [row["id"] for row in table.rows if row["segment_index"] in (1, 2)][:2]
+    return {
+        "has_previous_data": True,
+        "video_accuracy": 60.0,
+        "weak_flashcard_questions": [],
+        "weak_quiz_questions": [{"question_id": question_id, "accuracy": 25.0} for question_id in weak],
+    }
+
+
+async def run(args, segments, stats) -> dict:
+    table = MemoryPoolTable()
+    db.get_question_pool = table.get_question_pool
+    db.store_pool_questions = table.store_pool_questions
+    db.mark_pool_questions_served = table.mark_pool_questions_served
+    db.get_questions = get_questions
+
+    pool = QuestionPool(args.per_segment, max_serves=args.quizzes)
+    started = time.perf_counter()
+    await pool.build("benchmark", segments, video_title="Benchmark")
+    build_seconds = time.perf_counter() - started
+    build_requests = stats["requests"]
+
+    before, sampled = [], []
+    for quiz in range(args.quizzes):
+        analysis = analysis_for(quiz, table)
+
+        started = time.perf_counter()
+        await question_generator.generate_final_quiz(
+            segments, num_questions=10, video_title="Benchmark", performance_analysis=analysis
+        )
+        before.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        questions = await pool.assemble("benchmark", segments, 10, performance_analysis=analysis)
+        sampled.append(time.perf_counter() - started)
+        assert questions and len(questions) == 10
+
+    return {
+        "build_seconds": build_seconds,
+        "build_requests": build_requests,
+        "before": before,
+        "pool": sampled,
+        "pool_size": len(table.rows),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quiz generation on request vs from the question pool")
+    parser.add_argument("--segments", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=1.5, help="Seconds the fake server takes per completion")
+    parser.add_argument("--quizzes", type=int, default=20)
+    parser.add_argument("--per-segment", type=int, default=3)
+    args = parser.parse_args()
+
+    # Every quiz sends the same prompts - measure the calls, not the response cache
+    llm_cache.ttl_seconds = 0
+
+    stats = {"requests": 0, "bytes": 0}
+    base_url = start_server(args.latency, 0.0, stats)
+    question_generator.llm = LLMGateway("benchmark", base_url=base_url)
+    segments = [
+        VideoSegment(start_time=i * 120, end_time=(i + 1) * 120, text=f"Segment {i} explains concept {i}.")
+        for i in range(args.segments)
+    ]
+
+    result = asyncio.run(run(args, segments, stats))
+    print(
+        f"{args.segments} segments, {args.latency}s per completion; pool of {result['pool_size']} questions "
+        f"built at ingestion in {result['build_seconds']:.2f}s ({result['build_requests']} requests)\n"
+    )
+    print(f"{'':>8} {'median ms':>10} {'max ms':>10}")
+    for name in ("before", "pool"):
+        times = result[name]
+        print(f"{name:>8} {statistics.median(times) * 1000:>10.2f} {max(times) * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
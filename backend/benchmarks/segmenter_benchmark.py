@@ -0,0 +1,96 @@
+"""
+Transcript segmentation benchmark
+
+Segments synthetic caption tracks of 10k-100k entries (~2s lines, with gaps
+and overlaps like real auto-captions) into ~2 minute segments, with the
+previous list-based loop (which called transcript_list.index(entry) on every
+segment boundary) and with TranscriptSegmenter, and checks both produce the
+same segments.
+
+    pip install numpy pydantic
+    python benchmarks/segmenter_benchmark.py --entries 10000 30000 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from services.transcript_segmenter import TranscriptSegmenter, entry_arrays  # noqa: E402
+
+
+def make_track(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    entries = []
+    t = 0.0
+    for i in range(count):
+        duration = rng.uniform(1.0, 4.0)
+        entries.append({"text": f"caption line {i}", "start": round(t, 3), "duration": round(duration, 3)})
+        # Mostly back to back, sometimes overlapping, sometimes a pause
+        t += duration + rng.choice((-0.5, 0.0, 0.0, 0.2, 1.5))
+        t = max(t, entries[-1]["start"] + 0.1)
+    return entries
+
+
+def legacy_segments(transcript_list, target_segment_duration=120.0):
+    """The previous WhisperService._create_segments_from_youtube_transcript loop"""
+    segments = []
+    current_segment_text = []
+    current_segment_start = transcript_list[0]['start']
+
+    for entry in transcript_list:
+        current_segment_text.append(entry['text'])
+        current_segment_duration = (entry['start'] + entry['duration']) - current_segment_start
+
+        if current_segment_duration >= target_segment_duration:
+            segments.append((current_segment_start, entry['start'] + entry['duration'], " ".join(current_segment_text)))
+            current_segment_text = []
+            if transcript_list.index(entry) + 1 < len(transcript_list):
+                current_segment_start = transcript_list[transcript_list.index(entry) + 1]['start']
+
+    if current_segment_text:
+        last_entry = transcript_list[-1]
+        segments.append((current_segment_start, last_entry['start'] + last_entry['duration'], " ".join(current_segment_text)))
+    return segments
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transcript segmentation")
+    parser.add_argument("--entries", type=int, nargs="+", default=[10000, 30000, 100000])
+    parser.add_argument("--skip-legacy-above", type=int, default=100000,
+                        help="Don't run the quadratic loop on larger tracks")
+    args = parser.parse_args()
+
+    segmenter = TranscriptSegmenter()
+    snapping = TranscriptSegmenter(snap_to_sentence=True)
+
+    print(f"{'entries':>8} {'segments':>9} {'legacy ms':>10} {'numpy ms':>9} {'speedup':>8} {'snap ms':>8}")
+    for count in args.entries:
+        track = make_track(count)
+
+        new_seconds, segments = timed(lambda: segmenter.segment(*entry_arrays(track)))
+        snap_seconds, _ = timed(lambda: snapping.segment(*entry_arrays(track)))
+
+        if count <= args.skip_legacy_above:
+            legacy_seconds, expected = timed(legacy_segments, track)
+            actual = [(s.start_time, s.end_time, s.text) for s in segments]
+            assert actual == expected, f"segments differ for {count} entries"
+            legacy = f"{legacy_seconds * 1000:>10.1f}"
+            speedup = f"{legacy_seconds / new_seconds:>7.0f}x"
+        else:
+            legacy, speedup = f"{'-':>10}", f"{'-':>8}"
+
+        print(f"{count:>8} {len(segments):>9} {legacy} {new_seconds * 1000:>9.1f} {speedup} {snap_seconds * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
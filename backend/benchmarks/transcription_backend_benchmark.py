@@ -0,0 +1,70 @@
+"""
+Local transcription backend real-time factor benchmark
+
+Transcribes an audio fixture with faster-whisper (int8, CPU) the way
+TRANSCRIPTION_BACKEND=local does, for several core counts:
+
+  single  - one transcription using all N cores (cpu_threads=N): latency of one video
+  pool    - N concurrent transcriptions with one core each (num_workers=N): throughput
+
+Real-time factor (RTF) = processing seconds / audio seconds; below 1 is faster
+than real time. For the pool, RTF is wall time over the total audio transcribed.
+
+    pip install faster-whisper
+    python benchmarks/transcription_backend_benchmark.py --fixture lecture.ogg --cores 1 2 4 8
+"""
+
+import argparse
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from faster_whisper import WhisperModel
+from faster_whisper.audio import decode_audio
+
+
+def transcribe(model: WhisperModel, audio_data: bytes) -> int:
+    segments, _ = model.transcribe(io.BytesIO(audio_data), language="en")
+    return sum(1 for _ in segments)
+
+
+def run_single(model_name: str, cores: int, audio_data: bytes, audio_seconds: float) -> float:
+    model = WhisperModel(model_name, device="cpu", compute_type="int8", cpu_threads=cores)
+    started = time.perf_counter()
+    transcribe(model, audio_data)
+    return (time.perf_counter() - started) / audio_seconds
+
+
+def run_pool(model_name: str, cores: int, audio_data: bytes, audio_seconds: float) -> float:
+    model = WhisperModel(model_name, device="cpu", compute_type="int8", cpu_threads=1, num_workers=cores)
+    with ThreadPoolExecutor(max_workers=cores) as pool:
+        started = time.perf_counter()
+        list(pool.map(lambda _: transcribe(model, audio_data), range(cores)))
+        return (time.perf_counter() - started) / (audio_seconds * cores)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark local Whisper real-time factor per core count")
+    parser.add_argument("--fixture", required=True, help="Speech audio file (any format ffmpeg reads)")
+    parser.add_argument("--model", default="small")
+    parser.add_argument("--cores", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    args = parser.parse_args()
+
+    with open(args.fixture, "rb") as f:
+        audio_data = f.read()
+    audio_seconds = len(decode_audio(io.BytesIO(audio_data))) / 16000
+
+    # Warm up: downloads the model on first use and loads it into the page cache
+    WhisperModel(args.model, device="cpu", compute_type="int8")
+
+    print(f"Model {args.model} (int8), fixture {audio_seconds:.0f}s of audio\n")
+    print(f"{'cores':>5} {'single RTF':>11} {'pool RTF':>9} {'pool x realtime':>16}")
+    for cores in sorted(set(args.cores)):
+        single = run_single(args.model, cores, audio_data, audio_seconds)
+        pool = run_pool(args.model, cores, audio_data, audio_seconds)
+        print(f"{cores:>5} {single:>11.3f} {pool:>9.3f} {1 / pool:>15.1f}x")
+
+
+if __name__ == "__main__":
+    main()
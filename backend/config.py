@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 
 
 class Settings(BaseSettings):
@@ -17,8 +17,110 @@ class Settings(BaseSettings):
     # Video Processing Configuration
     max_video_duration: int = 3600
     flashcard_interval: int = 120
+    # End transcript segments at a sentence end within 30s after the ~2 minute mark
+    transcript_snap_to_sentence: bool = False
     questions_per_segment: int = 1
     final_quiz_questions: int = 10
+    # Quiz questions pre-generated per transcript segment at ingestion, at varied difficulty
+    # (0 = generate quizzes on request), and quizzes a pooled question is put in before the
+    # pool is topped up with fresh ones in the background
+    question_pool_per_segment: int = 3
+    question_pool_max_serves: int = 5
+
+    # Whisper Transcription Configuration
+    # Audio longer than whisper_chunk_seconds (or over the upload limit) is split on
+    # silences into overlapping chunks that are transcribed concurrently
+    whisper_chunk_seconds: int = 300
+    whisper_chunk_overlap: float = 1.0
+    whisper_max_upload_mb: int = 24
+    # Voice activity pre-pass: only speech between silences of at least
+    # whisper_vad_min_silence seconds is sent for transcription
+    whisper_vad: bool = True
+    whisper_vad_min_silence: float = 1.5
+    # "openai" (hosted whisper-1) or "local" (faster-whisper on this host's CPUs)
+    transcription_backend: str = "openai"
+    # Local backend: model size, threads per transcription, and workers (0 = cores / threads)
+    local_whisper_model: str = "small"
+    local_whisper_cpu_threads: int = 2
+    local_whisper_workers: int = 0
+    # Compressed on-disk cache of caption tracks and Whisper output, LRU-evicted
+    # beyond transcript_cache_max_mb (0 disables; "" dir = system temp dir)
+    transcript_cache_dir: str = ""
+    transcript_cache_max_mb: int = 512
+    # zstd level of transcripts stored in video_transcripts (1-22)
+    transcript_compression_level: int = 10
+    # Cache of LLM responses: in-memory entries, on-disk MB ("" dir = system temp dir) and
+    # lifetime; 0 disables a tier (ttl 0 disables the cache)
+    llm_cache_dir: str = ""
+    llm_cache_max_mb: int = 256
+    llm_cache_memory_entries: int = 1000
+    llm_cache_ttl_hours: float = 168
+    # Shared LLM gateway: pooled connections to OpenAI per process and request timeout; 429 / 5xx /
+    # connection errors are retried with jittered exponential backoff from llm_retry_delay
+    llm_max_connections: int = 50
+    llm_timeout_seconds: float = 120.0
+    llm_max_retries: int = 4
+    llm_retry_delay: float = 1.0
+    llm_retry_max_delay: float = 30.0
+    # Pace calls by the rate-limit headers of OpenAI's responses instead of running into 429s
+    llm_rate_limit_pacing: bool = True
+    # Requests-per-minute limits per model ("gpt-4o=500,gpt-4o-mini=5000"), paced from the
+    # first call; models not listed learn their limit from the headers
+    llm_requests_per_minute: str = ""
+    # Parent directory for per-job audio working directories ("" = system temp dir)
+    ingestion_workdir: str = ""
+
+    # Ingestion Pipeline Configuration
+    # Number of batches that may be transcribed / turned into flashcards at the same time
+    ingestion_transcribe_concurrency: int = 1
+    ingestion_generate_concurrency: int = 1
+    # Retries per batch stage for transient errors, with exponential backoff from this base delay
+    ingestion_batch_max_retries: int = 2
+    ingestion_batch_retry_delay: float = 2.0
+
+    # Ingestion Job Queue Configuration
+    # Jobs are stored in ingestion_jobs and claimed by worker processes (python worker.py)
+    ingestion_lease_seconds: int = 120
+    ingestion_heartbeat_interval: float = 30.0
+    ingestion_poll_interval: float = 2.0
+    ingestion_max_attempts: int = 3
+    # Workers to run inside the API process (0 = API only enqueues)
+    ingestion_embedded_workers: int = 0
+
+    # Ingestion Scheduling Configuration
+    # Jobs from plans with priority_processing use the priority lane; standard jobs
+    # are promoted to it after waiting ingestion_priority_aging_seconds
+    ingestion_max_running_per_user: int = 2
+    ingestion_priority_aging_seconds: int = 600
+
+    # Ingestion Admission Control
+    # Per-process limits on concurrent audio downloads, Whisper calls and flashcard generations
+    ingestion_max_downloads: int = 4
+    ingestion_max_transcriptions: int = 4
+    ingestion_max_generations: int = 4
+    # Question generation calls in flight at once per process (segments of a video run concurrently)
+    question_generation_concurrency: int = 8
+    # Segments per question generation request (1 = one request per segment), and
+    # how often segments whose output came back malformed are retried
+    question_batch_size: int = 5
+    question_batch_retries: int = 1
+    # process-async answers 503 (queue full) / 429 (user's backlog full) beyond these
+    ingestion_max_queue_depth: int = 500
+    ingestion_max_queued_per_user: int = 50
+
+    # Bulk / Playlist Ingestion Configuration
+    bulk_max_videos: int = 50
+    # Videos whose metadata is resolved at the same time per bulk request
+    bulk_metadata_concurrency: int = 8
+
+    # Relay processing progress between worker and API processes via Supabase Realtime broadcast
+    progress_realtime_relay: bool = True
+    # Seconds an in-memory status record is trusted before re-reading video_processing_status
+    status_cache_ttl: float = 2.0
+    # Memory for decompressed transcripts served by the transcript window API (0 disables)
+    transcript_memory_cache_mb: int = 64
+    # Segments per transcript window response, at most
+    transcript_window_max_segments: int = 200
 
     # Polar Payment Configuration
     polar_access_token: str = ""
@@ -42,6 +144,15 @@ class Settings(BaseSettings):
     def cors_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.cors_origins.split(",")]
 
+    @property
+    def llm_requests_per_minute_by_model(self) -> Dict[str, int]:
+        limits = {}
+        for item in self.llm_requests_per_minute.split(","):
+            model, _, rpm = item.partition("=")
+            if model.strip() and rpm.strip():
+                limits[model.strip()] = int(rpm)
+        return limits
+
     class Config:
         env_file = ".env"
         case_sensitive = False
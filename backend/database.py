@@ -5,6 +5,16 @@ import json
 from datetime import datetime
 from logging_config import get_logger
 from fastapi.concurrency import run_in_threadpool
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
+from services.compact_transcript import BLOB_FORMAT_VERSION, CompactTranscript
+
+# Postgres error code for unique constraint violations
+UNIQUE_VIOLATION = "23505"
+
+# Columns of a video row. Transcripts live in video_transcripts and are only
+# loaded by get_transcript, so metadata reads stay a few hundred bytes.
+VIDEO_COLUMNS = "id, title, video_length, url, processing_status, error_message, batch_current, batch_total, created_at, updated_at"
 
 logger = get_logger(__name__)
 
@@ -41,7 +51,6 @@ class Database:
                 "id": video_id,
                 "title": title,
                 "video_length": duration,
-                "transcript": json.dumps(transcript),
                 "url": url,
                 "created_at": datetime.utcnow().isoformat()
             }
@@ -56,6 +65,9 @@ class Database:
 
             video_data = result.data[0]
 
+            if transcript:
+                await self.store_transcript(video_id, CompactTranscript.from_stored(transcript))
+
         if project_id:
             await self.link_video_to_project(video_id, project_id)
 
@@ -63,7 +75,17 @@ class Database:
 
     async def get_video(self, video_id: str) -> Optional[Dict]:
         result = await run_in_threadpool(
-            lambda: self.client.table("videos").select("*").eq("id", video_id).execute()
+            lambda: self.client.table("videos").select(VIDEO_COLUMNS).eq("id", video_id).execute()
+        )
+        return result.data[0] if result.data else None
+
+    async def get_video_status(self, video_id: str) -> Optional[Dict]:
+        """Get the narrow processing status record of a video (kept in sync by triggers)"""
+        result = await run_in_threadpool(
+            lambda: self.client.table("video_processing_status")
+            .select("processing_status, error_message, batch_current, batch_total, flashcard_count, has_transcript")
+            .eq("video_id", video_id)
+            .execute()
         )
         return result.data[0] if result.data else None
 
@@ -113,21 +135,26 @@ class Database:
                 "id": video_id,
                 "title": title,
                 "video_length": duration,
-                "transcript": None,  # Will be filled during processing
                 "url": url,
                 "processing_status": processing_status,
                 "created_at": datetime.utcnow().isoformat()
             }
 
+            # ON CONFLICT DO NOTHING - another API process may insert the same video concurrently
             result = await run_in_threadpool(
-                lambda: self.client.table("videos").insert(data).execute()
+                lambda: self.client.table("videos")
+                .upsert(data, on_conflict="id", ignore_duplicates=True)
+                .execute()
             )
 
-            if not result.data:
-                logger.error("DB: Video insert returned no data")
-                return None
-
-            video_data = result.data[0]
+            if result.data:
+                video_data = result.data[0]
+            else:
+                logger.info("DB: Video inserted concurrently by another request, reusing it")
+                video_data = await self.get_video(video_id)
+                if not video_data:
+                    logger.error("DB: Video insert returned no data")
+                    return None
 
         if project_id:
             await self.link_video_to_project(video_id, project_id)
@@ -140,9 +167,10 @@ class Database:
         status: str,
         error_message: Optional[str] = None,
         batch_current: Optional[int] = None,
-        batch_total: Optional[int] = None
+        batch_total: Optional[int] = None,
+        clear_error: bool = False
     ) -> Optional[Dict]:
-        """Update video processing status with optional batch tracking"""
+        """Update video processing status with optional batch tracking (clear_error resets error_message)"""
         logger.info(f"DB: update_video_status | video_id={video_id}, status={status}, batch={batch_current}/{batch_total}")
 
         data = {
@@ -152,6 +180,8 @@ class Database:
 
         if error_message:
             data["error_message"] = error_message
+        elif clear_error:
+            data["error_message"] = None
 
         if batch_current is not None:
             data["batch_current"] = batch_current
@@ -168,27 +198,67 @@ class Database:
 
         return result.data[0] if result.data else None
 
-    async def update_video_transcript(
-        self,
-        video_id: str,
-        transcript: Dict
-    ) -> Optional[Dict]:
-        """Update video transcript after processing"""
-        logger.info(f"DB: update_video_transcript | video_id={video_id}")
+    async def store_transcript(self, video_id: str, transcript: CompactTranscript):
+        """Store a video's transcript after processing, zstd-compressed, in video_transcripts"""
+        blob = transcript.to_blob(settings.transcript_compression_level)
+        logger.info(
+            f"DB: store_transcript | video_id={video_id}, segments={len(transcript)}, bytes={len(blob)}"
+        )
 
         data = {
-            "transcript": json.dumps(transcript),
+            "video_id": video_id,
+            "format_version": BLOB_FORMAT_VERSION,
+            "data": "\\x" + blob.hex(),  # bytea input format
+            "segment_count": len(transcript),
+            "text_length": len(transcript.text),
             "updated_at": datetime.utcnow().isoformat()
         }
 
+        await run_in_threadpool(
+            lambda: self.client.table("video_transcripts")
+            .upsert(data, on_conflict="video_id", returning=ReturnMethod.minimal)
+            .execute()
+        )
+
+    async def get_transcript(self, video_id: str) -> Optional[CompactTranscript]:
+        """Load a video's transcript (None until processing has stored one)"""
         result = await run_in_threadpool(
+            lambda: self.client.table("video_transcripts")
+            .select("format_version, data")
+            .eq("video_id", video_id)
+            .execute()
+        )
+        if result.data:
+            row = result.data[0]
+            # PostgREST returns bytea as a \x-prefixed hex string
+            return CompactTranscript.from_blob(bytes.fromhex(row["data"][2:]), row["format_version"])
+
+        # Videos processed before video_transcripts existed keep their JSON in videos.transcript
+        legacy = await run_in_threadpool(
             lambda: self.client.table("videos")
-            .update(data)
+            .select("transcript")
             .eq("id", video_id)
             .execute()
         )
+        transcript = CompactTranscript.from_stored(legacy.data[0]["transcript"]) if legacy.data else None
+        if transcript is not None:
+            await self._migrate_legacy_transcript(video_id, transcript)
+        return transcript
 
-        return result.data[0] if result.data else None
+    async def _migrate_legacy_transcript(self, video_id: str, transcript: CompactTranscript):
+        """Move a transcript read from videos.transcript into video_transcripts"""
+        try:
+            await self.store_transcript(video_id, transcript)
+            await run_in_threadpool(
+                lambda: self.client.table("videos")
+                .update({"transcript": None})
+                .eq("id", video_id)
+                .execute()
+            )
+            logger.info(f"DB: Moved legacy transcript of video {video_id} to video_transcripts")
+        except Exception as e:
+            # The transcript was read fine - moving it can be retried on the next read
+            logger.warning(f"DB: Could not move legacy transcript of video {video_id}: {str(e)}")
 
     async def get_videos_by_project(self, project_id: str) -> List[Dict]:
         """Get all videos for a specific project"""
@@ -208,7 +278,7 @@ class Database:
         # Get video details
         videos_result = await run_in_threadpool(
             lambda: self.client.table("videos")
-            .select("*")
+            .select(VIDEO_COLUMNS)
             .in_("id", video_ids)
             .execute()
         )
@@ -416,6 +486,268 @@ class Database:
         )
         return result.data or []
 
+    # -------------------------
+    # Question Pool
+    # -------------------------
+
+    async def store_pool_questions(self, video_id: str, questions: List[Dict]) -> None:
+        """Add questions to a video's quiz question pool ({id, segment_index, difficulty, question_data})"""
+        logger.info(f"DB: store_pool_questions | video_id={video_id}, count={len(questions)}")
+        payload = [
+            {
+                "id": q["id"],
+                "video_id": video_id,
+                "segment_index": q["segment_index"],
+                "difficulty": q["difficulty"],
+                "question_data": q["question_data"],
+                "created_at": datetime.utcnow().isoformat()
+            }
+            for q in questions
+        ]
+
+        await run_in_threadpool(
+            lambda: self.client.table("question_pool")
+            .insert(payload, returning=ReturnMethod.minimal)
+            .execute()
+        )
+
+    async def get_question_pool(self, video_id: str) -> List[Dict]:
+        result = await run_in_threadpool(
+            lambda: self.client.table("question_pool")
+            .select("id, segment_index, difficulty, question_data, times_served")
+            .eq("video_id", video_id)
+            .execute()
+        )
+        return result.data or []
+
+    async def mark_pool_questions_served(self, question_ids: List[str]) -> None:
+        """Count one more quiz for each of these pooled questions"""
+        await run_in_threadpool(
+            lambda: self.client.rpc(
+                "mark_question_pool_served",
+                {"p_question_ids": question_ids}
+            ).execute()
+        )
+
+    # -------------------------
+    # Ingestion Jobs
+    # -------------------------
+
+    async def enqueue_ingestion_job(
+        self,
+        video_id: str,
+        video_url: str,
+        title: str,
+        user_id: Optional[str] = None,
+        project_id: Optional[str] = None,
+        max_attempts: int = 3,
+        lane: str = "standard"
+    ) -> Optional[Dict]:
+        """Add a video to the durable ingestion queue"""
+        logger.info(f"DB: enqueue_ingestion_job | video_id={video_id}, lane={lane}")
+
+        data = {
+            "video_id": video_id,
+            "video_url": video_url,
+            "title": title,
+            "user_id": user_id,
+            "project_id": project_id,
+            "status": "queued",
+            "lane": lane,
+            "max_attempts": max_attempts,
+            "enqueued_at": datetime.utcnow().isoformat()
+        }
+
+        try:
+            result = await run_in_threadpool(
+                lambda: self.client.table("ingestion_jobs").insert(data).execute()
+            )
+        except APIError as e:
+            if e.code != UNIQUE_VIOLATION:
+                raise
+            # At most one active job per video - attach to the one already queued/running
+            logger.info(f"DB: Video {video_id} already has an active ingestion job")
+            return await self.get_active_ingestion_job(video_id)
+
+        return result.data[0] if result.data else None
+
+    async def get_active_ingestion_job(self, video_id: str) -> Optional[Dict]:
+        """Get the queued or running job for a video, if any"""
+        result = await run_in_threadpool(
+            lambda: self.client.table("ingestion_jobs")
+            .select("*")
+            .eq("video_id", video_id)
+            .in_("status", ["queued", "running"])
+            .execute()
+        )
+        return result.data[0] if result.data else None
+
+    async def claim_ingestion_job(
+        self,
+        worker_id: str,
+        lease_seconds: int,
+        max_running_per_user: int = 2,
+        aging_seconds: int = 600
+    ) -> Optional[Dict]:
+        """Claim the next runnable job by lane and fair share (SKIP LOCKED) and take a lease on it"""
+        result = await run_in_threadpool(
+            lambda: self.client.rpc(
+                "claim_ingestion_job",
+                {
+                    "p_worker_id": worker_id,
+                    "p_lease_seconds": lease_seconds,
+                    "p_max_running_per_user": max_running_per_user,
+                    "p_aging_seconds": aging_seconds
+                }
+            ).execute()
+        )
+        return result.data[0] if result.data else None
+
+    async def heartbeat_ingestion_job(self, job_id: str, worker_id: str, lease_seconds: int) -> bool:
+        """Extend the lease on a running job. Returns False if the lease was lost."""
+        result = await run_in_threadpool(
+            lambda: self.client.rpc(
+                "heartbeat_ingestion_job",
+                {"p_job_id": job_id, "p_worker_id": worker_id, "p_lease_seconds": lease_seconds}
+            ).execute()
+        )
+        return bool(result.data)
+
+    async def finish_ingestion_job(
+        self,
+        job_id: str,
+        worker_id: str,
+        status: str,
+        error: Optional[str] = None
+    ) -> bool:
+        """Mark a claimed job as completed or failed"""
+        logger.info(f"DB: finish_ingestion_job | job_id={job_id}, status={status}")
+        result = await run_in_threadpool(
+            lambda: self.client.rpc(
+                "finish_ingestion_job",
+                {"p_job_id": job_id, "p_worker_id": worker_id, "p_status": status, "p_error": error}
+            ).execute()
+        )
+        return bool(result.data)
+
+    async def get_ingestion_batches(self, video_id: str) -> List[Dict]:
+        """Checkpointed batches of a video, in batch order"""
+        result = await run_in_threadpool(
+            lambda: self.client.table("ingestion_batches")
+            .select("batch_index, start_time, end_time, segments, full_text")
+            .eq("video_id", video_id)
+            .order("batch_index")
+            .execute()
+        )
+        return result.data or []
+
+    async def checkpoint_ingestion_batch(
+        self,
+        video_id: str,
+        batch_index: int,
+        start_time: float,
+        end_time: float,
+        segments: List[Dict],
+        full_text: str,
+        questions: List[Dict]
+    ) -> bool:
+        """
+        Store a batch's flashcards together with its transcript checkpoint (one transaction).
+        Returns False if the batch had already been checkpointed.
+        """
+        logger.info(f"DB: checkpoint_ingestion_batch | video_id={video_id}, batch={batch_index}, questions={len(questions)}")
+        result = await run_in_threadpool(
+            lambda: self.client.rpc(
+                "checkpoint_ingestion_batch",
+                {
+                    "p_video_id": video_id,
+                    "p_batch_index": batch_index,
+                    "p_start_time": start_time,
+                    "p_end_time": end_time,
+                    "p_segments": segments,
+                    "p_full_text": full_text,
+                    "p_questions": [json.dumps(q) for q in questions]
+                }
+            ).execute()
+        )
+        return bool(result.data)
+
+    async def delete_ingestion_batches(self, video_id: str) -> None:
+        await run_in_threadpool(
+            lambda: self.client.table("ingestion_batches")
+            .delete()
+            .eq("video_id", video_id)
+            .execute()
+        )
+
+    async def get_ingestion_queue_stats(self, window_seconds: int = 900) -> List[Dict]:
+        """Queue depth and wait time per lane"""
+        result = await run_in_threadpool(
+            lambda: self.client.rpc(
+                "ingestion_queue_stats",
+                {"p_window_seconds": window_seconds}
+            ).execute()
+        )
+        return result.data or []
+
+    async def get_ingestion_admission_stats(self, user_id: Optional[str] = None) -> Dict:
+        """Queued/running job counts (global and for the user) and recent mean run time"""
+        result = await run_in_threadpool(
+            lambda: self.client.rpc(
+                "ingestion_admission_stats",
+                {"p_user_id": user_id}
+            ).execute()
+        )
+        return result.data[0] if result.data else {}
+
+    async def create_ingestion_bulk(
+        self,
+        project_id: str,
+        videos: List[Dict],
+        skipped: List[Dict],
+        user_id: Optional[str] = None,
+        source_url: Optional[str] = None
+    ) -> Optional[Dict]:
+        """Record a bulk / playlist submission ([{video_id, url}] and [{url, reason}])"""
+        logger.info(f"DB: create_ingestion_bulk | project_id={project_id}, videos={len(videos)}, skipped={len(skipped)}")
+        data = {
+            "project_id": project_id,
+            "user_id": user_id,
+            "source_url": source_url,
+            "videos": videos,
+            "skipped": skipped,
+            "created_at": datetime.utcnow().isoformat()
+        }
+        result = await run_in_threadpool(
+            lambda: self.client.table("ingestion_bulks").insert(data).execute()
+        )
+        return result.data[0] if result.data else None
+
+    async def get_ingestion_bulk(self, bulk_id: str) -> Optional[Dict]:
+        result = await run_in_threadpool(
+            lambda: self.client.table("ingestion_bulks")
+            .select("*")
+            .eq("id", bulk_id)
+            .execute()
+        )
+        return result.data[0] if result.data else None
+
+    async def get_video_statuses(self, video_ids: List[str]) -> Dict[str, Dict]:
+        """Narrow processing status records (plus title) of several videos, keyed by video id"""
+        if not video_ids:
+            return {}
+        result = await run_in_threadpool(
+            lambda: self.client.table("video_processing_status")
+            .select("video_id, processing_status, error_message, batch_current, batch_total, flashcard_count, has_transcript, videos(title)")
+            .in_("video_id", video_ids)
+            .execute()
+        )
+        statuses = {}
+        for row in result.data or []:
+            video = row.pop("videos", None) or {}
+            statuses[row.pop("video_id")] = {"title": video.get("title"), **row}
+        return statuses
+
     # -------------------------
     # Quiz
     # -------------------------
@@ -625,6 +957,22 @@ class Database:
         )
         return result.data[0] if result.data else None
 
+    async def has_priority_processing(self, user_id: str) -> bool:
+        """Whether the user's active plan includes priority_processing"""
+        result = await run_in_threadpool(
+            lambda: self.client.table("subscriptions")
+            .select("pricing_plans(features)")
+            .eq("user_id", user_id)
+            .eq("status", "active")
+            .limit(1)
+            .execute()
+        )
+        if not result.data:
+            return False
+
+        plan = result.data[0].get("pricing_plans") or {}
+        return bool((plan.get("features") or {}).get("priority_processing"))
+
     async def check_transcription_credits(self, user_id: str, required_credits: int) -> tuple[bool, int]:
         """
         Check if user has enough transcription credits.
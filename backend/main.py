@@ -1,8 +1,13 @@
 from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from config import settings
 from routes import video, questions, quiz, reports, notes, projects, users, analytics, subscriptions
 from logging_config import setup_logging, get_logger
+from services.ingestion_worker import run_workers
+from services.llm_gateway import llm_gateway
+from services.metrics import metrics
+import asyncio
 import time
 
 # Initialize logging
@@ -53,18 +58,36 @@ app.include_router(analytics.router, prefix="/api/analytics", tags=["analytics"]
 app.include_router(subscriptions.router, prefix="/api/subscriptions", tags=["subscriptions"])
 
 
+# Optional in-process ingestion workers (see INGESTION_EMBEDDED_WORKERS)
+worker_stop_event = asyncio.Event()
+embedded_workers_task = None
+
+
 @app.on_event("startup")
 async def startup_event():
+    global embedded_workers_task
+
     logger.info("=" * 80)
     logger.info("🚀 Preplm Video Learning API Starting...")
     logger.info(f"Version: 1.0.0")
     logger.info(f"Port: {settings.backend_port}")
     logger.info(f"CORS Origins: {settings.cors_origins}")
+    logger.info(f"Embedded ingestion workers: {settings.ingestion_embedded_workers}")
     logger.info("=" * 80)
 
+    if settings.ingestion_embedded_workers > 0:
+        embedded_workers_task = asyncio.create_task(
+            run_workers(settings.ingestion_embedded_workers, worker_stop_event)
+        )
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    worker_stop_event.set()
+    if embedded_workers_task:
+        embedded_workers_task.cancel()
+    await llm_gateway.close()
+
     logger.info("=" * 80)
     logger.info("🛑 Preplm Video Learning API Shutting Down...")
     logger.info("=" * 80)
@@ -86,6 +109,12 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Prometheus metrics (ingestion queue depth and wait time per lane, ...)"""
+    return await metrics.render()
+
+
 if __name__ == "__main__":
     import uvicorn
     logger.info(f"Starting server on http://0.0.0.0:{settings.backend_port}")
@@ -0,0 +1,25 @@
+-- Migration: Ingestion admission control
+-- One round trip for everything process-async needs to decide whether the
+-- ingestion queue can take another video. Requires add_ingestion_jobs.sql.
+-- Safe to run multiple times
+
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_completed_finished ON ingestion_jobs(finished_at)
+    WHERE status = 'completed';
+
+-- Queue backlog, globally and for one user, plus the mean run time of jobs
+-- finished in the last hour (NULL if none) for Retry-After estimates
+CREATE OR REPLACE FUNCTION ingestion_admission_stats(p_user_id UUID DEFAULT NULL)
+RETURNS TABLE (
+    queued BIGINT,
+    running BIGINT,
+    user_queued BIGINT,
+    avg_run_seconds DOUBLE PRECISION
+) AS $$
+    SELECT
+        (SELECT COUNT(*) FROM ingestion_jobs WHERE status = 'queued'),
+        (SELECT COUNT(*) FROM ingestion_jobs WHERE status = 'running'),
+        (SELECT COUNT(*) FROM ingestion_jobs WHERE status = 'queued' AND user_id = p_user_id),
+        (SELECT AVG(EXTRACT(EPOCH FROM finished_at - started_at))::DOUBLE PRECISION
+         FROM ingestion_jobs
+         WHERE status = 'completed' AND finished_at >= NOW() - INTERVAL '1 hour');
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,59 @@
+-- Migration: Checkpointed batch ingestion
+-- Every completed batch of a long video is checkpointed (transcript segments
+-- and flashcards in one transaction), so a retried or resumed ingestion job
+-- continues from the first incomplete batch instead of starting over.
+-- Safe to run multiple times
+
+CREATE TABLE IF NOT EXISTS ingestion_batches (
+    video_id VARCHAR(255) NOT NULL REFERENCES videos(id) ON DELETE CASCADE,
+    batch_index INTEGER NOT NULL, -- 1-based, matches videos.batch_current
+    start_time FLOAT NOT NULL,
+    end_time FLOAT NOT NULL,
+    segments JSONB NOT NULL, -- Transcript segments of this batch
+    full_text TEXT NOT NULL DEFAULT '',
+    flashcard_count INTEGER NOT NULL DEFAULT 0,
+    completed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (video_id, batch_index)
+);
+
+ALTER TABLE ingestion_batches ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "System can manage ingestion batches" ON ingestion_batches;
+CREATE POLICY "System can manage ingestion batches" ON ingestion_batches
+    FOR ALL WITH CHECK (true);
+
+-- Store a batch's flashcards and its checkpoint atomically.
+-- p_questions is a JSON array of question_data values, stored as-is.
+-- Returns false (and stores nothing) if the batch was already checkpointed,
+-- so retrying a commit whose response was lost is harmless.
+CREATE OR REPLACE FUNCTION checkpoint_ingestion_batch(
+    p_video_id VARCHAR(255),
+    p_batch_index INTEGER,
+    p_start_time FLOAT,
+    p_end_time FLOAT,
+    p_segments JSONB,
+    p_full_text TEXT,
+    p_questions JSONB
+)
+RETURNS BOOLEAN AS $$
+BEGIN
+    INSERT INTO ingestion_batches (
+        video_id, batch_index, start_time, end_time, segments, full_text, flashcard_count
+    )
+    VALUES (
+        p_video_id, p_batch_index, p_start_time, p_end_time, p_segments, p_full_text,
+        jsonb_array_length(p_questions)
+    )
+    ON CONFLICT (video_id, batch_index) DO NOTHING;
+
+    IF NOT FOUND THEN
+        RETURN FALSE;
+    END IF;
+
+    INSERT INTO questions (video_id, question_data, created_at)
+    SELECT p_video_id, question, NOW()
+    FROM jsonb_array_elements(p_questions) AS question;
+
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,22 @@
+-- Migration: Bulk / playlist ingestion
+-- One row per bulk request (a playlist or a list of URLs added to a project),
+-- so the videos it admitted can be followed as a group.
+-- Safe to run multiple times
+
+CREATE TABLE IF NOT EXISTS ingestion_bulks (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    project_id UUID NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    user_id UUID REFERENCES users(id) ON DELETE SET NULL,
+    source_url TEXT, -- Playlist URL, if the bulk came from one
+    videos JSONB NOT NULL DEFAULT '[]'::jsonb, -- [{video_id, url}] in submission order
+    skipped JSONB NOT NULL DEFAULT '[]'::jsonb, -- [{url, reason}] rejected at submission
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingestion_bulks_project ON ingestion_bulks(project_id, created_at DESC);
+
+ALTER TABLE ingestion_bulks ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "System can manage ingestion bulks" ON ingestion_bulks;
+CREATE POLICY "System can manage ingestion bulks" ON ingestion_bulks
+    FOR ALL WITH CHECK (true);
@@ -0,0 +1,113 @@
+-- Migration: Durable ingestion job queue
+-- Replaces in-process FastAPI BackgroundTasks with a jobs table that any number
+-- of worker processes can claim from (lease + heartbeat, FOR UPDATE SKIP LOCKED)
+-- Safe to run multiple times
+
+CREATE TABLE IF NOT EXISTS ingestion_jobs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    video_id VARCHAR(255) NOT NULL REFERENCES videos(id) ON DELETE CASCADE,
+    video_url TEXT NOT NULL,
+    title TEXT,
+    user_id UUID,
+    project_id UUID,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued', -- queued, running, completed, failed
+    attempts INTEGER NOT NULL DEFAULT 0, -- Number of times the job has been claimed
+    max_attempts INTEGER NOT NULL DEFAULT 3, -- Lease expiries tolerated before giving up
+    worker_id TEXT, -- Worker currently holding the lease
+    lease_expires_at TIMESTAMP WITH TIME ZONE, -- Job is reclaimable once this passes
+    last_error TEXT,
+    enqueued_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    started_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_status_enqueued ON ingestion_jobs(status, enqueued_at);
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_video_id ON ingestion_jobs(video_id);
+
+-- At most one active job per video, so concurrent submissions of the same URL
+-- (from any API process) coalesce onto a single ingestion run
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ingestion_jobs_active_video ON ingestion_jobs(video_id)
+    WHERE status IN ('queued', 'running');
+
+ALTER TABLE ingestion_jobs ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "System can manage ingestion jobs" ON ingestion_jobs;
+CREATE POLICY "System can manage ingestion jobs" ON ingestion_jobs
+    FOR ALL WITH CHECK (true);
+
+-- Claim the oldest runnable job for a worker.
+-- Runnable = queued, or running with an expired lease (the worker died).
+-- SKIP LOCKED lets concurrent workers claim different jobs without blocking.
+CREATE OR REPLACE FUNCTION claim_ingestion_job(p_worker_id TEXT, p_lease_seconds INTEGER)
+RETURNS SETOF ingestion_jobs AS $$
+BEGIN
+    -- Jobs whose lease expired too many times are given up on
+    WITH exhausted AS (
+        UPDATE ingestion_jobs
+        SET status = 'failed',
+            last_error = 'Lease expired after ' || attempts || ' attempts',
+            finished_at = NOW(),
+            updated_at = NOW()
+        WHERE status = 'running'
+          AND lease_expires_at < NOW()
+          AND attempts >= max_attempts
+        RETURNING video_id, last_error
+    )
+    UPDATE videos
+    SET processing_status = 'failed',
+        error_message = exhausted.last_error,
+        updated_at = NOW()
+    FROM exhausted
+    WHERE videos.id = exhausted.video_id;
+
+    RETURN QUERY
+    UPDATE ingestion_jobs AS j
+    SET status = 'running',
+        worker_id = p_worker_id,
+        attempts = j.attempts + 1,
+        lease_expires_at = NOW() + make_interval(secs => p_lease_seconds),
+        started_at = COALESCE(j.started_at, NOW()),
+        updated_at = NOW()
+    WHERE j.id = (
+        SELECT id FROM ingestion_jobs
+        WHERE status = 'queued'
+           OR (status = 'running' AND lease_expires_at < NOW())
+        ORDER BY enqueued_at
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING j.*;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Extend the lease of a running job. Returns false if the worker lost the lease.
+CREATE OR REPLACE FUNCTION heartbeat_ingestion_job(p_job_id UUID, p_worker_id TEXT, p_lease_seconds INTEGER)
+RETURNS BOOLEAN AS $$
+BEGIN
+    UPDATE ingestion_jobs
+    SET lease_expires_at = NOW() + make_interval(secs => p_lease_seconds),
+        updated_at = NOW()
+    WHERE id = p_job_id
+      AND worker_id = p_worker_id
+      AND status = 'running';
+    RETURN FOUND;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Mark a job finished (p_status = 'completed' or 'failed')
+CREATE OR REPLACE FUNCTION finish_ingestion_job(p_job_id UUID, p_worker_id TEXT, p_status TEXT, p_error TEXT DEFAULT NULL)
+RETURNS BOOLEAN AS $$
+BEGIN
+    UPDATE ingestion_jobs
+    SET status = p_status,
+        last_error = p_error,
+        lease_expires_at = NULL,
+        finished_at = NOW(),
+        updated_at = NOW()
+    WHERE id = p_job_id
+      AND worker_id = p_worker_id
+      AND status = 'running';
+    RETURN FOUND;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,150 @@
+-- Migration: Priority lanes and per-user fair share for the ingestion queue
+-- Jobs from plans with priority_processing go to the 'priority' lane; every
+-- user is limited to a few concurrently running jobs so one large upload
+-- cannot starve everyone else. Requires add_ingestion_jobs.sql.
+-- Safe to run multiple times
+
+ALTER TABLE ingestion_jobs ADD COLUMN IF NOT EXISTS lane VARCHAR(20) NOT NULL DEFAULT 'standard'; -- priority, standard
+
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_user_status ON ingestion_jobs(user_id, status);
+
+DROP FUNCTION IF EXISTS claim_ingestion_job(TEXT, INTEGER);
+
+-- Claim the next job for a worker.
+-- Runnable = queued, or running with an expired lease (the worker died).
+-- Order: reclaims first, then the priority lane (standard jobs join it once
+-- they have waited p_aging_seconds), then round-robin across users weighted by
+-- how many jobs each started in the last p_aging_seconds, then oldest first.
+-- Users already running p_max_running_per_user jobs are skipped until one finishes.
+-- SKIP LOCKED lets concurrent workers claim different jobs without blocking; a
+-- per-user advisory lock serializes claims of one user's jobs, so workers
+-- claiming at the same moment can't both take that user's last free slot.
+CREATE OR REPLACE FUNCTION claim_ingestion_job(
+    p_worker_id TEXT,
+    p_lease_seconds INTEGER,
+    p_max_running_per_user INTEGER DEFAULT 2,
+    p_aging_seconds INTEGER DEFAULT 600
+)
+RETURNS SETOF ingestion_jobs AS $$
+DECLARE
+    v_job_id UUID;
+    v_user_id UUID;
+    v_status VARCHAR(20);
+    v_full_users UUID[] := '{}';
+BEGIN
+    -- Jobs whose lease expired too many times are given up on
+    WITH exhausted AS (
+        UPDATE ingestion_jobs
+        SET status = 'failed',
+            last_error = 'Lease expired after ' || attempts || ' attempts',
+            finished_at = NOW(),
+            updated_at = NOW()
+        WHERE status = 'running'
+          AND lease_expires_at < NOW()
+          AND attempts >= max_attempts
+        RETURNING video_id, last_error
+    )
+    UPDATE videos
+    SET processing_status = 'failed',
+        error_message = exhausted.last_error,
+        updated_at = NOW()
+    FROM exhausted
+    WHERE videos.id = exhausted.video_id;
+
+    LOOP
+        v_job_id := NULL;
+
+        WITH usage AS (
+            SELECT user_id,
+                   COUNT(*) FILTER (WHERE status = 'running' AND lease_expires_at >= NOW()) AS running,
+                   COUNT(*) FILTER (WHERE started_at >= NOW() - make_interval(secs => p_aging_seconds)) AS recent
+            FROM ingestion_jobs
+            WHERE user_id IS NOT NULL
+              AND (status = 'running' OR started_at >= NOW() - make_interval(secs => p_aging_seconds))
+            GROUP BY user_id
+        ),
+        ranked AS (
+            -- share: the job's place in its user's queue plus the user's recent starts,
+            -- so users take turns instead of the oldest upload draining first
+            SELECT c.id,
+                   c.status = 'running' AS reclaim,
+                   c.lane = 'priority' OR c.enqueued_at < NOW() - make_interval(secs => p_aging_seconds) AS prioritized,
+                   ROW_NUMBER() OVER (PARTITION BY COALESCE(c.user_id::TEXT, c.id::TEXT) ORDER BY c.enqueued_at)
+                       + COALESCE(usage.recent, 0) AS share
+            FROM ingestion_jobs c
+            LEFT JOIN usage ON usage.user_id = c.user_id
+            WHERE (c.status = 'queued'
+                   AND COALESCE(usage.running, 0) < p_max_running_per_user
+                   AND (c.user_id IS NULL OR c.user_id <> ALL(v_full_users)))
+               OR (c.status = 'running' AND c.lease_expires_at < NOW())
+        )
+        SELECT q.id, q.user_id, q.status
+        INTO v_job_id, v_user_id, v_status
+        FROM ingestion_jobs q
+        JOIN ranked ON ranked.id = q.id
+        -- Repeated on q so it is rechecked after the row lock (ranked is a snapshot)
+        WHERE q.status = 'queued'
+           OR (q.status = 'running' AND q.lease_expires_at < NOW())
+        ORDER BY ranked.reclaim DESC, ranked.prioritized DESC, ranked.share, q.enqueued_at
+        LIMIT 1
+        FOR UPDATE OF q SKIP LOCKED;
+
+        IF v_job_id IS NULL THEN
+            RETURN;
+        END IF;
+
+        -- The running count above is a snapshot too: take the user's lock (held until
+        -- commit, so concurrent claims for them wait here) and count again
+        IF v_status = 'queued' AND v_user_id IS NOT NULL THEN
+            PERFORM pg_advisory_xact_lock(hashtext(v_user_id::TEXT));
+            IF (
+                SELECT COUNT(*) FROM ingestion_jobs
+                WHERE user_id = v_user_id AND status = 'running' AND lease_expires_at >= NOW()
+            ) >= p_max_running_per_user THEN
+                v_full_users := array_append(v_full_users, v_user_id);
+                CONTINUE;
+            END IF;
+        END IF;
+
+        RETURN QUERY
+        UPDATE ingestion_jobs AS j
+        SET status = 'running',
+            worker_id = p_worker_id,
+            attempts = j.attempts + 1,
+            lease_expires_at = NOW() + make_interval(secs => p_lease_seconds),
+            started_at = COALESCE(j.started_at, NOW()),
+            updated_at = NOW()
+        WHERE j.id = v_job_id
+        RETURNING j.*;
+        RETURN;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Queue depth and wait time per lane, for the /metrics endpoint.
+-- Wait = time from enqueue to first claim, over jobs claimed in the last p_window_seconds.
+CREATE OR REPLACE FUNCTION ingestion_queue_stats(p_window_seconds INTEGER DEFAULT 900)
+RETURNS TABLE (
+    lane VARCHAR(20),
+    queued BIGINT,
+    running BIGINT,
+    oldest_queued_seconds DOUBLE PRECISION,
+    started_recently BIGINT,
+    avg_wait_seconds DOUBLE PRECISION,
+    p95_wait_seconds DOUBLE PRECISION
+) AS $$
+    SELECT
+        j.lane,
+        COUNT(*) FILTER (WHERE j.status = 'queued'),
+        COUNT(*) FILTER (WHERE j.status = 'running'),
+        COALESCE(EXTRACT(EPOCH FROM NOW() - MIN(j.enqueued_at) FILTER (WHERE j.status = 'queued')), 0)::DOUBLE PRECISION,
+        COUNT(*) FILTER (WHERE j.started_at >= NOW() - make_interval(secs => p_window_seconds)),
+        COALESCE(AVG(EXTRACT(EPOCH FROM j.started_at - j.enqueued_at))
+            FILTER (WHERE j.started_at >= NOW() - make_interval(secs => p_window_seconds)), 0)::DOUBLE PRECISION,
+        COALESCE(percentile_cont(0.95) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM j.started_at - j.enqueued_at))
+            FILTER (WHERE j.started_at >= NOW() - make_interval(secs => p_window_seconds)), 0)::DOUBLE PRECISION
+    FROM ingestion_jobs j
+    WHERE j.status IN ('queued', 'running')
+       OR j.started_at >= NOW() - make_interval(secs => p_window_seconds)
+    GROUP BY j.lane;
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,35 @@
+-- Migration: Per-video question pool
+-- Ingestion pre-generates several quiz questions per transcript segment, so
+-- POST /api/quiz/generate samples a quiz from the pool instead of calling the
+-- LLM while the user waits. Videos processed before this migration get their
+-- pool built in the background when their first quiz is generated.
+-- Safe to run multiple times
+
+-- Quiz questions pre-generated per video at ingestion: several per transcript
+-- segment at varied difficulty. Quizzes are sampled from here instead of
+-- generated while the user waits.
+CREATE TABLE IF NOT EXISTS question_pool (
+    id VARCHAR(255) PRIMARY KEY, -- Question id, as referenced by user_attempts.question_id
+    video_id VARCHAR(255) NOT NULL REFERENCES videos(id) ON DELETE CASCADE,
+    segment_index INTEGER NOT NULL, -- Transcript segment the question is about
+    difficulty VARCHAR(10) NOT NULL DEFAULT 'medium', -- easy, medium, hard
+    question_data JSONB NOT NULL,
+    times_served INTEGER NOT NULL DEFAULT 0, -- Quizzes the question was put in
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_question_pool_video_id ON question_pool(video_id, segment_index);
+
+ALTER TABLE question_pool ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "System can manage question pool" ON question_pool;
+CREATE POLICY "System can manage question pool" ON question_pool
+    FOR ALL WITH CHECK (true);
+
+-- Count one more quiz for each of these pooled questions
+CREATE OR REPLACE FUNCTION mark_question_pool_served(p_question_ids TEXT[])
+RETURNS VOID AS $$
+    UPDATE question_pool
+    SET times_served = times_served + 1
+    WHERE id = ANY(p_question_ids);
+$$ LANGUAGE sql;
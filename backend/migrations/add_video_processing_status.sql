@@ -0,0 +1,117 @@
+-- Migration: Narrow video processing status record
+-- Status polling used to read the whole videos row (transcript included) and
+-- every question row just to count them. This table holds only what a status
+-- read needs and is kept in sync by triggers on videos and questions.
+-- Safe to run multiple times
+
+CREATE TABLE IF NOT EXISTS video_processing_status (
+    video_id VARCHAR(255) PRIMARY KEY REFERENCES videos(id) ON DELETE CASCADE,
+    processing_status VARCHAR(50) NOT NULL DEFAULT 'processing',
+    error_message TEXT,
+    batch_current INTEGER NOT NULL DEFAULT 0,
+    batch_total INTEGER NOT NULL DEFAULT 0,
+    flashcard_count INTEGER NOT NULL DEFAULT 0, -- Number of questions stored for the video
+    has_transcript BOOLEAN NOT NULL DEFAULT FALSE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE video_processing_status ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Anyone can view video processing status" ON video_processing_status;
+CREATE POLICY "Anyone can view video processing status" ON video_processing_status
+    FOR SELECT USING (true);
+
+DROP POLICY IF EXISTS "System can manage video processing status" ON video_processing_status;
+CREATE POLICY "System can manage video processing status" ON video_processing_status
+    FOR ALL WITH CHECK (true);
+
+-- Mirror status columns of videos into the narrow record
+CREATE OR REPLACE FUNCTION sync_video_processing_status()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO video_processing_status (
+        video_id, processing_status, error_message, batch_current, batch_total, has_transcript, updated_at
+    )
+    VALUES (
+        NEW.id,
+        COALESCE(NEW.processing_status, 'processing'),
+        NEW.error_message,
+        COALESCE(NEW.batch_current, 0),
+        COALESCE(NEW.batch_total, 0),
+        NEW.transcript IS NOT NULL,
+        NOW()
+    )
+    ON CONFLICT (video_id) DO UPDATE
+    SET processing_status = EXCLUDED.processing_status,
+        error_message = EXCLUDED.error_message,
+        batch_current = EXCLUDED.batch_current,
+        batch_total = EXCLUDED.batch_total,
+        has_transcript = EXCLUDED.has_transcript,
+        updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS sync_video_processing_status_trigger ON videos;
+CREATE TRIGGER sync_video_processing_status_trigger
+    AFTER INSERT OR UPDATE OF processing_status, error_message, batch_current, batch_total, transcript ON videos
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_video_processing_status();
+
+-- Keep flashcard_count in step with questions. Statement-level, so a batch of
+-- questions stored in one insert costs one counter update per video.
+CREATE OR REPLACE FUNCTION count_video_flashcards()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE video_processing_status s
+        SET flashcard_count = s.flashcard_count + n.added,
+            updated_at = NOW()
+        FROM (SELECT video_id, COUNT(*) AS added FROM new_questions GROUP BY video_id) n
+        WHERE s.video_id = n.video_id;
+    ELSE
+        UPDATE video_processing_status s
+        SET flashcard_count = GREATEST(s.flashcard_count - o.removed, 0),
+            updated_at = NOW()
+        FROM (SELECT video_id, COUNT(*) AS removed FROM old_questions GROUP BY video_id) o
+        WHERE s.video_id = o.video_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS count_video_flashcards_insert_trigger ON questions;
+CREATE TRIGGER count_video_flashcards_insert_trigger
+    AFTER INSERT ON questions
+    REFERENCING NEW TABLE AS new_questions
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION count_video_flashcards();
+
+DROP TRIGGER IF EXISTS count_video_flashcards_delete_trigger ON questions;
+CREATE TRIGGER count_video_flashcards_delete_trigger
+    AFTER DELETE ON questions
+    REFERENCING OLD TABLE AS old_questions
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION count_video_flashcards();
+
+-- Backfill existing videos
+INSERT INTO video_processing_status (
+    video_id, processing_status, error_message, batch_current, batch_total, flashcard_count, has_transcript
+)
+SELECT
+    v.id,
+    COALESCE(v.processing_status, 'completed'),
+    v.error_message,
+    COALESCE(v.batch_current, 0),
+    COALESCE(v.batch_total, 0),
+    (SELECT COUNT(*) FROM questions q WHERE q.video_id = v.id),
+    v.transcript IS NOT NULL
+FROM videos v
+ON CONFLICT (video_id) DO UPDATE
+SET processing_status = EXCLUDED.processing_status,
+    error_message = EXCLUDED.error_message,
+    batch_current = EXCLUDED.batch_current,
+    batch_total = EXCLUDED.batch_total,
+    flashcard_count = EXCLUDED.flashcard_count,
+    has_transcript = EXCLUDED.has_transcript,
+    updated_at = NOW();
@@ -0,0 +1,75 @@
+-- Migration: Compressed transcript store
+-- Transcripts move out of videos.transcript into one zstd-compressed blob per
+-- video, so reads of video metadata no longer carry the transcript.
+-- Existing transcripts are moved by the backend the first time each is read
+-- (compression happens in the application, so there is no SQL backfill).
+-- Safe to run multiple times
+
+-- One compressed transcript per video, kept out of the videos row so metadata
+-- reads (status, listings, analytics) don't carry it
+CREATE TABLE IF NOT EXISTS video_transcripts (
+    video_id VARCHAR(255) PRIMARY KEY REFERENCES videos(id) ON DELETE CASCADE,
+    format_version SMALLINT NOT NULL, -- Encoding of data (1 = zstd-compressed columnar binary)
+    data BYTEA NOT NULL,
+    segment_count INTEGER NOT NULL DEFAULT 0,
+    text_length INTEGER NOT NULL DEFAULT 0, -- Characters of the full text
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE video_transcripts ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "System can manage video transcripts" ON video_transcripts;
+CREATE POLICY "System can manage video transcripts" ON video_transcripts
+    FOR ALL WITH CHECK (true);
+
+-- Keep has_transcript in step with video_transcripts
+CREATE OR REPLACE FUNCTION sync_video_transcript_status()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE video_processing_status
+    SET has_transcript = TG_OP <> 'DELETE',
+        updated_at = NOW()
+    WHERE video_id = COALESCE(NEW.video_id, OLD.video_id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS sync_video_transcript_status_trigger ON video_transcripts;
+CREATE TRIGGER sync_video_transcript_status_trigger
+    AFTER INSERT OR DELETE ON video_transcripts
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_video_transcript_status();
+
+-- has_transcript also counts transcripts stored in video_transcripts
+CREATE OR REPLACE FUNCTION sync_video_processing_status()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO video_processing_status (
+        video_id, processing_status, error_message, batch_current, batch_total, has_transcript, updated_at
+    )
+    VALUES (
+        NEW.id,
+        COALESCE(NEW.processing_status, 'processing'),
+        NEW.error_message,
+        COALESCE(NEW.batch_current, 0),
+        COALESCE(NEW.batch_total, 0),
+        NEW.transcript IS NOT NULL OR EXISTS (SELECT 1 FROM video_transcripts t WHERE t.video_id = NEW.id),
+        NOW()
+    )
+    ON CONFLICT (video_id) DO UPDATE
+    SET processing_status = EXCLUDED.processing_status,
+        error_message = EXCLUDED.error_message,
+        batch_current = EXCLUDED.batch_current,
+        batch_total = EXCLUDED.batch_total,
+        has_transcript = EXCLUDED.has_transcript,
+        updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS sync_video_processing_status_trigger ON videos;
+CREATE TRIGGER sync_video_processing_status_trigger
+    AFTER INSERT OR UPDATE OF processing_status, error_message, batch_current, batch_total, transcript ON videos
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_video_processing_status();
@@ -5,13 +5,33 @@
 -- Drop all triggers first
 DROP TRIGGER IF EXISTS apply_credit_purchase_trigger ON credit_purchases;
 DROP TRIGGER IF EXISTS on_auth_user_created ON auth.users;
+DROP TRIGGER IF EXISTS sync_video_processing_status_trigger ON videos;
+DROP TRIGGER IF EXISTS count_video_flashcards_insert_trigger ON questions;
+DROP TRIGGER IF EXISTS count_video_flashcards_delete_trigger ON questions;
+DROP TRIGGER IF EXISTS sync_video_transcript_status_trigger ON video_transcripts;
 
 -- Drop all functions
+DROP FUNCTION IF EXISTS claim_ingestion_job(TEXT, INTEGER, INTEGER, INTEGER);
+DROP FUNCTION IF EXISTS ingestion_queue_stats(INTEGER);
+DROP FUNCTION IF EXISTS ingestion_admission_stats(UUID);
+DROP FUNCTION IF EXISTS checkpoint_ingestion_batch(VARCHAR, INTEGER, FLOAT, FLOAT, JSONB, TEXT, JSONB);
+DROP FUNCTION IF EXISTS heartbeat_ingestion_job(UUID, TEXT, INTEGER);
+DROP FUNCTION IF EXISTS finish_ingestion_job(UUID, TEXT, TEXT, TEXT);
+DROP FUNCTION IF EXISTS sync_video_processing_status();
+DROP FUNCTION IF EXISTS count_video_flashcards();
+DROP FUNCTION IF EXISTS sync_video_transcript_status();
+DROP FUNCTION IF EXISTS mark_question_pool_served(TEXT[]);
 DROP FUNCTION IF EXISTS apply_credit_purchase();
 DROP FUNCTION IF EXISTS public.handle_new_user();
 
 -- Drop ALL tables (in correct order to respect foreign keys)
 -- Application tables
+DROP TABLE IF EXISTS question_pool CASCADE;
+DROP TABLE IF EXISTS video_transcripts CASCADE;
+DROP TABLE IF EXISTS video_processing_status CASCADE;
+DROP TABLE IF EXISTS ingestion_bulks CASCADE;
+DROP TABLE IF EXISTS ingestion_batches CASCADE;
+DROP TABLE IF EXISTS ingestion_jobs CASCADE;
 DROP TABLE IF EXISTS activity_log CASCADE;
 DROP TABLE IF EXISTS learning_reports CASCADE;
 DROP TABLE IF EXISTS video_notes CASCADE;
@@ -38,6 +38,13 @@ class VideoProcessRequest(BaseModel):
     user_id: Optional[str] = None
 
 
+class BulkVideoProcessRequest(BaseModel):
+    project_id: str
+    playlist_url: Optional[str] = None
+    video_urls: List[str] = []
+    user_id: Optional[str] = None
+
+
 class VideoProcessResponse(BaseModel):
     video_id: str
     title: str
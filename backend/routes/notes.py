@@ -44,26 +44,15 @@ async def generate_notes(request: GenerateNotesRequest):
                 "notes": existing_notes
             }
 
-        # Parse transcript
-        import json
-
         # Check if video has been transcribed
-        if not video['transcript']:
+        transcript = await db.get_transcript(request.video_id)
+        if transcript is None:
             raise HTTPException(
                 status_code=400,
                 detail="Video transcript not yet available. Please wait for video processing to complete."
             )
 
-        transcript_data = json.loads(video['transcript']) if isinstance(video['transcript'], str) else video['transcript']
-
-        # Handle case where transcript_data might still be None
-        if not transcript_data:
-            raise HTTPException(
-                status_code=400,
-                detail="Video transcript is empty or invalid."
-            )
-
-        transcript_text = transcript_data.get('full_text', '')
+        transcript_text = transcript.full_text
 
         print(f"Generating notes for video: {video['title']}")
         print(f"Transcript length: {len(transcript_text)}")
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from models import QuizRequest, QuizResponse, QuizSubmission, QuizResult, Question
 from services.question_generator import question_generator
+from services.question_pool import question_pool
+from services.metrics import metrics
 from database import db
 from config import settings
 import json
@@ -115,6 +117,9 @@ async def generate_quiz(request: QuizRequest):
     2. Previous quiz performance - retests weak areas from earlier quizzes
     3. Project-level performance - considers overall learning patterns
 
+    Questions are sampled from the video's pre-generated question pool, so
+    no LLM call is made while the user waits (unless the video has no pool yet).
+
     Costs 5 notes credits
     """
     try:
@@ -140,15 +145,13 @@ async def generate_quiz(request: QuizRequest):
         if not video:
             raise HTTPException(status_code=404, detail="Video not found")
 
-        # Parse transcript
-        transcript_data = json.loads(video['transcript'])
-        segments = transcript_data['segments']
-
-        # Convert to VideoSegment objects
-        from models import VideoSegment
-        video_segments = [
-            VideoSegment(**seg) for seg in segments
-        ]
+        transcript = await db.get_transcript(request.video_id)
+        if transcript is None:
+            raise HTTPException(
+                status_code=400,
+                detail="Video transcript not yet available. Please wait for video processing to complete."
+            )
+        video_segments = transcript.segments()
 
         # Analyze user performance for adaptive quiz generation
         performance_analysis = None
@@ -158,13 +161,30 @@ async def generate_quiz(request: QuizRequest):
                 request.video_id
             )
 
-        # Generate adaptive quiz questions based on performance
-        questions = await question_generator.generate_final_quiz(
-            video_segments,
-            num_questions=settings.final_quiz_questions,
-            video_title=video.get('title'),
-            performance_analysis=performance_analysis  # Pass performance data for adaptive generation
-        )
+        # Sample the quiz from the video's question pool (weighted towards weak areas)
+        try:
+            questions = await question_pool.assemble(
+                request.video_id,
+                video_segments,
+                settings.final_quiz_questions,
+                performance_analysis=performance_analysis,
+                video_title=video.get('title')
+            )
+        except Exception as e:
+            print(f"Warning: Could not sample quiz from question pool, generating it instead: {e}")
+            questions = None
+
+        if not questions:
+            # No pool yet (video processed before pools existed, or pooling disabled):
+            # generate adaptive quiz questions now, and build the pool for next time
+            questions = await question_generator.generate_final_quiz(
+                video_segments,
+                num_questions=settings.final_quiz_questions,
+                video_title=video.get('title'),
+                performance_analysis=performance_analysis  # Pass performance data for adaptive generation
+            )
+            metrics.inc("question_pool_quizzes_total", source="generated")
+            question_pool.schedule_top_up(request.video_id, video_segments, video.get('title'))
 
         # Store quiz
         quiz_id = str(uuid.uuid4())
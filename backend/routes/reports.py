@@ -63,8 +63,8 @@ async def generate_report(request: GenerateReportRequest):
             raise HTTPException(status_code=404, detail="Video not found")
 
         # Parse transcript
-        transcript_data = json.loads(video['transcript'])
-        transcript_text = transcript_data.get('full_text', '')
+        transcript = await db.get_transcript(request.video_id)
+        transcript_text = transcript.full_text if transcript is not None else ''
 
         # Get all user attempts for this video
         attempts = await db.get_user_attempts(request.user_id, request.video_id)
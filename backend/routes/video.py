@@ -1,25 +1,123 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from models import VideoProcessRequest, VideoProcessResponse
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from models import BulkVideoProcessRequest, VideoProcessRequest, VideoProcessResponse
 from services.video_processor import video_processor
 from services.whisper_service import whisper_service
+from services.audio_workdir import AudioWorkdir
+from services.compact_transcript import CompactTranscript
+from services.loaded_transcripts import loaded_transcripts
 from services.question_generator import question_generator
+from services.question_pool import question_pool
+from services.ingestion_pipeline import batch_pipeline
+from services.single_flight import video_single_flight
+from services.progress_broker import progress_broker
+from services.status_cache import video_status_cache
+from services.admission import IngestionBackpressure, check_admission, generation_limiter
 from database import db
 from config import settings
 from logging_config import get_logger
 from .video_helper import validation
+from typing import Optional
+import asyncio
+import contextlib
 import json
+import math
 
 
 router = APIRouter()
 logger = get_logger(__name__)
 
 
-# Background task for async video processing
+async def _update_status(
+    video_id: str,
+    status: str,
+    error_message: str = None,
+    batch_current: int = None,
+    batch_total: int = None,
+    clear_error: bool = False
+):
+    """Persist a processing status change and push it to subscribed learn pages"""
+    await db.update_video_status(
+        video_id,
+        status,
+        error_message=error_message,
+        batch_current=batch_current,
+        batch_total=batch_total,
+        clear_error=clear_error
+    )
+
+    # Seed the in-memory record on the first change this process makes; the
+    # write above has already been mirrored into video_processing_status
+    if video_status_cache.peek(video_id) is None:
+        await video_status_cache.get(video_id)
+
+    fields = {"processing_status": status}
+    if error_message:
+        fields["error_message"] = error_message
+    elif clear_error:
+        fields["error_message"] = None
+    if batch_current is not None:
+        fields["batch_current"] = batch_current
+    if batch_total is not None:
+        fields["batch_total"] = batch_total
+    record = video_status_cache.update(video_id, **fields) or fields
+
+    await progress_broker.publish(video_id, {"type": "status", **record})
+
+
+async def _store_transcript(video_id: str, transcript: CompactTranscript):
+    await db.store_transcript(video_id, transcript)
+    loaded_transcripts.invalidate(video_id)
+    video_status_cache.update(video_id, has_transcript=True)
+
+
+async def _store_flashcards(video_id: str, questions_data: list):
+    """Store generated flashcards and push them to subscribed learn pages"""
+    await db.store_questions(video_id, questions_data)
+    await _flashcards_stored(video_id, questions_data)
+
+
+async def _flashcards_stored(video_id: str, questions_data: list):
+    record = video_status_cache.peek(video_id)
+    if record is not None:
+        video_status_cache.update(video_id, flashcard_count=record["flashcard_count"] + len(questions_data))
+
+    await progress_broker.publish(video_id, {
+        "type": "flashcards",
+        "flashcards": [
+            {"question": q, "show_at_timestamp": q.get("show_at_timestamp", 0)}
+            for q in questions_data
+        ],
+    })
+
+
+async def _build_question_pool(video_id: str, title: str):
+    """Pre-generate the video's quiz question pool from its stored transcript"""
+    if not question_pool.enabled:
+        return
+    try:
+        transcript = await loaded_transcripts.get(video_id)
+        if transcript is not None:
+            added = await question_pool.build(video_id, transcript.segments(), video_title=title)
+            logger.info(f"Question pool of video {video_id}: {added} questions generated")
+    except Exception as e:
+        logger.warning(f"Could not build question pool for video {video_id}: {str(e)}")
+
+
+# Ingestion job body, run by the workers in services/ingestion_worker.py
 async def process_video_background(video_id: str, video_url: str, title: str, user_id: str = None, project_id: str = None):
-    """Background task to transcribe video and generate flashcards with batch processing for long videos"""
+    """
+    Transcribe video and generate flashcards with batch processing for long videos
+
+    On failure the video is marked failed and the exception is re-raised so the
+    ingestion worker can record it on the job.
+    """
     try:
         logger.info(f"=== Background processing started for video: {video_id} ===")
 
+        # Start from the stored status record, not one left over from an earlier run
+        video_status_cache.invalidate(video_id)
+
         # Get video duration
         video = await db.get_video(video_id)
         if not video:
@@ -35,11 +133,15 @@ async def process_video_background(video_id: str, video_url: str, title: str, us
             await process_video_in_batches(video_id, video_url, title, duration, BATCH_SIZE)
         else:
             logger.info(f"Video duration ({duration}s) <= {BATCH_THRESHOLD}s - Using standard processing")
-            await process_video_standard(video_id, video_url, title, duration)
+            # Set when an earlier attempt got as far as storing the transcript
+            stored_transcript = await db.get_transcript(video_id)
+            await process_video_standard(video_id, video_url, title, duration, stored_transcript)
+
+        # The video is usable already - without a pool its first quiz is just generated on request
+        await _build_question_pool(video_id, title)
 
         # Deduct transcription credits after successful processing
         if user_id:
-            import math
             credits_to_deduct = math.ceil(duration / 60)  # 1 credit per minute, rounded up
             logger.info(f"Deducting {credits_to_deduct} transcription credits for user {user_id}")
             result = await db.deduct_transcription_credits(
@@ -57,32 +159,55 @@ async def process_video_background(video_id: str, video_url: str, title: str, us
 
     except Exception as e:
         logger.error(f"Background processing failed for video {video_id}: {str(e)}", exc_info=True)
-        await db.update_video_status(video_id, "failed", error_message=str(e))
+        await _update_status(video_id, "failed", error_message=str(e))
+        raise
 
 
-async def process_video_standard(video_id: str, video_url: str, title: str, duration: float):
-    """Standard processing for videos <= 10 minutes"""
-    # Update status to transcribing
-    await db.update_video_status(video_id, "transcribing")
+async def process_video_standard(
+    video_id: str,
+    video_url: str,
+    title: str,
+    duration: float,
+    stored_transcript: CompactTranscript = None
+):
+    """
+    Standard processing for videos <= 10 minutes
+
+    When retried, work that an earlier attempt completed (the stored transcript,
+    the flashcards) is reused instead of repeated.
+    """
+    if stored_transcript:
+        logger.info(f"Reusing transcript stored by an earlier attempt for video: {video_id}")
+        transcript = stored_transcript.to_transcript()
+    else:
+        # Update status to transcribing
+        await _update_status(video_id, "transcribing")
 
-    # Transcribe video
-    logger.info(f"Starting transcription for video: {video_id}")
-    transcript = await whisper_service.transcribe_video(video_url, duration)
-    logger.info(f"Transcription completed. Segments: {len(transcript.segments)}")
+        # Transcribe video
+        logger.info(f"Starting transcription for video: {video_id}")
+        transcript = await whisper_service.transcribe_video(video_url, duration)
+        logger.info(f"Transcription completed. Segments: {len(transcript.segments)}")
 
-    # Store transcript
-    await db.update_video_transcript(video_id, transcript.dict())
+        # Store transcript
+        await _store_transcript(video_id, CompactTranscript.from_transcript(transcript))
 
     # Update status to generating flashcards
-    await db.update_video_status(video_id, "generating_flashcards")
+    await _update_status(video_id, "generating_flashcards")
+
+    # Flashcards are stored in a single insert, so any stored ones are the full set
+    if (video_status_cache.peek(video_id) or {}).get("flashcard_count", 0) > 0:
+        logger.info(f"Flashcards already stored by an earlier attempt for video: {video_id}")
+        await _update_status(video_id, "completed")
+        return
 
     # Generate flashcards
     logger.info("Generating flashcards with context...")
-    flashcards = await question_generator.generate_flashcards(
-        transcript.segments,
-        interval=settings.flashcard_interval,
-        video_title=title
-    )
+    async with generation_limiter:
+        flashcards = await question_generator.generate_flashcards(
+            transcript.segments,
+            interval=settings.flashcard_interval,
+            video_title=title
+        )
     logger.info(f"Generated {len(flashcards)} flashcards")
 
     # Store flashcards
@@ -93,14 +218,23 @@ async def process_video_standard(video_id: str, video_url: str, title: str, dura
         }
         for fc in flashcards
     ]
-    await db.store_questions(video_id, questions_data)
+    await _store_flashcards(video_id, questions_data)
 
     # Mark as completed
-    await db.update_video_status(video_id, "completed")
+    await _update_status(video_id, "completed")
 
 
 async def process_video_in_batches(video_id: str, video_url: str, title: str, duration: float, batch_size: int):
-    """Process long videos in batches (10-minute segments)"""
+    """
+    Process long videos in batches (10-minute segments)
+
+    Batches are pipelined: batch N+1 is transcribed while flashcards for batch N
+    are generated. Flashcards and batch counters are still committed in order.
+
+    Each committed batch is checkpointed (transcript segments + flashcards in one
+    transaction), so a retried or resumed job continues from the first
+    incomplete batch and never repeats transcription or generation.
+    """
     # Create segments
     segments = []
     start = 0
@@ -110,89 +244,236 @@ async def process_video_in_batches(video_id: str, video_url: str, title: str, du
         start = end
 
     total_batches = len(segments)
-    logger.info(f"Processing video in {total_batches} batches of {batch_size}s each")
 
-    # Collect all transcript segments from all batches
-    all_transcript_segments = []
-    all_transcript_text_parts = []
-
-    # Process each batch
-    for batch_num, (batch_start, batch_end) in enumerate(segments, 1):
-        logger.info(f"=== Processing batch {batch_num}/{total_batches} ({batch_start}s-{batch_end}s) ===")
-
-        # Update status to show batch progress
-        await db.update_video_status(
-            video_id,
-            f"transcribing_batch",
-            batch_current=batch_num,
-            batch_total=total_batches
+    # Batches are committed in order, so checkpoints always cover a prefix. Keyed by
+    # batch number, so a commit retried after its checkpoint went through adds nothing twice
+    checkpoints = {row["batch_index"]: row for row in await db.get_ingestion_batches(video_id)}
+    completed_batches = len(checkpoints)
+    if completed_batches:
+        logger.info(f"Resuming video {video_id} after {completed_batches}/{total_batches} checkpointed batches")
+
+    if completed_batches < total_batches:
+        logger.info(
+            f"Processing video in {total_batches} batches of {batch_size}s each "
+            f"(transcribe x{batch_pipeline.transcribe_concurrency}, generate x{batch_pipeline.generate_concurrency})"
         )
 
-        # Transcribe this batch only
-        logger.info(f"Transcribing segment {batch_start}s - {batch_end}s")
-        batch_transcript = await whisper_service.transcribe_video(
-            video_url,
-            duration,
-            start_time=batch_start,
-            end_time=batch_end
-        )
-        logger.info(f"Batch {batch_num} transcription completed. Segments: {len(batch_transcript.segments)}")
-
-        # Accumulate transcript segments for final storage
-        all_transcript_segments.extend(batch_transcript.segments)
-        all_transcript_text_parts.append(batch_transcript.full_text)
-
-        # Update status to generating flashcards for this batch
-        await db.update_video_status(
+        await _update_status(
             video_id,
-            f"generating_flashcards_batch",
-            batch_current=batch_num,
+            "transcribing_batch",
+            batch_current=completed_batches + 1,
             batch_total=total_batches
         )
 
-        # Generate flashcards for this batch
-        logger.info(f"Generating flashcards for batch {batch_num}...")
-        flashcards = await question_generator.generate_flashcards(
-            batch_transcript.segments,
-            interval=settings.flashcard_interval,
-            video_title=f"{title} (Part {batch_num}/{total_batches})"
-        )
-        logger.info(f"Batch {batch_num}: Generated {len(flashcards)} flashcards")
-
-        # Store flashcards immediately (available to frontend!)
-        questions_data = [
-            {
-                **fc.question.dict(),
-                "show_at_timestamp": fc.show_at_timestamp,
+        # Fetch YouTube captions once; caption batches become index lookups and only
+        # the Whisper fallback actually transcribes per batch. Retried like the batch
+        # stages, so a transient fetch error doesn't fail the whole video.
+        captions = await batch_pipeline.with_retries("Caption fetch", whisper_service.load_captions, video_url)
+
+        # Without captions every batch goes to Whisper; they share one audio download,
+        # and each batch range is cut from it locally
+        audio = AudioWorkdir(video_url) if captions is None else None
+
+        async def transcribe(batch_num: int, batch):
+            batch_start, batch_end = batch
+            logger.info(f"Transcribing batch {batch_num}/{total_batches} ({batch_start}s-{batch_end}s)")
+            batch_transcript = await whisper_service.transcribe_video(
+                video_url,
+                duration,
+                start_time=batch_start,
+                end_time=batch_end,
+                captions=captions,
+                try_captions=captions is not None,
+                audio=audio
+            )
+            logger.info(f"Batch {batch_num} transcription completed. Segments: {len(batch_transcript.segments)}")
+            return batch_transcript
+
+        async def generate(batch_num: int, batch, batch_transcript):
+            logger.info(f"Generating flashcards for batch {batch_num}...")
+            async with generation_limiter:
+                flashcards = await question_generator.generate_flashcards(
+                    batch_transcript.segments,
+                    interval=settings.flashcard_interval,
+                    video_title=f"{title} (Part {batch_num}/{total_batches})"
+                )
+            logger.info(f"Batch {batch_num}: Generated {len(flashcards)} flashcards")
+            return flashcards
+
+        async def commit(batch_num: int, batch, batch_transcript, flashcards):
+            batch_start, batch_end = batch
+            checkpoint = {
+                "segments": [seg.dict() for seg in batch_transcript.segments],
+                "full_text": batch_transcript.full_text,
             }
-            for fc in flashcards
-        ]
-        await db.store_questions(video_id, questions_data)
+            questions_data = [
+                {
+                    **fc.question.dict(),
+                    "show_at_timestamp": fc.show_at_timestamp,
+                }
+                for fc in flashcards
+            ]
+
+            # Store flashcards immediately (available to frontend!) together with the
+            # checkpoint. False means an earlier try of this commit already went through.
+            if await db.checkpoint_ingestion_batch(
+                video_id,
+                batch_num,
+                batch_start,
+                batch_end,
+                checkpoint["segments"],
+                checkpoint["full_text"],
+                questions_data
+            ):
+                await _flashcards_stored(video_id, questions_data)
+            checkpoints[batch_num] = checkpoint
+
+            # Advance the counter to the next batch still in flight
+            if batch_num < total_batches:
+                await _update_status(
+                    video_id,
+                    "generating_flashcards_batch",
+                    batch_current=batch_num + 1,
+                    batch_total=total_batches
+                )
 
-        logger.info(f"Batch {batch_num}/{total_batches} completed and flashcards stored")
+            logger.info(f"Batch {batch_num}/{total_batches} completed and checkpointed")
+
+        async with audio or contextlib.nullcontext():
+            await batch_pipeline.run(
+                segments[completed_batches:],
+                transcribe,
+                generate,
+                commit,
+                first_batch=completed_batches + 1
+            )
 
     # All batches complete - store the complete transcript
-    logger.info(f"Storing complete transcript with {len(all_transcript_segments)} total segments")
-    complete_transcript = {
-        "segments": [seg.dict() for seg in all_transcript_segments],
-        "full_text": " ".join(all_transcript_text_parts),
-        "duration": duration
-    }
-    await db.update_video_transcript(video_id, complete_transcript)
+    complete_transcript = CompactTranscript.from_segments(
+        (seg for batch_num in sorted(checkpoints) for seg in checkpoints[batch_num]["segments"]),
+        duration
+    )
+    logger.info(f"Storing complete transcript with {len(complete_transcript)} total segments")
+    await _store_transcript(video_id, complete_transcript)
 
     # Mark video as completed
-    await db.update_video_status(video_id, "completed", batch_current=0, batch_total=0)
+    await _update_status(video_id, "completed", batch_current=0, batch_total=0)
     logger.info(f"All {total_batches} batches processed successfully")
 
+    # The checkpoints are folded into the stored transcript now
+    try:
+        await db.delete_ingestion_batches(video_id)
+    except Exception as e:
+        logger.warning(f"Could not delete batch checkpoints for video {video_id}: {str(e)}")
+
+
+async def _admit_video(
+    video_id: str,
+    request: VideoProcessRequest,
+    title: str,
+    duration: float,
+    lane: Optional[str] = None
+) -> dict:
+    """
+    Store the initial video record and enqueue its ingestion job
+
+    Bulk submissions pass the lane they resolved once for all of their videos,
+    after checking admission for the whole batch.
+    """
+    if lane is None:
+        # Refuse new work while the ingestion backlog is full
+        await check_admission(request.user_id)
+
+        # Plans with priority_processing are scheduled in the priority lane
+        lane = await _ingestion_lane(request.user_id)
+
+    # Store video with initial processing status
+    logger.info(f"Storing initial video record (ID: {video_id})")
+    await db.store_video_initial(
+        video_id=video_id,
+        title=title,
+        duration=duration,
+        url=request.video_url,
+        project_id=request.project_id,
+        processing_status="processing"
+    )
+
+    # Enqueue durable ingestion job for transcription and flashcard generation.
+    # If another API process already enqueued this video, this attaches to its job.
+    await db.enqueue_ingestion_job(
+        video_id=video_id,
+        video_url=request.video_url,
+        title=title,
+        user_id=request.user_id,
+        project_id=request.project_id,
+        max_attempts=settings.ingestion_max_attempts,
+        lane=lane
+    )
+
+    logger.info(f"=== Video {video_id} queued for background processing ===")
+
+    # Return immediately with basic info
+    return {
+        "video_id": video_id,
+        "title": title,
+        "duration": duration,
+        "url": request.video_url,
+        "processing_status": "processing",
+        "message": "Video processing started in background"
+    }
+
+
+async def _resume_video(
+    video_id: str,
+    request: VideoProcessRequest,
+    title: str,
+    duration: float,
+    lane: Optional[str] = None
+) -> dict:
+    """Re-enqueue a failed video"""
+    if lane is None:
+        # Admission first, so a refused resume leaves the video failed (and resumable)
+        await check_admission(request.user_id)
+        lane = await _ingestion_lane(request.user_id)
+
+    # The previous failure no longer applies while the video reprocesses
+    await _update_status(video_id, "processing", clear_error=True)
+    return await _admit_video(video_id, request, title, duration, lane=lane)
+
+
+async def _ingestion_lane(user_id: Optional[str]) -> str:
+    priority = bool(user_id) and await db.has_priority_processing(user_id)
+    return "priority" if priority else "standard"
+
+
+def _insufficient_credits(credits_required: int, current_credits: int) -> HTTPException:
+    return HTTPException(
+        status_code=402,
+        detail={
+            "error": "Insufficient transcription credits",
+            "required": credits_required,
+            "available": current_credits,
+            "message": f"You need {credits_required} transcription credits but only have {current_credits}. Each minute of video requires 1 credit."
+        }
+    )
+
+
+def _backpressure_error(e: IngestionBackpressure) -> HTTPException:
+    return HTTPException(
+        status_code=e.status_code,
+        detail={"error": e.error, "message": e.message, "retry_after": e.retry_after},
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
 
 @router.post("/process-async")
-async def process_video_async(request: VideoProcessRequest, background_tasks: BackgroundTasks):
+async def process_video_async(request: VideoProcessRequest):
     """
     Process a video asynchronously:
     1. Extract video information (fast)
     2. Store basic video info
-    3. Return immediately with video_id
-    4. Process transcription and flashcards in background
+    3. Enqueue an ingestion job and return immediately with video_id
+    4. Ingestion workers transcribe and generate flashcards
     """
     logger.info("=== Async video processing request ===")
     logger.info(f"Video URL: {request.video_url}")
@@ -204,9 +485,12 @@ async def process_video_async(request: VideoProcessRequest, background_tasks: Ba
         video_id = video_processor.get_video_id(request.video_url)
         await validation.validate_video_language(video_id)
 
-        # Extract video metadata (fast operation)
+        # Extract video metadata (fast operation, shared with concurrent requests for this video)
         logger.info("Extracting video information...")
-        video_info = await video_processor.extract_video_info_async(request.video_url)
+        video_info, _ = await video_single_flight.do(
+            f"info:{video_id}",
+            lambda: video_processor.extract_video_info_async(request.video_url)
+        )
 
         duration = video_info.get("duration")
         validation.validate_video_info(video_info, video_id)
@@ -214,7 +498,6 @@ async def process_video_async(request: VideoProcessRequest, background_tasks: Ba
 
         # Check transcription credits before processing (only for new videos)
         if request.user_id:
-            import math
             credits_required = math.ceil(duration / 60)  # 1 credit per minute, rounded up
             logger.info(f"Credits required for transcription: {credits_required}")
 
@@ -222,21 +505,22 @@ async def process_video_async(request: VideoProcessRequest, background_tasks: Ba
 
             if not has_credits:
                 logger.warning(f"Insufficient transcription credits for user {request.user_id}: {current_credits} < {credits_required}")
-                raise HTTPException(
-                    status_code=402,
-                    detail={
-                        "error": "Insufficient transcription credits",
-                        "required": credits_required,
-                        "available": current_credits,
-                        "message": f"You need {credits_required} transcription credits but only have {current_credits}. Each minute of video requires 1 credit."
-                    }
-                )
+                raise _insufficient_credits(credits_required, current_credits)
 
             logger.info(f"User {request.user_id} has sufficient credits: {current_credits} >= {credits_required}")
 
         # Check existing video
         existing_video = await db.get_video(video_id)
 
+        if existing_video and existing_video.get("processing_status") == "failed":
+            # Enqueue it again; the job resumes from the first incomplete batch
+            logger.info(f"Video {video_id} previously failed - resuming ingestion")
+            response, _ = await video_single_flight.do(
+                f"admit:{video_id}",
+                lambda: _resume_video(video_id, request, existing_video["title"], existing_video["video_length"])
+            )
+            return response
+
         if existing_video:
             logger.info(f"✅ Video already exists - ID: {video_id}")
 
@@ -246,11 +530,8 @@ async def process_video_async(request: VideoProcessRequest, background_tasks: Ba
             # Return existing video info
             existing_questions = await db.get_questions(video_id)
 
-            transcript_data = (
-                json.loads(existing_video["transcript"])
-                if isinstance(existing_video.get("transcript"), str)
-                else existing_video.get("transcript")
-            )
+            stored_transcript = await db.get_transcript(video_id)
+            transcript_data = stored_transcript.to_dict() if stored_transcript is not None else None
 
             return {
                 "video_id": video_id,
@@ -267,64 +548,258 @@ async def process_video_async(request: VideoProcessRequest, background_tasks: Ba
         title = video_info.get("title")
         logger.info(f"Video title: {title}")
 
-        # Store video with initial processing status
-        logger.info(f"Storing initial video record (ID: {video_id})")
-        await db.store_video_initial(
-            video_id=video_id,
-            title=title,
-            duration=duration,
-            url=request.video_url,
+        # Single-flight per video: concurrent submitters of the same video attach to
+        # the first request's ingestion job instead of storing and enqueueing again
+        response, shared = await video_single_flight.do(
+            f"admit:{video_id}",
+            lambda: _admit_video(video_id, request, title, duration)
+        )
+
+        if shared:
+            logger.info(f"Video {video_id} is already being admitted by another request, attaching to it")
+            if request.project_id:
+                await db.link_video_to_project(video_id, request.project_id)
+
+        return response
+
+    except HTTPException:
+        logger.warning("HTTP exception in process_video_async", exc_info=True)
+        raise
+    except IngestionBackpressure as e:
+        raise _backpressure_error(e)
+    except Exception as e:
+        logger.error(
+            f"Unexpected error in process_video_async: {type(e).__name__}: {str(e)}",
+            exc_info=True,
+        )
+        raise HTTPException(status_code=500, detail="Error processing video")
+
+async def _resolve_bulk_video(video_id: str, url: str) -> dict:
+    """
+    Validate one video of a bulk submission
+
+    Returns an entry whose `kind` is "existing" (already processed or in progress,
+    only needs linking), "resume" (previously failed) or "new".
+    """
+    status = await db.get_video_status(video_id)
+    if status and status.get("processing_status") != "failed":
+        return {"kind": "existing", "video_id": video_id, "url": url}
+
+    await validation.validate_video_language(video_id)
+    video_info, _ = await video_single_flight.do(
+        f"info:{video_id}",
+        lambda: video_processor.extract_video_info_async(url)
+    )
+    validation.validate_video_info(video_info, video_id)
+
+    return {
+        "kind": "resume" if status else "new",
+        "video_id": video_id,
+        "url": url,
+        "title": video_info.get("title"),
+        "duration": video_info.get("duration"),
+    }
+
+
+@router.post("/process-bulk")
+async def process_videos_bulk(request: BulkVideoProcessRequest):
+    """
+    Add a YouTube playlist and/or a list of video URLs to a project:
+    1. Resolve and validate every video's metadata, a few at a time
+    2. Check transcription credits once for the total of all new videos
+    3. Check ingestion admission once for the whole batch
+    4. Enqueue every new video, link already processed ones
+    5. Return a bulk_id whose progress is served by GET /bulk/{bulk_id}
+
+    Videos that fail validation are skipped with a reason instead of failing the request.
+    """
+    logger.info("=== Bulk video processing request ===")
+    logger.info(f"Project ID: {request.project_id}, Playlist: {request.playlist_url}, URLs: {len(request.video_urls)}")
+
+    try:
+        urls = list(request.video_urls)
+        if request.playlist_url:
+            try:
+                urls += await video_processor.extract_playlist_urls_async(request.playlist_url)
+            except Exception as e:
+                logger.warning(f"Could not read playlist {request.playlist_url}: {str(e)}")
+                raise HTTPException(status_code=400, detail="Unable to read playlist")
+
+        # Deduplicate by video id, keeping submission order
+        skipped = []
+        video_urls = {}
+        for url in urls:
+            video_id = video_processor.get_video_id(url)
+            if not video_id:
+                skipped.append({"url": url, "reason": "Not a supported YouTube video URL"})
+            elif video_id not in video_urls:
+                video_urls[video_id] = url
+
+        if not video_urls:
+            raise HTTPException(status_code=400, detail="No valid video URLs to process")
+
+        if len(video_urls) > settings.bulk_max_videos:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Too many videos ({len(video_urls)}). At most {settings.bulk_max_videos} can be added at once."
+            )
+
+        # Metadata lookups are slow network calls - run a bounded number at a time
+        semaphore = asyncio.Semaphore(settings.bulk_metadata_concurrency)
+
+        async def resolve(video_id: str, url: str):
+            async with semaphore:
+                try:
+                    return await _resolve_bulk_video(video_id, url)
+                except HTTPException as e:
+                    return {"url": url, "reason": e.detail}
+                except Exception as e:
+                    logger.warning(f"Could not resolve video {video_id}: {type(e).__name__}: {str(e)}")
+                    return {"url": url, "reason": "Unable to read video information"}
+
+        resolved = await asyncio.gather(*(resolve(vid, url) for vid, url in video_urls.items()))
+
+        entries = [entry for entry in resolved if "kind" in entry]
+        skipped += [entry for entry in resolved if "kind" not in entry]
+        admitted = [entry for entry in entries if entry["kind"] != "existing"]
+        logger.info(f"Bulk resolved: {len(admitted)} to process, {len(entries) - len(admitted)} existing, {len(skipped)} skipped")
+
+        # One credit check for the whole batch, so it is admitted entirely or not at all
+        credits_required = sum(math.ceil(entry["duration"] / 60) for entry in admitted)
+        if request.user_id and admitted:
+            logger.info(f"Credits required for bulk transcription: {credits_required}")
+            has_credits, current_credits = await db.check_transcription_credits(request.user_id, credits_required)
+            if not has_credits:
+                logger.warning(f"Insufficient transcription credits for user {request.user_id}: {current_credits} < {credits_required}")
+                raise _insufficient_credits(credits_required, current_credits)
+
+        lane = None
+        if admitted:
+            await check_admission(request.user_id, videos=len(admitted))
+            lane = await _ingestion_lane(request.user_id)
+
+        async def admit(entry: dict):
+            video_id = entry["video_id"]
+            async with semaphore:
+                try:
+                    if entry["kind"] == "existing":
+                        await db.link_video_to_project(video_id, request.project_id)
+                        return entry
+
+                    video_request = VideoProcessRequest(
+                        video_url=entry["url"],
+                        title=entry["title"],
+                        project_id=request.project_id,
+                        user_id=request.user_id
+                    )
+                    admit_video = _resume_video if entry["kind"] == "resume" else _admit_video
+                    _, shared = await video_single_flight.do(
+                        f"admit:{video_id}",
+                        lambda: admit_video(video_id, video_request, entry["title"], entry["duration"], lane=lane)
+                    )
+                    if shared:
+                        await db.link_video_to_project(video_id, request.project_id)
+                    return entry
+                except Exception as e:
+                    logger.error(f"Could not queue video {video_id}: {type(e).__name__}: {str(e)}", exc_info=True)
+                    return {"url": entry["url"], "reason": "Unable to queue video for processing"}
+
+        results = await asyncio.gather(*(admit(entry) for entry in entries))
+        queued = [entry for entry in results if "kind" in entry]
+        skipped += [entry for entry in results if "kind" not in entry]
+
+        bulk = await db.create_ingestion_bulk(
             project_id=request.project_id,
-            processing_status="processing"
+            videos=[{"video_id": entry["video_id"], "url": entry["url"]} for entry in queued],
+            skipped=skipped,
+            user_id=request.user_id,
+            source_url=request.playlist_url
+        )
+
+        logger.info(f"=== Bulk {bulk['id']} created with {len(queued)} videos ===")
+
+        return {
+            "bulk_id": bulk["id"],
+            "project_id": request.project_id,
+            "queued": sum(1 for entry in queued if entry["kind"] != "existing"),
+            "linked": sum(1 for entry in queued if entry["kind"] == "existing"),
+            "credits_required": credits_required,
+            "videos": [
+                {"video_id": entry["video_id"], "url": entry["url"], "title": entry.get("title")}
+                for entry in queued
+            ],
+            "skipped": skipped,
+            "message": "Videos queued for processing"
+        }
+
+    except HTTPException:
+        logger.warning("HTTP exception in process_videos_bulk", exc_info=True)
+        raise
+    except IngestionBackpressure as e:
+        raise _backpressure_error(e)
+    except Exception as e:
+        logger.error(
+            f"Unexpected error in process_videos_bulk: {type(e).__name__}: {str(e)}",
+            exc_info=True,
         )
+        raise HTTPException(status_code=500, detail="Error processing videos")
 
-        # Add background task for transcription and flashcard generation
-        background_tasks.add_task(process_video_background, video_id, request.video_url, title, request.user_id, request.project_id)
 
-        logger.info(f"=== Video {video_id} queued for background processing ===")
+@router.get("/bulk/{bulk_id}")
+async def get_bulk_status(bulk_id: str):
+    """
+    Progress of every video of a bulk submission
+
+    One status query for the whole group (video_processing_status joined with titles).
+    """
+    try:
+        bulk = await db.get_ingestion_bulk(bulk_id)
+        if not bulk:
+            raise HTTPException(status_code=404, detail="Bulk submission not found")
+
+        statuses = await db.get_video_statuses([video["video_id"] for video in bulk["videos"]])
+        videos = [{**video, **statuses.get(video["video_id"], {})} for video in bulk["videos"]]
+
+        completed = sum(1 for video in videos if video.get("processing_status") == "completed")
+        failed = sum(1 for video in videos if video.get("processing_status") == "failed")
 
-        # Return immediately with basic info
         return {
-            "video_id": video_id,
-            "title": title,
-            "duration": duration,
-            "url": request.video_url,
-            "processing_status": "processing",
-            "message": "Video processing started in background"
+            "bulk_id": bulk_id,
+            "project_id": bulk["project_id"],
+            "created_at": bulk["created_at"],
+            "total": len(videos),
+            "completed": completed,
+            "failed": failed,
+            "processing": len(videos) - completed - failed,
+            "flashcard_count": sum(video.get("flashcard_count") or 0 for video in videos),
+            "videos": videos,
+            "skipped": bulk["skipped"],
         }
 
     except HTTPException:
-        logger.warning("HTTP exception in process_video_async", exc_info=True)
         raise
     except Exception as e:
         logger.error(
-            f"Unexpected error in process_video_async: {type(e).__name__}: {str(e)}",
+            f"Unexpected error in get_bulk_status ({bulk_id}): {type(e).__name__}: {str(e)}",
             exc_info=True,
         )
-        raise HTTPException(status_code=500, detail="Error processing video")
+        raise HTTPException(status_code=500, detail="Error fetching bulk status")
+
 
 @router.get("/{video_id}/status")
 async def get_video_status(video_id: str):
-    """Get video processing status"""
-    logger.info(f"=== Fetching status for video: {video_id} ===")
+    """
+    Get video processing status
 
+    Served from the in-memory status record; on a miss this is a single
+    primary-key lookup on video_processing_status, shared by concurrent pollers.
+    """
     try:
-        video = await db.get_video(video_id)
-        if not video:
+        status = await video_status_cache.get(video_id)
+        if not status:
             raise HTTPException(status_code=404, detail="Video not found")
 
-        questions = await db.get_questions(video_id)
-        question_count = len(questions) if questions else 0
-
-        return {
-            "video_id": video_id,
-            "processing_status": video.get("processing_status", "completed"),
-            "error_message": video.get("error_message"),
-            "has_transcript": video.get("transcript") is not None,
-            "flashcard_count": question_count,
-            "batch_current": video.get("batch_current", 0),
-            "batch_total": video.get("batch_total", 0),
-        }
+        return {"video_id": video_id, **status}
 
     except HTTPException:
         raise
@@ -336,9 +811,102 @@ async def get_video_status(video_id: str):
         raise HTTPException(status_code=500, detail="Error fetching video status")
 
 
+@router.get("/{video_id}/events")
+async def stream_video_events(video_id: str, request: Request):
+    """
+    Server-sent events for video processing progress
+
+    Streams stage changes, batch progress and newly stored flashcards as the
+    ingestion pipeline produces them. At most one narrow status read happens at
+    connect time; after that the stream is fed entirely by the progress broker.
+    """
+    logger.info(f"=== Opening progress stream for video: {video_id} ===")
+
+    status = await video_status_cache.get(video_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="Video not found")
+    snapshot = {"type": "status", **status}
+
+    def format_event(event: dict) -> str:
+        return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    async def event_stream():
+        async with progress_broker.subscribe(video_id) as queue:
+            yield format_event(snapshot)
+            if snapshot["processing_status"] in ("completed", "failed"):
+                return
+
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Keep proxies from closing an idle connection
+                    yield ": keepalive\n\n"
+                    continue
+
+                yield format_event(event)
+                if event["type"] == "status" and event["processing_status"] in ("completed", "failed"):
+                    return
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/{video_id}/transcript")
+async def get_video_transcript(
+    video_id: str,
+    start: float = Query(0.0, ge=0),
+    end: Optional[float] = Query(None, ge=0),
+    cursor: Optional[int] = Query(None, ge=0),
+    limit: int = Query(settings.transcript_window_max_segments, ge=1)
+):
+    """
+    Transcript segments in a time window
+
+    Returns the segments overlapping [start, end) (end omitted = to the end of
+    the video), found by bisecting segment start times - a learn page loads
+    the window around the playhead and prefetches the next one. At most
+    `limit` segments are returned; pass `next_cursor` back as `cursor` (with
+    the same window) for the rest. The body is streamed as it is encoded.
+    """
+    transcript = await loaded_transcripts.get(video_id)
+    if transcript is None:
+        if not await video_status_cache.get(video_id):
+            raise HTTPException(status_code=404, detail="Video not found")
+        raise HTTPException(status_code=404, detail="Video transcript not yet available")
+
+    window = transcript.window(start, end)
+    first = window.start if cursor is None else max(cursor, window.start)
+    last = min(window.stop, first + min(limit, settings.transcript_window_max_segments))
+    next_cursor = last if last < window.stop else None
+
+    def body():
+        yield (
+            f'{{"video_id":{json.dumps(video_id)},"duration":{json.dumps(transcript.duration)},'
+            f'"next_cursor":{json.dumps(next_cursor)},"segments":['
+        )
+        # Starlette sends each chunk of a sync iterator via the threadpool - send a few segments per chunk
+        for chunk_start in range(first, last, 25):
+            yield ",".join(
+                json.dumps({"index": index, **transcript.segment_dict(index)})
+                for index in range(chunk_start, min(chunk_start + 25, last))
+            ) + ("," if chunk_start + 25 < last else "")
+        yield "]}"
+
+    return StreamingResponse(body(), media_type="application/json")
+
+
 @router.get("/{video_id}")
-async def get_video(video_id: str):
-    """Get video information and flashcards"""
+async def get_video(video_id: str, include_transcript: bool = True):
+    """
+    Get video information and flashcards
+
+    Pass include_transcript=false to leave out the full transcript; the learn
+    page reads it in windows from GET /{video_id}/transcript instead.
+    """
     logger.info(f"=== Fetching video: {video_id} ===")
 
     try:
@@ -348,11 +916,10 @@ async def get_video(video_id: str):
 
         questions = await db.get_questions(video_id)
 
-        transcript = (
-            json.loads(video["transcript"])
-            if isinstance(video.get("transcript"), str) and video.get("transcript")
-            else video.get("transcript")
-        )
+        transcript = None
+        if include_transcript:
+            stored_transcript = await db.get_transcript(video_id)
+            transcript = stored_transcript.to_dict() if stored_transcript is not None else None
 
         return {
             "video_id": video_id,
@@ -418,6 +985,8 @@ async def delete_video(video_id: str, project_id: str = None):
 
         # Delete the video
         result = await db.delete_video(video_id, project_id)
+        if result.get("deleted_completely"):
+            loaded_transcripts.invalidate(video_id)
 
         logger.info(f"=== Video deleted successfully: {video_id} ===")
         return result
@@ -1,6 +1,7 @@
 from typing import Dict
 from logging_config import get_logger
 from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
 from config import settings
 from youtube_transcript_api import YouTubeTranscriptApi
 
@@ -49,7 +50,8 @@ def validate_video_info(video_info: Dict, video_id: str) -> bool:
 async def validate_video_language(video_id: str) -> bool:
     ytt_api = YouTubeTranscriptApi()
     try:
-        transcript_list = ytt_api.list(video_id)
+        # Blocking HTTP call - keep it off the event loop
+        transcript_list = await run_in_threadpool(ytt_api.list, video_id)
         transcript_list.find_transcript(['en'])
     except Exception as e:
         raise HTTPException(
@@ -0,0 +1,121 @@
+import asyncio
+import math
+from typing import Iterable, Optional
+from config import settings
+from database import db
+from logging_config import get_logger
+from services.metrics import Sample, metrics
+
+logger = get_logger(__name__)
+
+# Used for Retry-After until some jobs have completed in the last hour
+DEFAULT_JOB_SECONDS = 300
+MAX_RETRY_AFTER_SECONDS = 3600
+
+metrics.describe("ingestion_stage_limit", "gauge", "Concurrency limit of an ingestion stage in this process")
+metrics.describe("ingestion_stage_in_use", "gauge", "Ingestion stage slots in use in this process")
+metrics.describe("ingestion_stage_waiting", "gauge", "Ingestion work waiting for a stage slot in this process")
+metrics.describe("ingestion_stage_saturation", "gauge", "Ingestion stage slots in use / limit in this process")
+metrics.describe("ingestion_admission_rejected_total", "counter", "process-async requests turned away, per reason")
+
+
+class StageLimiter:
+    """
+    Process-wide concurrency limit for one ingestion stage
+
+    Every ingestion job in the process shares it, so a burst of jobs queues
+    here instead of firing downloads or OpenAI calls all at once.
+    """
+
+    def __init__(self, stage: str, limit: int):
+        self.stage = stage
+        self.limit = max(1, limit)
+        self.in_use = 0
+        self.waiting = 0
+        self._slots = asyncio.Semaphore(self.limit)
+
+    async def __aenter__(self):
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_use += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        self.in_use -= 1
+        self._slots.release()
+
+
+download_limiter = StageLimiter("download", settings.ingestion_max_downloads)
+transcription_limiter = StageLimiter("transcribe", settings.ingestion_max_transcriptions)
+generation_limiter = StageLimiter("generate", settings.ingestion_max_generations)
+
+
+async def collect_stage_metrics() -> Iterable[Sample]:
+    samples = []
+    for limiter in (download_limiter, transcription_limiter, generation_limiter):
+        stage = {"stage": limiter.stage}
+        samples += [
+            ("ingestion_stage_limit", stage, limiter.limit),
+            ("ingestion_stage_in_use", stage, limiter.in_use),
+            ("ingestion_stage_waiting", stage, limiter.waiting),
+            ("ingestion_stage_saturation", stage, limiter.in_use / limiter.limit),
+        ]
+    return samples
+
+
+metrics.register_collector(collect_stage_metrics)
+
+
+class IngestionBackpressure(Exception):
+    """The ingestion queue cannot take more work right now"""
+
+    def __init__(self, status_code: int, retry_after: int, error: str, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.error = error
+        self.message = message
+
+
+async def check_admission(user_id: Optional[str] = None, videos: int = 1):
+    """
+    Raise IngestionBackpressure if enqueueing `videos` more jobs would overflow
+    the global queue (503) or the user's share of it (429)
+
+    Retry-After estimates how long the backlog needs to drain enough, from the
+    mean run time of recently completed jobs.
+    """
+    stats = await db.get_ingestion_admission_stats(user_id)
+    queued = stats.get("queued") or 0
+    running = stats.get("running") or 0
+    user_queued = stats.get("user_queued") or 0
+    job_seconds = stats.get("avg_run_seconds") or DEFAULT_JOB_SECONDS
+
+    excess = queued + videos - settings.ingestion_max_queue_depth
+    if excess > 0:
+        retry_after = _retry_after(excess, job_seconds, running)
+        metrics.inc("ingestion_admission_rejected_total", reason="queue_full")
+        logger.warning(f"Ingestion queue full ({queued} queued) - rejecting, retry after {retry_after}s")
+        raise IngestionBackpressure(
+            503, retry_after, "Ingestion queue full",
+            "Video processing is at capacity. Please try again shortly."
+        )
+
+    if user_id:
+        excess = user_queued + videos - settings.ingestion_max_queued_per_user
+        if excess > 0:
+            retry_after = _retry_after(excess, job_seconds, settings.ingestion_max_running_per_user)
+            metrics.inc("ingestion_admission_rejected_total", reason="user_backlog")
+            logger.warning(f"User {user_id} has {user_queued} queued videos - rejecting, retry after {retry_after}s")
+            raise IngestionBackpressure(
+                429, retry_after, "Too many queued videos",
+                f"You already have {user_queued} videos waiting to be processed. Please try again later."
+            )
+
+
+def _retry_after(excess: int, job_seconds: float, parallel_jobs: int) -> int:
+    seconds = math.ceil(excess * job_seconds / max(1, parallel_jobs))
+    return max(1, min(seconds, MAX_RETRY_AFTER_SECONDS))
@@ -0,0 +1,252 @@
+import asyncio
+import re
+from bisect import bisect_right
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# silencedetect parameters: quieter than NOISE_DB for at least MIN_SILENCE_SECONDS
+NOISE_DB = -35
+MIN_SILENCE_SECONDS = 0.4
+# Silence kept around each speech region by the VAD pass
+SPEECH_PADDING_SECONDS = 0.25
+# How far from the nominal chunk boundary a cut may move to land in a silence
+CUT_SEARCH_SECONDS = 30.0
+# Runs of words repeated across a cut that are dropped when stitching: shorter
+# ones are as likely to be speech that really repeats a word ("to the" + "the next")
+MIN_REPEATED_WORDS = 2
+MAX_REPEATED_WORDS = 20
+
+# What speech recognition needs: 16 kHz mono Opus in Ogg, ~180 KB per minute
+# (a 192 kbps MP3 is ~1.4 MB per minute)
+SPEECH_AUDIO_ARGS = (
+    "-vn", "-ac", "1", "-ar", "16000",
+    "-c:a", "libopus", "-b:a", "24k", "-application", "voip",
+    "-f", "ogg"
+)
+
+_SILENCE_RE = re.compile(r"silence_(start|end): (-?\d+(?:\.\d+)?)")
+
+
+class AudioChunk(NamedTuple):
+    """
+    A slice of an audio file to transcribe on its own
+
+    start/end is the audio actually sent (including overlap with neighbours);
+    keep_start/keep_end is the part of the timeline this chunk is responsible
+    for when the chunks are stitched back together.
+    """
+    start: float
+    end: float
+    keep_start: float
+    keep_end: float
+
+
+async def run_ffmpeg(*args: str, input_data: Optional[bytes] = None) -> str:
+    """Run ffmpeg and return its stderr (where it logs); raises RuntimeError on failure"""
+    _, output = await _exec_ffmpeg(args, input_data, capture_output=False)
+    return output
+
+
+async def ffmpeg_pipe(*args: str, input_data: Optional[bytes] = None) -> bytes:
+    """Run ffmpeg writing to pipe:1 and return what it wrote (optionally fed input_data on pipe:0)"""
+    data, _ = await _exec_ffmpeg(args, input_data, capture_output=True)
+    return data
+
+
+async def _exec_ffmpeg(args, input_data: Optional[bytes], capture_output: bool) -> Tuple[bytes, str]:
+    command = ["ffmpeg", "-hide_banner"]
+    if input_data is None:
+        command.append("-nostdin")
+
+    process = await asyncio.create_subprocess_exec(
+        *command, *args,
+        stdin=asyncio.subprocess.PIPE if input_data is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE if capture_output else asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await process.communicate(input_data)
+    output = stderr.decode(errors="replace")
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg exited with {process.returncode}: {output[-500:]}")
+    return stdout or b"", output
+
+
+async def detect_silences(audio_data: bytes) -> List[Tuple[float, float]]:
+    """Find the silent spans of in-memory audio with ffmpeg's silencedetect filter"""
+    output = await run_ffmpeg(
+        "-nostats", "-i", "pipe:0",
+        "-af", f"silencedetect=noise={NOISE_DB}dB:d={MIN_SILENCE_SECONDS}",
+        "-f", "null", "-",
+        input_data=audio_data
+    )
+    return parse_silences(output)
+
+
+async def cut_audio(audio_data: bytes, start_time: float, end_time: float) -> bytes:
+    """Cut [start_time, end_time) out of in-memory Ogg audio with stream copy"""
+    return await ffmpeg_pipe(
+        "-i", "pipe:0",
+        "-ss", f"{start_time:.3f}", "-t", f"{end_time - start_time:.3f}",
+        "-c", "copy", "-f", "ogg", "pipe:1",
+        input_data=audio_data
+    )
+
+
+def parse_silences(output: str) -> List[Tuple[float, float]]:
+    """Pair up silence_start / silence_end lines of silencedetect output"""
+    silences = []
+    start = None
+    for kind, value in _SILENCE_RE.findall(output):
+        if kind == "start":
+            start = max(0.0, float(value))
+        elif start is not None:
+            silences.append((start, float(value)))
+            start = None
+    return silences
+
+
+def speech_regions(
+    duration: float,
+    silences: Sequence[Tuple[float, float]],
+    min_silence_seconds: float,
+    padding_seconds: float = SPEECH_PADDING_SECONDS
+) -> List[Tuple[float, float]]:
+    """
+    Spans of [0, duration) outside silences of at least min_silence_seconds
+
+    Each span keeps padding_seconds of the surrounding silence so word onsets
+    and tails are not clipped.
+    """
+    regions = []
+    position = 0.0
+    for start, end in silences:
+        if end - start < min_silence_seconds:
+            continue
+        if start > position:
+            regions.append((max(0.0, position - padding_seconds), min(duration, start + padding_seconds)))
+        position = end
+    if position < duration:
+        regions.append((max(0.0, position - padding_seconds), duration))
+    return regions
+
+
+async def condense_audio(audio_data: bytes, regions: Sequence[Tuple[float, float]]) -> bytes:
+    """Re-encode only the given spans of in-memory audio, back to back"""
+    selection = "+".join(f"between(t,{start:.3f},{end:.3f})" for start, end in regions)
+    return await ffmpeg_pipe(
+        "-i", "pipe:0",
+        "-af", f"aselect='{selection}',asetpts=N/SR/TB",
+        *SPEECH_AUDIO_ARGS, "pipe:1",
+        input_data=audio_data
+    )
+
+
+def map_to_timeline(segments: List[Dict], regions: Sequence[Tuple[float, float]]) -> List[Dict]:
+    """Map segment times of condensed audio (see condense_audio) back to the original timeline"""
+    # Condensed-audio time at which each region starts
+    offsets = []
+    condensed = 0.0
+    for start, end in regions:
+        offsets.append(condensed)
+        condensed += end - start
+
+    def original_time(t: float) -> float:
+        i = max(0, bisect_right(offsets, t) - 1)
+        start, end = regions[i]
+        return min(end, start + t - offsets[i])
+
+    return [
+        {**segment, "start": original_time(segment["start"]), "end": original_time(segment["end"])}
+        for segment in segments
+    ]
+
+
+def plan_chunks(
+    duration: float,
+    silences: Sequence[Tuple[float, float]],
+    chunk_seconds: float,
+    overlap_seconds: float
+) -> List[AudioChunk]:
+    """
+    Split [0, duration) into chunks of about chunk_seconds
+
+    Each cut is moved to the middle of the silence closest to its nominal
+    position (within CUT_SEARCH_SECONDS), so words are rarely split. Chunks
+    extend overlap_seconds past each cut so a word the cut does clip is heard
+    whole by one of the two neighbours.
+    """
+    midpoints = [(start + end) / 2 for start, end in silences]
+
+    cuts = []
+    last_cut = 0.0
+    # Don't leave a short tail chunk - fold up to a quarter chunk into the last one
+    while duration - last_cut > chunk_seconds * 1.25:
+        target = last_cut + chunk_seconds
+        candidates = [
+            midpoint for midpoint in midpoints
+            if abs(midpoint - target) <= CUT_SEARCH_SECONDS and midpoint > last_cut
+        ]
+        cut = min(candidates, key=lambda midpoint: abs(midpoint - target)) if candidates else target
+        cuts.append(cut)
+        last_cut = cut
+
+    bounds = [0.0] + cuts + [duration]
+    return [
+        AudioChunk(
+            start=max(0.0, keep_start - overlap_seconds) if i > 0 else 0.0,
+            end=min(duration, keep_end + overlap_seconds),
+            keep_start=keep_start,
+            keep_end=keep_end
+        )
+        for i, (keep_start, keep_end) in enumerate(zip(bounds, bounds[1:]))
+    ]
+
+
+def stitch_segments(results: Sequence[Tuple[AudioChunk, List[Dict]]]) -> List[Dict]:
+    """
+    Merge per-chunk transcription segments into one timeline
+
+    Segment times are relative to their chunk and are shifted by the chunk's
+    start. A segment belongs to the chunk whose keep range contains its
+    midpoint, so speech in the overlap is kept once. Words repeated on both
+    sides of a cut are dropped from the later segment when it starts in audio
+    the earlier chunk heard too.
+    """
+    stitched = []
+    for chunk, segments in results:
+        for segment in segments:
+            start = segment["start"] + chunk.start
+            end = segment["end"] + chunk.start
+            midpoint = (start + end) / 2
+            if not chunk.keep_start <= midpoint < chunk.keep_end:
+                continue
+
+            text = segment["text"]
+            if stitched and stitched[-1]["chunk"] is not chunk and start < stitched[-1]["chunk"].end:
+                text = _drop_repeated_words(stitched[-1]["text"], text)
+            if not text.strip():
+                continue
+
+            stitched.append({"start": start, "end": end, "text": text, "chunk": chunk})
+
+    for segment in stitched:
+        del segment["chunk"]
+    return stitched
+
+
+def _drop_repeated_words(previous: str, text: str) -> str:
+    """Remove the longest prefix of text that repeats the end of previous"""
+    previous_words = _normalize(previous.split()[-MAX_REPEATED_WORDS:])
+    words = text.split()
+    normalized = _normalize(words[:MAX_REPEATED_WORDS])
+
+    for size in range(min(len(previous_words), len(normalized)), MIN_REPEATED_WORDS - 1, -1):
+        if previous_words[-size:] == normalized[:size]:
+            return " " + " ".join(words[size:]) if size < len(words) else ""
+    return text
+
+
+def _normalize(words: List[str]) -> List[str]:
+    return [re.sub(r"[^\w']", "", word.lower()) for word in words]
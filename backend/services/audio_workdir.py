@@ -0,0 +1,125 @@
+import asyncio
+import os
+import shutil
+import tempfile
+from typing import Dict, List, Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from config import settings
+from services.admission import download_limiter
+from services.audio_chunker import SPEECH_AUDIO_ARGS, ffmpeg_pipe, run_ffmpeg
+from logging_config import get_logger
+import yt_dlp
+
+logger = get_logger(__name__)
+
+async def resolve_audio_stream(video_url: str) -> Tuple[str, Dict[str, str]]:
+    """Direct URL of the video's best audio stream, plus the HTTP headers it requires"""
+    ydl_opts = {
+        'format': 'bestaudio/best',
+        'quiet': True,
+        'no_warnings': True,
+    }
+
+    def extract():
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            return ydl.extract_info(video_url, download=False)
+
+    info = await run_in_threadpool(extract)
+    return info['url'], info.get('http_headers') or {}
+
+
+def _stream_input_args(
+    stream_url: str,
+    headers: Dict[str, str],
+    start_time: Optional[float] = None,
+    end_time: Optional[float] = None
+) -> List[str]:
+    args = []
+    if headers:
+        args += ["-headers", "".join(f"{name}: {value}\r\n" for name, value in headers.items())]
+    # Seeking before -i makes ffmpeg fetch only the requested range (HTTP range requests)
+    if start_time is not None:
+        args += ["-ss", f"{start_time:.3f}"]
+    args += ["-i", stream_url]
+    if end_time is not None:
+        args += ["-t", f"{end_time - (start_time or 0):.3f}"]
+    return args
+
+
+async def fetch_speech_audio(
+    video_url: str,
+    start_time: Optional[float] = None,
+    end_time: Optional[float] = None
+) -> bytes:
+    """
+    Stream a video's audio (or a time range of it) through ffmpeg into
+    speech-grade Opus, returned in memory without touching disk
+    """
+    # Downloads are a shared, process-wide limited resource
+    async with download_limiter:
+        stream_url, headers = await resolve_audio_stream(video_url)
+        if start_time is not None and end_time is not None:
+            logger.info(f"Streaming audio segment {start_time}s-{end_time}s")
+        return await ffmpeg_pipe(
+            *_stream_input_args(stream_url, headers, start_time, end_time),
+            *SPEECH_AUDIO_ARGS, "pipe:1"
+        )
+
+
+class AudioWorkdir:
+    """
+    Per-job working directory holding a video's audio
+
+    The audio is streamed to disk as speech-grade Opus the first time a batch
+    needs it (concurrent batches wait for that one download) and every batch
+    range is then cut from the local file with ffmpeg stream copy - no
+    re-encode and no further network fetches. The directory is removed when
+    the job leaves the context.
+    """
+
+    def __init__(self, video_url: str):
+        self.video_url = video_url
+        self.path: Optional[str] = None
+        self._audio_path: Optional[str] = None
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        self.path = tempfile.mkdtemp(prefix="ingest-", dir=settings.ingestion_workdir or None)
+        return self
+
+    async def __aexit__(self, *exc):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    async def audio_path(self) -> str:
+        """Path of the full audio track, downloading it on first use"""
+        async with self._lock:
+            if self._audio_path is None:
+                logger.info(f"Downloading audio once for this job into {self.path}")
+                audio_path = os.path.join(self.path, "audio.ogg")
+                async with download_limiter:
+                    stream_url, headers = await resolve_audio_stream(self.video_url)
+                    await run_ffmpeg(
+                        *_stream_input_args(stream_url, headers),
+                        *SPEECH_AUDIO_ARGS, "-y", audio_path
+                    )
+                self._audio_path = audio_path
+            return self._audio_path
+
+    async def read(self) -> bytes:
+        """The full audio track"""
+        audio_path = await self.audio_path()
+
+        def read():
+            with open(audio_path, 'rb') as audio_file:
+                return audio_file.read()
+
+        return await run_in_threadpool(read)
+
+    async def cut(self, start_time: float, end_time: float) -> bytes:
+        """[start_time, end_time) of the audio track, cut with stream copy"""
+        audio_path = await self.audio_path()
+        return await ffmpeg_pipe(
+            "-ss", f"{start_time:.3f}", "-i", audio_path,
+            "-t", f"{end_time - start_time:.3f}",
+            "-c", "copy", "-f", "ogg", "pipe:1"
+        )
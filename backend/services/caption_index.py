@@ -0,0 +1,55 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, List
+
+
+class CaptionIndex:
+    """
+    Sorted, array-backed time index over a caption track
+
+    Built once per video from the raw caption entries, after which any
+    (start_time, end_time) slice is a pair of bisect lookups instead of a
+    linear scan of the whole track.
+    """
+
+    def __init__(self, entries: List[Dict]):
+        entries = sorted(entries, key=lambda entry: entry['start'])
+
+        self.starts = array('d', (entry['start'] for entry in entries))
+        self.durations = array('d', (entry['duration'] for entry in entries))
+        self.texts = [entry['text'] for entry in entries]
+
+        # Running maximum of entry end times. Captions can overlap, so end
+        # times alone are not sorted, but this prefix maximum is.
+        self.max_ends = array('d')
+        running_max = float('-inf')
+        for start, duration in zip(self.starts, self.durations):
+            running_max = max(running_max, start + duration)
+            self.max_ends.append(running_max)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def slice(self, start_time: float, end_time: float) -> List[Dict]:
+        """Return the entries overlapping [start_time, end_time), in time order"""
+        # Entries before lo all end at or before start_time
+        lo = bisect_right(self.max_ends, start_time)
+        # Entries from hi onwards all start at or after end_time
+        hi = bisect_left(self.starts, end_time, lo)
+
+        return [
+            {
+                'text': self.texts[i],
+                'start': self.starts[i],
+                'duration': self.durations[i],
+            }
+            for i in range(lo, hi)
+            if self.starts[i] + self.durations[i] > start_time
+        ]
+
+    def to_list(self) -> List[Dict]:
+        """Return every entry, in time order"""
+        return [
+            {'text': text, 'start': start, 'duration': duration}
+            for text, start, duration in zip(self.texts, self.starts, self.durations)
+        ]
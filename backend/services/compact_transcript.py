@@ -0,0 +1,234 @@
+import json
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+import zstandard
+from models import VideoSegment, VideoTranscript
+
+# Version tag of the columnar JSON once stored in videos.transcript
+STORAGE_VERSION = 2
+# Binary layout: magic, segment count, duration, language length, then the
+# start, end and offset arrays, the language and the UTF-8 text
+BINARY_MAGIC = b"CTR1"
+_HEADER = struct.Struct("<4sIdH")
+# Format of video_transcripts.data: 1 = zstd-compressed binary form
+BLOB_FORMAT_VERSION = 1
+
+
+class CompactTranscript:
+    """
+    Columnar transcript: parallel start/end arrays plus one text buffer
+
+    The buffer is the segment texts joined by single spaces - which is the
+    transcript's full_text - so the text is held once instead of twice (once
+    per segment and again as full_text), and segment i is the slice between
+    offsets[i] and offsets[i + 1]. Times are packed doubles instead of a float
+    object per field. VideoSegment objects and the {segments, full_text, ...}
+    JSON shape are only built on demand, at the API edge.
+    """
+
+    __slots__ = ("starts", "ends", "offsets", "text", "duration", "detected_language")
+
+    def __init__(
+        self,
+        starts: array,
+        ends: array,
+        offsets: array,
+        text: str,
+        duration: float,
+        detected_language: Optional[str] = None
+    ):
+        self.starts = starts
+        self.ends = ends
+        # len(segments) + 1 character offsets into text; segments are separated by one space
+        self.offsets = offsets
+        self.text = text
+        self.duration = duration
+        self.detected_language = detected_language
+
+    # -------------------------
+    # Construction
+    # -------------------------
+
+    @classmethod
+    def from_segments(
+        cls,
+        segments: Iterable[Union[VideoSegment, Dict]],
+        duration: float,
+        detected_language: Optional[str] = None
+    ) -> "CompactTranscript":
+        """Build from VideoSegment objects or {start_time, end_time, text} dicts"""
+        starts = array("d")
+        ends = array("d")
+        offsets = array("I", [0])
+        texts = []
+        position = 0
+        for segment in segments:
+            if isinstance(segment, dict):
+                start, end, text = segment["start_time"], segment["end_time"], segment["text"]
+            else:
+                start, end, text = segment.start_time, segment.end_time, segment.text
+            starts.append(start)
+            ends.append(end)
+            texts.append(text)
+            position += len(text) + 1
+            offsets.append(position)
+        return cls(starts, ends, offsets, " ".join(texts), duration, detected_language)
+
+    @classmethod
+    def from_transcript(cls, transcript: VideoTranscript) -> "CompactTranscript":
+        return cls.from_segments(transcript.segments, transcript.duration, transcript.detected_language)
+
+    @classmethod
+    def from_stored(cls, value: Union[str, bytes, Dict, None]) -> Optional["CompactTranscript"]:
+        """
+        Load a transcript from the legacy videos.transcript column: the
+        {segments, full_text, duration} JSON or the later columnar JSON (as a
+        dict or a string), or the binary form. Returns None when nothing is
+        stored.
+        """
+        if not value:
+            return None
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            return cls.from_bytes(bytes(value))
+        if isinstance(value, str):
+            value = json.loads(value)
+            if not value:
+                return None
+
+        if value.get("v") == STORAGE_VERSION:
+            offsets = array("I", [0])
+            offsets.extend(value["offsets"])
+            return cls(
+                array("d", value["starts"]),
+                array("d", value["ends"]),
+                offsets,
+                value["text"],
+                value["duration"],
+                value.get("detected_language")
+            )
+        return cls.from_segments(
+            value.get("segments") or [],
+            value.get("duration", 0),
+            value.get("detected_language")
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CompactTranscript":
+        magic, count, duration, language_length = _HEADER.unpack_from(data)
+        if magic != BINARY_MAGIC:
+            raise ValueError("Not a compact transcript")
+
+        position = _HEADER.size
+        starts = array("d")
+        ends = array("d")
+        offsets = array("I")
+        for values, length in ((starts, count), (ends, count), (offsets, count + 1)):
+            size = length * values.itemsize
+            values.frombytes(data[position:position + size])
+            if sys.byteorder == "big":
+                values.byteswap()
+            position += size
+
+        language = data[position:position + language_length].decode("utf-8") or None
+        position += language_length
+        return cls(starts, ends, offsets, data[position:].decode("utf-8"), duration, language)
+
+    # -------------------------
+    # Access
+    # -------------------------
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @property
+    def full_text(self) -> str:
+        # The buffer already is the joined text - nothing to build
+        return self.text
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the arrays and the text"""
+        arrays = (self.starts, self.ends, self.offsets)
+        return sum(len(values) * values.itemsize for values in arrays) + len(self.text)
+
+    def window(self, start: float, end: Optional[float] = None) -> range:
+        """
+        Indexes of the segments overlapping [start, end) (end None = to the end),
+        found by bisecting the sorted segment start times
+        """
+        first = bisect_right(self.starts, start) - 1
+        if first < 0 or self.ends[first] <= start:
+            first += 1
+        last = len(self) if end is None else bisect_left(self.starts, end)
+        return range(first, max(first, last))
+
+    def segment_text(self, index: int) -> str:
+        return self.text[self.offsets[index]:self.offsets[index + 1] - 1]
+
+    def segment(self, index: int) -> VideoSegment:
+        return VideoSegment(
+            start_time=self.starts[index],
+            end_time=self.ends[index],
+            text=self.segment_text(index)
+        )
+
+    def segments(self) -> List[VideoSegment]:
+        return [self.segment(i) for i in range(len(self))]
+
+    def segment_dict(self, index: int) -> Dict:
+        return {"start_time": self.starts[index], "end_time": self.ends[index], "text": self.segment_text(index)}
+
+    def segment_dicts(self) -> Iterator[Dict]:
+        for i in range(len(self)):
+            yield self.segment_dict(i)
+
+    # -------------------------
+    # Serialization
+    # -------------------------
+
+    def to_dict(self) -> Dict:
+        """The API's transcript JSON shape"""
+        return {
+            "segments": list(self.segment_dicts()),
+            "full_text": self.text,
+            "duration": self.duration,
+            "detected_language": self.detected_language,
+        }
+
+    def to_transcript(self) -> VideoTranscript:
+        return VideoTranscript(
+            segments=self.segments(),
+            full_text=self.text,
+            duration=self.duration,
+            detected_language=self.detected_language
+        )
+
+    def to_bytes(self) -> bytes:
+        """Binary form: packed little-endian arrays followed by the UTF-8 text"""
+        language = (self.detected_language or "").encode("utf-8")
+        return b"".join((
+            _HEADER.pack(BINARY_MAGIC, len(self), self.duration, len(language)),
+            *(_little_endian(values) for values in (self.starts, self.ends, self.offsets)),
+            language,
+            self.text.encode("utf-8"),
+        ))
+
+    def to_blob(self, level: int = 10) -> bytes:
+        """zstd-compressed binary form, as stored in video_transcripts (format BLOB_FORMAT_VERSION)"""
+        return zstandard.ZstdCompressor(level=level).compress(self.to_bytes())
+
+    @classmethod
+    def from_blob(cls, data: bytes, format_version: int = BLOB_FORMAT_VERSION) -> "CompactTranscript":
+        if format_version != BLOB_FORMAT_VERSION:
+            raise ValueError(f"Unsupported transcript format version: {format_version}")
+        return cls.from_bytes(zstandard.ZstdDecompressor().decompress(data))
+
+
+def _little_endian(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
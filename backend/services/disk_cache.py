@@ -0,0 +1,128 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Optional
+from fastapi.concurrency import run_in_threadpool
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Eviction trims the cache to this share of its limit, so it doesn't run on every write
+EVICT_TO = 0.9
+
+
+class DiskCache:
+    """
+    Compressed on-disk key/value cache with size-bounded LRU eviction
+
+    Values are gzip'd JSON files named by the hash of their key; reads refresh
+    the file's mtime and the least recently used files are evicted once the
+    directory grows past max_bytes. Writes are atomic, so API and worker
+    processes on one host can share the directory.
+    """
+
+    def __init__(self, name: str, directory: str, max_bytes: int):
+        self.name = name
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    async def load(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        return await run_in_threadpool(self._read, self._path(key))
+
+    async def store(self, key: str, value: Any):
+        if not self.enabled:
+            return
+        try:
+            await run_in_threadpool(self._write, self._path(key), value)
+        except OSError as e:
+            # The cache is an optimization - never fail the caller over it
+            logger.warning(f"Could not write {self.name} entry: {str(e)}")
+
+    async def remove(self, key: str):
+        if self.enabled:
+            await run_in_threadpool(self._remove, self._path(key))
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}.json.gz")
+
+    def _read(self, path: str) -> Optional[Any]:
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)  # mark as recently used
+            return value
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable {self.name} entry {path}: {str(e)}")
+            self._remove(path)
+            return None
+
+    def _write(self, path: str, value: Any):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = gzip.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json.gz"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield stat.st_mtime, stat.st_size, path
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        """Delete least recently used entries until the cache is back under its limit"""
+        entries = sorted(self._entries())
+        size = sum(entry_size for _, entry_size, _ in entries)
+        target = self.max_bytes * EVICT_TO
+        evicted = 0
+        for _, entry_size, path in entries:
+            if size <= target:
+                break
+            self._remove(path)
+            size -= entry_size
+            evicted += 1
+        self._size = size
+        logger.info(f"{self.name} evicted {evicted} entries, {size / 1024 / 1024:.1f} MB left")
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,114 @@
+import asyncio
+from typing import Any, Awaitable, Callable, List, Tuple
+from config import settings
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+Batch = Tuple[float, float]
+
+
+class BatchPipeline:
+    """
+    Pipelined batch ingestion engine
+
+    Every batch goes through two stages (transcribe -> generate) and is then
+    committed. Stages of different batches overlap, so batch N+1 is transcribed
+    while batch N's flashcards are generated. Commits always happen in batch
+    order, so questions and progress counters are written exactly as before.
+
+    Wall-clock time for a long video is bounded by the slowest stage instead of
+    the sum of all stages.
+
+    Each stage and commit is retried with exponential backoff before a batch is
+    given up on, so a transient API error doesn't fail the whole video.
+    """
+
+    def __init__(
+        self,
+        transcribe_concurrency: int = 1,
+        generate_concurrency: int = 1,
+        max_retries: int = 2,
+        retry_delay: float = 2.0
+    ):
+        self.transcribe_concurrency = max(1, transcribe_concurrency)
+        self.generate_concurrency = max(1, generate_concurrency)
+        self.max_retries = max(0, max_retries)
+        self.retry_delay = retry_delay
+
+    async def run(
+        self,
+        batches: List[Batch],
+        transcribe: Callable[[int, Batch], Awaitable[Any]],
+        generate: Callable[[int, Batch, Any], Awaitable[Any]],
+        commit: Callable[[int, Batch, Any, Any], Awaitable[None]],
+        first_batch: int = 1
+    ) -> None:
+        """
+        Run all batches through the pipeline
+
+        Args:
+            batches: List of (start_time, end_time) tuples, in video order
+            transcribe: Stage 1, called as transcribe(batch_num, batch)
+            generate: Stage 2, called as generate(batch_num, batch, transcript)
+            commit: Called in batch order as commit(batch_num, batch, transcript, result)
+            first_batch: batch_num of batches[0] (> 1 when resuming)
+
+        batch_num is 1-based, matching the batch_current counter.
+        """
+        transcribe_slots = asyncio.Semaphore(self.transcribe_concurrency)
+        generate_slots = asyncio.Semaphore(self.generate_concurrency)
+
+        # Bound how far transcription may run ahead of generation so a slow
+        # generation stage doesn't pile up transcripts for the whole video
+        window = asyncio.Semaphore(self.transcribe_concurrency + self.generate_concurrency)
+
+        async def process(batch_num: int, batch: Batch):
+            async with window:
+                async with transcribe_slots:
+                    transcript = await self.with_retries(f"Batch {batch_num} transcribe", transcribe, batch_num, batch)
+                async with generate_slots:
+                    result = await self.with_retries(
+                        f"Batch {batch_num} generate", generate, batch_num, batch, transcript
+                    )
+                return transcript, result
+
+        tasks = [
+            asyncio.create_task(process(batch_num, batch))
+            for batch_num, batch in enumerate(batches, first_batch)
+        ]
+
+        try:
+            for batch_num, (batch, task) in enumerate(zip(batches, tasks), first_batch):
+                transcript, result = await task
+                await self.with_retries(f"Batch {batch_num} commit", commit, batch_num, batch, transcript, result)
+        finally:
+            # A failed stage or commit aborts the whole run
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def with_retries(self, what: str, fn: Callable[..., Awaitable[Any]], *args) -> Any:
+        """fn(*args), retried with the pipeline's backoff; what names it in the logs"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await fn(*args)
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.retry_delay * 2 ** attempt
+                logger.warning(
+                    f"{what} failed (attempt {attempt + 1}/{self.max_retries + 1}): "
+                    f"{str(e)} - retrying in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+
+
+batch_pipeline = BatchPipeline(
+    transcribe_concurrency=settings.ingestion_transcribe_concurrency,
+    generate_concurrency=settings.ingestion_generate_concurrency,
+    max_retries=settings.ingestion_batch_max_retries,
+    retry_delay=settings.ingestion_batch_retry_delay
+)
@@ -0,0 +1,164 @@
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+from config import settings
+from database import db
+from logging_config import get_logger
+from services.metrics import Sample, metrics
+
+logger = get_logger(__name__)
+
+metrics.describe("ingestion_queue_depth", "gauge", "Jobs waiting to be claimed, per lane")
+metrics.describe("ingestion_jobs_running", "gauge", "Jobs currently held by a worker, per lane")
+metrics.describe("ingestion_oldest_queued_seconds", "gauge", "Age of the oldest waiting job, per lane")
+metrics.describe("ingestion_wait_seconds_avg", "gauge", "Mean enqueue-to-claim wait over the last 15 minutes, per lane")
+metrics.describe("ingestion_wait_seconds_p95", "gauge", "95th percentile enqueue-to-claim wait over the last 15 minutes, per lane")
+metrics.describe("ingestion_job_wait_seconds", "summary", "Enqueue-to-claim wait of jobs claimed by this process, per lane")
+
+
+class IngestionWorker:
+    """
+    Pulls video ingestion jobs from the durable ingestion_jobs table
+
+    A job is claimed with a lease (claim_ingestion_job, FOR UPDATE SKIP LOCKED)
+    and the lease is renewed by a heartbeat while the job runs. The claim picks
+    the priority lane first and skips users already running their fair share
+    of jobs, so one large upload cannot starve other users. If the worker
+    crashes or is redeployed, the lease expires and another worker reclaims the
+    job, so in-flight videos are never silently lost.
+    """
+
+    def __init__(
+        self,
+        worker_id: Optional[str] = None,
+        lease_seconds: int = settings.ingestion_lease_seconds,
+        heartbeat_interval: float = settings.ingestion_heartbeat_interval,
+        poll_interval: float = settings.ingestion_poll_interval,
+        max_running_per_user: int = settings.ingestion_max_running_per_user,
+        aging_seconds: int = settings.ingestion_priority_aging_seconds
+    ):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.poll_interval = poll_interval
+        self.max_running_per_user = max_running_per_user
+        self.aging_seconds = aging_seconds
+
+    async def run_forever(self, stop_event: Optional[asyncio.Event] = None):
+        """Claim and run jobs until stop_event is set"""
+        stop_event = stop_event or asyncio.Event()
+        logger.info(f"Ingestion worker {self.worker_id} started")
+
+        while not stop_event.is_set():
+            try:
+                ran_job = await self.run_once()
+            except Exception as e:
+                logger.error(f"Ingestion worker {self.worker_id} error: {str(e)}", exc_info=True)
+                ran_job = False
+
+            if not ran_job:
+                # Queue is empty - wait before polling again
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+        logger.info(f"Ingestion worker {self.worker_id} stopped")
+
+    async def run_once(self) -> bool:
+        """Claim and run a single job. Returns False if the queue was empty."""
+        job = await db.claim_ingestion_job(
+            self.worker_id,
+            self.lease_seconds,
+            max_running_per_user=self.max_running_per_user,
+            aging_seconds=self.aging_seconds
+        )
+        if not job:
+            return False
+
+        lane = job.get("lane", "standard")
+        if job["attempts"] == 1 and job.get("enqueued_at") and job.get("started_at"):
+            wait = datetime.fromisoformat(job["started_at"]) - datetime.fromisoformat(job["enqueued_at"])
+            metrics.observe("ingestion_job_wait_seconds", wait.total_seconds(), lane=lane)
+
+        logger.info(
+            f"Worker {self.worker_id} claimed job {job['id']} for video {job['video_id']} "
+            f"(lane {lane}, attempt {job['attempts']})"
+        )
+        await self._run_job(job)
+        return True
+
+    async def _run_job(self, job: Dict):
+        # Imported here to avoid a circular import with the video routes
+        from routes.video import process_video_background
+
+        if job["attempts"] > 1:
+            # A previous worker died mid-job; processing resumes from its checkpoints
+            logger.info(f"Job {job['id']} was reclaimed, resuming video {job['video_id']}")
+
+        work = asyncio.create_task(
+            process_video_background(
+                job["video_id"],
+                job["video_url"],
+                job.get("title"),
+                job.get("user_id"),
+                job.get("project_id")
+            )
+        )
+        heartbeat = asyncio.create_task(self._heartbeat(job["id"], work))
+
+        try:
+            await work
+            await db.finish_ingestion_job(job["id"], self.worker_id, "completed")
+        except asyncio.CancelledError:
+            if heartbeat.done() and not heartbeat.cancelled():
+                # Lease was lost; another worker owns the job now
+                logger.warning(f"Job {job['id']} abandoned by {self.worker_id} after losing its lease")
+                return
+            raise
+        except Exception as e:
+            await db.finish_ingestion_job(job["id"], self.worker_id, "failed", error=str(e))
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str, work: asyncio.Task):
+        """Renew the job lease until the work finishes; cancel the work if the lease is lost"""
+        while not work.done():
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                still_owned = await db.heartbeat_ingestion_job(job_id, self.worker_id, self.lease_seconds)
+            except Exception as e:
+                # Transient DB error - keep working, the lease has headroom
+                logger.warning(f"Heartbeat failed for job {job_id}: {str(e)}")
+                continue
+
+            if not still_owned:
+                work.cancel()
+                return
+
+
+async def collect_queue_metrics() -> Iterable[Sample]:
+    """Queue depth and wait time per lane, across all workers (read from the database)"""
+    samples = []
+    for row in await db.get_ingestion_queue_stats():
+        lane = {"lane": row["lane"]}
+        samples += [
+            ("ingestion_queue_depth", lane, row["queued"]),
+            ("ingestion_jobs_running", lane, row["running"]),
+            ("ingestion_oldest_queued_seconds", lane, row["oldest_queued_seconds"]),
+            ("ingestion_wait_seconds_avg", lane, row["avg_wait_seconds"]),
+            ("ingestion_wait_seconds_p95", lane, row["p95_wait_seconds"]),
+        ]
+    return samples
+
+
+metrics.register_collector(collect_queue_metrics)
+
+
+async def run_workers(count: int, stop_event: asyncio.Event):
+    """Run several ingestion workers concurrently in this process"""
+    workers = [IngestionWorker() for _ in range(count)]
+    await asyncio.gather(*(worker.run_forever(stop_event) for worker in workers))
@@ -0,0 +1,128 @@
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+from config import settings
+from services.disk_cache import DiskCache
+from services.metrics import metrics
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+metrics.describe("llm_cache_requests_total", "counter", "LLM response cache lookups, per model and result (memory, disk, miss)")
+
+
+class LLMResponseCache:
+    """
+    Cache of chat completion responses shared by every generator
+
+    Keyed by a hash of (model, temperature, messages, response_format), so a
+    retry, a reprocessed video or a duplicate request with the same prompt
+    costs no OpenAI call. An in-memory LRU of max_entries sits over an
+    on-disk tier (shared by the processes on a host, evicted by size), and
+    entries older than ttl_seconds are ignored in both.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._disk = DiskCache("LLM response cache", directory, max_bytes)
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and (self.max_entries > 0 or self._disk.enabled)
+
+    async def complete(
+        self,
+        create: Callable[..., Any],
+        parse: Callable[[str], Any] = json.loads,
+        refresh: bool = False,
+        **request
+    ) -> Any:
+        """
+        Parsed content of create(**request), a chat completions create call
+
+        The response is only cached once parse() accepts it, so a malformed
+        answer is never replayed. refresh=True skips the lookup (a retry after
+        output that parsed but was unusable) and overwrites the entry.
+        """
+        key = self.key(request)
+        if self.enabled and not refresh:
+            content = await self._get(key, request.get("model", ""))
+            if content is not None:
+                try:
+                    return parse(content)
+                except Exception as e:
+                    logger.warning(f"Discarding cached LLM response that no longer parses: {str(e)}")
+                    await self.invalidate(key)
+
+        response = create(**request)
+        if inspect.isawaitable(response):
+            response = await response
+        content = response.choices[0].message.content
+        result = parse(content)
+
+        if self.enabled:
+            await self._put(key, content)
+        return result
+
+    @staticmethod
+    def key(request: dict) -> str:
+        canonical = json.dumps(
+            [
+                request.get("model"),
+                request.get("temperature"),
+                request.get("messages"),
+                request.get("response_format"),
+            ],
+            sort_keys=True,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    async def invalidate(self, key: str):
+        self._memory.pop(key, None)
+        await self._disk.remove(key)
+
+    async def _get(self, key: str, model: str) -> Optional[str]:
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None and now - entry[0] < self.ttl_seconds:
+            self._memory.move_to_end(key)
+            metrics.inc("llm_cache_requests_total", model=model, result="memory")
+            return entry[1]
+
+        stored = await self._disk.load(key)
+        if stored is not None and now - stored["created_at"] < self.ttl_seconds:
+            self._remember(key, stored["created_at"], stored["content"])
+            metrics.inc("llm_cache_requests_total", model=model, result="disk")
+            return stored["content"]
+
+        metrics.inc("llm_cache_requests_total", model=model, result="miss")
+        return None
+
+    async def _put(self, key: str, content: str):
+        created_at = time.time()
+        self._remember(key, created_at, content)
+        await self._disk.store(key, {"created_at": created_at, "content": content})
+
+    def _remember(self, key: str, created_at: float, content: str):
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = (created_at, content)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+llm_cache = LLMResponseCache(
+    settings.llm_cache_dir or os.path.join(tempfile.gettempdir(), "llm-cache"),
+    settings.llm_cache_max_mb * 1024 * 1024,
+    settings.llm_cache_memory_entries,
+    settings.llm_cache_ttl_hours * 3600
+)
@@ -0,0 +1,290 @@
+import asyncio
+import json
+import random
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+import httpx
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    AsyncOpenAI,
+    DefaultAsyncHttpxClient,
+)
+from config import settings
+from services.metrics import metrics
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# HTTP statuses worth retrying: rate limited, timed out, conflicting or failing on OpenAI's side
+RETRY_STATUSES = {408, 409, 429}
+# Completion tokens assumed for a call that sets no max_tokens, until its usage is known
+COMPLETION_TOKEN_ESTIMATE = 1000
+# Characters per prompt token, for estimating a call's tokens before sending it
+CHARS_PER_TOKEN = 4
+
+metrics.describe("llm_requests_total", "counter", "OpenAI calls made by the LLM gateway, per model and status")
+metrics.describe("llm_request_seconds", "summary", "OpenAI call latency, per model (successful calls)")
+metrics.describe("llm_tokens_total", "counter", "OpenAI tokens used, per model and kind (prompt, completion)")
+metrics.describe("llm_retries_total", "counter", "OpenAI calls retried by the LLM gateway, per model and reason")
+metrics.describe("llm_rate_limit_wait_seconds_total", "counter", "Time calls waited for the client-side rate limit, per model")
+metrics.describe("llm_rate_limit_remaining", "gauge", "Remaining OpenAI rate limit from the last response, per model and limit")
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Seconds in an OpenAI reset header ("20ms", "1s", "6m0s")"""
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+class RateBucket:
+    """
+    Client-side estimate of one OpenAI rate limit (requests or tokens per minute)
+
+    Refills continuously at its per-minute capacity and is corrected by the
+    x-ratelimit-* headers of every response, so calls wait here instead of
+    being answered 429. Unlimited until the first response reports a limit,
+    unless a capacity is configured: then it starts with a single call's worth
+    and fills at that rate, so a burst of calls is paced from the first one.
+    """
+
+    def __init__(self, capacity: Optional[float] = None):
+        self.capacity = capacity
+        self.available = 1.0 if capacity else 0.0
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount can be taken (0 = now)"""
+        now = self._refill()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.capacity is None:
+            return 0.0
+        amount = min(amount, self.capacity)
+        if self.available >= amount:
+            return 0.0
+        return (amount - self.available) / (self.capacity / 60)
+
+    def take(self, amount: float):
+        if self.capacity is not None:
+            self.available -= min(amount, self.capacity)
+
+    def give_back(self, amount: float):
+        if self.capacity is not None:
+            self.available = min(self.capacity, self.available + amount)
+
+    def observe(self, limit: Optional[str], remaining: Optional[str], reset: Optional[str]):
+        """Correct the estimate from a response's limit / remaining / reset headers"""
+        try:
+            limit_value, remaining_value = float(limit), float(remaining)
+        except (TypeError, ValueError):
+            return
+        if limit_value <= 0:
+            return
+        self._refill()
+        if self.capacity is None:
+            self.available = remaining_value
+        self.capacity = limit_value
+        # Calls still in flight are not counted in the server's figure yet, so it
+        # only ever lowers the estimate
+        self.available = min(self.available, remaining_value)
+        if remaining_value <= 0:
+            self.block(parse_duration(reset) or 1.0)
+
+    def block(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def _refill(self) -> float:
+        now = time.monotonic()
+        if self.capacity is not None:
+            self.available = min(self.capacity, self.available + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+        return now
+
+
+class ModelLimits:
+    """Request and token buckets of one model; calls are admitted in arrival order"""
+
+    def __init__(self, requests_per_minute: Optional[int] = None):
+        self.requests = RateBucket(requests_per_minute or None)
+        self.tokens = RateBucket()
+        self.lock = asyncio.Lock()
+
+
+class LLMGateway:
+    """
+    The one way this backend talks to OpenAI
+
+    Every generator (and the hosted Whisper backend) shares a single
+    AsyncOpenAI client over one pooled HTTP connection pool. Calls are paced
+    by per-model request and token buckets fed from the rate-limit headers,
+    429 / 5xx / connection errors are retried with jittered exponential
+    backoff (honouring Retry-After), and each call records its latency and
+    token usage. Models given in requests_per_minute have their request
+    bucket paced at that rate before any headers have been seen.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        max_connections: int = 50,
+        timeout: float = 120.0,
+        max_retries: int = 4,
+        retry_delay: float = 1.0,
+        retry_max_delay: float = 30.0,
+        rate_limit_pacing: bool = True,
+        requests_per_minute: Optional[Dict[str, int]] = None
+    ):
+        self.max_retries = max(0, max_retries)
+        self.retry_delay = retry_delay
+        self.retry_max_delay = retry_max_delay
+        self.rate_limit_pacing = rate_limit_pacing
+        self.requests_per_minute = requests_per_minute or {}
+        self.http_client = DefaultAsyncHttpxClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout
+        )
+        # Retries are done here, where they can see the rate limits
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=self.http_client,
+            timeout=timeout,
+            max_retries=0
+        )
+        self._limits: Dict[str, ModelLimits] = {}
+
+    async def chat(self, **request) -> Any:
+        """client.chat.completions.create(**request), paced and retried"""
+        return await self._call(
+            self.client.chat.completions.with_raw_response.create,
+            request,
+            self._estimate_tokens(request)
+        )
+
+    async def transcribe(self, **request) -> Any:
+        """client.audio.transcriptions.create(**request), paced and retried"""
+        return await self._call(self.client.audio.transcriptions.with_raw_response.create, request, 0)
+
+    async def close(self):
+        await self.client.close()
+
+    async def _call(self, create: Callable[..., Awaitable[Any]], request: dict, tokens: int) -> Any:
+        model = request.get("model", "")
+        limits = self._limits.get(model)
+        if limits is None:
+            limits = self._limits[model] = ModelLimits(self.requests_per_minute.get(model))
+
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(model, limits, tokens)
+            started = time.perf_counter()
+            try:
+                raw = await create(**request)
+            except (APIStatusError, APIConnectionError) as e:
+                limits.tokens.give_back(tokens)
+                status = e.status_code if isinstance(e, APIStatusError) else "connection_error"
+                metrics.inc("llm_requests_total", model=model, status=status)
+                if isinstance(e, APIStatusError):
+                    self._observe_headers(model, limits, e.response.headers)
+                if attempt == self.max_retries or not self._retryable(e):
+                    raise
+
+                delay = self._retry_delay(e, attempt)
+                if status == 429:
+                    # Hold back every call to this model, not just this one
+                    limits.requests.block(delay)
+                metrics.inc("llm_retries_total", model=model, reason=status)
+                logger.warning(
+                    f"OpenAI {model} call failed (attempt {attempt + 1}/{self.max_retries + 1}): "
+                    f"{str(e)} - retrying in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            elapsed = time.perf_counter() - started
+            self._observe_headers(model, limits, raw.headers)
+            response = raw.parse()
+            metrics.inc("llm_requests_total", model=model, status=raw.status_code)
+            metrics.observe("llm_request_seconds", elapsed, model=model)
+
+            usage = getattr(response, "usage", None)
+            if usage is not None and getattr(usage, "prompt_tokens", None) is not None:
+                metrics.inc("llm_tokens_total", usage.prompt_tokens, model=model, kind="prompt")
+                metrics.inc("llm_tokens_total", usage.completion_tokens or 0, model=model, kind="completion")
+                # Settle the estimate against what the call really used
+                limits.tokens.give_back(tokens - usage.total_tokens)
+            return response
+
+    async def _acquire(self, model: str, limits: ModelLimits, tokens: int):
+        if not self.rate_limit_pacing:
+            return
+        async with limits.lock:
+            while True:
+                wait = max(limits.requests.wait_time(1), limits.tokens.wait_time(tokens))
+                if wait <= 0:
+                    break
+                metrics.inc("llm_rate_limit_wait_seconds_total", wait, model=model)
+                await asyncio.sleep(wait)
+            limits.requests.take(1)
+            limits.tokens.take(tokens)
+
+    def _observe_headers(self, model: str, limits: ModelLimits, headers: httpx.Headers):
+        for name, bucket in (("requests", limits.requests), ("tokens", limits.tokens)):
+            remaining = headers.get(f"x-ratelimit-remaining-{name}")
+            bucket.observe(
+                headers.get(f"x-ratelimit-limit-{name}"),
+                remaining,
+                headers.get(f"x-ratelimit-reset-{name}")
+            )
+            if remaining is not None and remaining.isdigit():
+                metrics.set("llm_rate_limit_remaining", float(remaining), model=model, limit=name)
+
+    @staticmethod
+    def _retryable(error: Exception) -> bool:
+        if not isinstance(error, APIStatusError):
+            return True
+        if error.status_code == 429 and getattr(error, "code", None) == "insufficient_quota":
+            return False  # billing, not rate - waiting won't help
+        return error.status_code in RETRY_STATUSES or error.status_code >= 500
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """Retry-After when the server sends one, else full-jitter exponential backoff"""
+        if isinstance(error, APIStatusError):
+            headers = error.response.headers
+            try:
+                if headers.get("retry-after-ms"):
+                    return min(self.retry_max_delay, float(headers["retry-after-ms"]) / 1000)
+                if headers.get("retry-after"):
+                    return min(self.retry_max_delay, float(headers["retry-after"]))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.retry_max_delay, self.retry_delay * 2 ** attempt))
+
+    @staticmethod
+    def _estimate_tokens(request: dict) -> int:
+        """Tokens a chat call counts against the limit: prompt estimate plus the completion budget"""
+        prompt = len(json.dumps(request.get("messages", []))) // CHARS_PER_TOKEN
+        completion = request.get("max_tokens") or request.get("max_completion_tokens") or COMPLETION_TOKEN_ESTIMATE
+        return prompt + completion
+
+
+llm_gateway = LLMGateway(
+    settings.openai_api_key,
+    max_connections=settings.llm_max_connections,
+    timeout=settings.llm_timeout_seconds,
+    max_retries=settings.llm_max_retries,
+    retry_delay=settings.llm_retry_delay,
+    retry_max_delay=settings.llm_retry_max_delay,
+    rate_limit_pacing=settings.llm_rate_limit_pacing,
+    requests_per_minute=settings.llm_requests_per_minute_by_model
+)
@@ -0,0 +1,62 @@
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from config import settings
+from database import db
+from services.compact_transcript import CompactTranscript
+from services.single_flight import SingleFlight
+
+# Seconds a loaded transcript is served before it is read again (a video deleted
+# and re-ingested through another process gets a new transcript)
+LOADED_TRANSCRIPT_TTL = 600.0
+
+
+class LoadedTranscriptCache:
+    """
+    Decompressed transcripts kept in memory for the transcript window API
+
+    A learn page fetches a window around the playhead and prefetches the next
+    ones, so one video's transcript is read many times in a row; it is loaded
+    and decompressed once (concurrent misses share one load) and the least
+    recently used transcripts are dropped beyond max_bytes.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, CompactTranscript]]" = OrderedDict()
+        self._size = 0
+        self._loads = SingleFlight()
+
+    async def get(self, video_id: str) -> Optional[CompactTranscript]:
+        """Transcript of a video, or None if none is stored"""
+        entry = self._entries.get(video_id)
+        if entry is not None and time.monotonic() - entry[0] < LOADED_TRANSCRIPT_TTL:
+            self._entries.move_to_end(video_id)
+            return entry[1]
+
+        transcript, _ = await self._loads.do(video_id, lambda: self._load(video_id))
+        return transcript
+
+    def put(self, video_id: str, transcript: CompactTranscript):
+        self.invalidate(video_id)
+        if transcript.nbytes > self.max_bytes:
+            return
+        self._entries[video_id] = (time.monotonic(), transcript)
+        self._size += transcript.nbytes
+        while self._size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._size -= evicted.nbytes
+
+    def invalidate(self, video_id: str):
+        entry = self._entries.pop(video_id, None)
+        if entry is not None:
+            self._size -= entry[1].nbytes
+
+    async def _load(self, video_id: str) -> Optional[CompactTranscript]:
+        transcript = await db.get_transcript(video_id)
+        if transcript is not None:
+            self.put(video_id, transcript)
+        return transcript
+
+
+loaded_transcripts = LoadedTranscriptCache(settings.transcript_memory_cache_mb * 1024 * 1024)
@@ -0,0 +1,73 @@
+from typing import Awaitable, Callable, Dict, Iterable, List, Tuple
+
+# (metric name, labels, value)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process metrics, rendered in the Prometheus text format
+
+    Counters and gauges are set directly by the code that owns them. Values
+    that live elsewhere (e.g. queue depth in the database) come from async
+    collectors that run on every scrape of /metrics.
+    """
+
+    def __init__(self):
+        self._types: Dict[str, str] = {}
+        self._help: Dict[str, str] = {}
+        self._values: Dict[str, Dict[Tuple, float]] = {}
+        self._collectors: List[Callable[[], Awaitable[Iterable[Sample]]]] = []
+
+    def describe(self, name: str, metric_type: str, help_text: str):
+        self._types[name] = metric_type
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels):
+        series = self._values.setdefault(name, {})
+        key = self._key(labels)
+        series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        self._values.setdefault(name, {})[self._key(labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record one observation as a summary (<name>_count and <name>_sum)"""
+        self.inc(f"{name}_count", 1, **labels)
+        self.inc(f"{name}_sum", value, **labels)
+
+    def register_collector(self, collector: Callable[[], Awaitable[Iterable[Sample]]]):
+        self._collectors.append(collector)
+
+    async def render(self) -> str:
+        samples: Dict[str, List[Tuple[Tuple, float]]] = {
+            name: list(series.items()) for name, series in self._values.items()
+        }
+        for collector in self._collectors:
+            for name, labels, value in await collector():
+                samples.setdefault(name, []).append((self._key(labels), value))
+
+        lines = []
+        for name in sorted(samples):
+            base = self._base_name(name)
+            if name == base or name.endswith("_count"):
+                if base in self._help:
+                    lines.append(f"# HELP {base} {self._help[base]}")
+                if base in self._types:
+                    lines.append(f"# TYPE {base} {self._types[base]}")
+            for key, value in samples[name]:
+                label_text = ",".join(f'{k}="{v}"' for k, v in key)
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def _base_name(self, name: str) -> str:
+        for suffix in ("_count", "_sum"):
+            if name.endswith(suffix) and self._types.get(name[:-len(suffix)]) == "summary":
+                return name[:-len(suffix)]
+        return name
+
+    def _key(self, labels: Dict[str, str]) -> Tuple:
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+metrics = MetricsRegistry()
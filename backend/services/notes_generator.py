@@ -1,13 +1,12 @@
 import os
-from openai import OpenAI
-import json
 from typing import Dict, List
 import uuid
-from config import settings
+from services.llm_cache import llm_cache
+from services.llm_gateway import llm_gateway
 
 class NotesGenerator:
     def __init__(self):
-        self.client = OpenAI(api_key=settings.openai_api_key)
+        self.llm = llm_gateway
 
     async def generate_notes(self, transcript_text: str, video_title: str) -> Dict:
         """
@@ -263,7 +262,8 @@ class NotesGenerator:
         )
 
         try:
-            response = self.client.chat.completions.create(
+            notes_data = await llm_cache.complete(
+                self.llm.chat,
                 model="gpt-4o",  # Upgraded from gpt-4o-mini for better quality
                 messages=[
                     {
@@ -279,8 +279,6 @@ class NotesGenerator:
                 response_format={"type": "json_object"}
             )
 
-            notes_data = json.loads(response.choices[0].message.content)
-
             # Add unique ID
             notes_data['notes_id'] = str(uuid.uuid4())
 
@@ -0,0 +1,145 @@
+import asyncio
+import os
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set
+import httpx
+from realtime import AsyncRealtimeClient
+from config import settings
+from logging_config import get_logger
+from services.status_cache import STATUS_DEFAULTS, video_status_cache
+
+logger = get_logger(__name__)
+
+# Realtime broadcast event name used for every progress message
+PROGRESS_EVENT = "progress"
+
+
+class ProgressBroker:
+    """
+    Push channel for video processing progress
+
+    The ingestion pipeline publishes stage changes, batch progress and newly
+    stored flashcards; learn pages subscribe over SSE. Delivery is in-memory
+    within a process. Status events also refresh the status cache.
+
+    Ingestion workers usually run in another process, so every event is also
+    relayed through a Supabase Realtime broadcast channel per video, which API
+    processes join while they have subscribers. Neither path touches the
+    database, so open learn pages add no DB load while a video processes.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._origin = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._relay_enabled = settings.progress_realtime_relay
+        self._http: Optional[httpx.AsyncClient] = None
+        self._realtime: Optional[AsyncRealtimeClient] = None
+        self._realtime_lock = asyncio.Lock()
+        self._channels: Dict[str, object] = {}
+
+    # -------------------------
+    # Publishing
+    # -------------------------
+
+    async def publish(self, video_id: str, event: Dict):
+        """Deliver an event to local subscribers and relay it to other processes"""
+        self._deliver(video_id, event)
+
+        if self._relay_enabled:
+            try:
+                await self._broadcast(video_id, event)
+            except Exception as e:
+                # Progress is best-effort; never fail ingestion because of it
+                logger.warning(f"Progress relay failed for video {video_id}: {str(e)}")
+
+    def _deliver(self, video_id: str, event: Dict):
+        if event.get("type") == "status":
+            video_status_cache.put(video_id, {key: event[key] for key in STATUS_DEFAULTS if key in event})
+
+        for queue in self._subscribers.get(video_id, ()):
+            queue.put_nowait(event)
+
+    async def _broadcast(self, video_id: str, event: Dict):
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=5.0)
+
+        response = await self._http.post(
+            f"{settings.supabase_url}/realtime/v1/api/broadcast",
+            headers={
+                "apikey": settings.supabase_service_role_key,
+                "Authorization": f"Bearer {settings.supabase_service_role_key}",
+            },
+            json={
+                "messages": [{
+                    "topic": self._topic(video_id),
+                    "event": PROGRESS_EVENT,
+                    "payload": {**event, "origin": self._origin},
+                }]
+            },
+        )
+        # A rejected broadcast (401, 429, ...) is a failed relay too
+        response.raise_for_status()
+
+    # -------------------------
+    # Subscribing
+    # -------------------------
+
+    @asynccontextmanager
+    async def subscribe(self, video_id: str) -> AsyncIterator[asyncio.Queue]:
+        """Receive progress events for a video until the context exits"""
+        queue: asyncio.Queue = asyncio.Queue()
+        subscribers = self._subscribers.setdefault(video_id, set())
+        first_subscriber = not subscribers
+        subscribers.add(queue)
+
+        if first_subscriber and self._relay_enabled:
+            await self._join_channel(video_id)
+
+        try:
+            yield queue
+        finally:
+            subscribers.discard(queue)
+            if not subscribers:
+                self._subscribers.pop(video_id, None)
+                if self._relay_enabled:
+                    await self._leave_channel(video_id)
+
+    async def _join_channel(self, video_id: str):
+        try:
+            async with self._realtime_lock:
+                if self._realtime is None or not self._realtime.is_connected:
+                    self._realtime = AsyncRealtimeClient(
+                        f"{settings.supabase_url}/realtime/v1",
+                        token=settings.supabase_service_role_key
+                    )
+                    await self._realtime.connect()
+
+            def on_progress(message):
+                event = dict(message.get("payload") or {})
+                # Events published by this process were already delivered locally
+                if event.pop("origin", None) != self._origin:
+                    self._deliver(video_id, event)
+
+            channel = self._realtime.channel(self._topic(video_id))
+            channel.on_broadcast(PROGRESS_EVENT, on_progress)
+            await channel.subscribe()
+            self._channels[video_id] = channel
+        except Exception as e:
+            logger.warning(f"Could not join progress channel for video {video_id}: {str(e)}")
+
+    async def _leave_channel(self, video_id: str):
+        channel = self._channels.pop(video_id, None)
+        if channel is None:
+            return
+        try:
+            await self._realtime.remove_channel(channel)
+        except Exception as e:
+            logger.warning(f"Could not leave progress channel for video {video_id}: {str(e)}")
+
+    def _topic(self, video_id: str) -> str:
+        return f"video-progress:{video_id}"
+
+
+progress_broker = ProgressBroker()
@@ -1,70 +1,27 @@
-from openai import OpenAI
 from config import settings
-from typing import List
+from typing import Dict, List, Optional
 from models import Question, VideoSegment, FlashCard
+from services.llm_cache import llm_cache
+from services.llm_gateway import llm_gateway
+from services.metrics import metrics
+from logging_config import get_logger
+import asyncio
 import json
 import uuid
 
+logger = get_logger(__name__)
 
-class QuestionGenerator:
-    def __init__(self):
-        self.client = OpenAI(api_key=settings.openai_api_key)
-
-    async def generate_questions_for_segment(
-        self,
-        segment: VideoSegment,
-        num_questions: int = 1,
-        context_segments: List[VideoSegment] = None,
-        video_title: str = None,
-        focus_areas: dict = None
-    ) -> List[Question]:
-        """
-        Generate high-quality questions based on a video segment with surrounding context
-
-        If focus_areas is provided (user performance data), generates questions that:
-        - Target topics where the user struggled in flashcards
-        - Reinforce weak areas from previous quizzes
-        - Are slightly more challenging to help improve weak knowledge areas
-        """
-
-        # Build context from surrounding segments
-        context_text = ""
-        if context_segments:
-            context_text = "\n\nSurrounding Context:\n"
-            for ctx_seg in context_segments:
-                context_text += f"- {ctx_seg.text[:100]}...\n"
-
-        video_context = f"\nVideo Title: {video_title}\n" if video_title else ""
-
-        # Add adaptive learning context if performance data is available
-        adaptive_context = ""
-        if focus_areas and focus_areas.get('has_previous_data'):
-            video_accuracy = focus_areas.get('video_accuracy', 0)
-            weak_count = len(focus_areas.get('weak_flashcard_questions', [])) + len(focus_areas.get('weak_quiz_questions', []))
-
-            adaptive_context = f"""
-
-ADAPTIVE LEARNING MODE:
-The learner has previously studied this content with {video_accuracy}% accuracy.
-They struggled with {weak_count} topics. Generate questions that:
-1. Reinforce concepts they found challenging
-2. Are slightly more challenging than basic recall
-3. Help identify and address remaining knowledge gaps
-4. Focus on deeper understanding of core concepts
+metrics.describe("question_generation_requests_total", "counter", "Question generation OpenAI requests, per mode")
+metrics.describe("question_generation_fallbacks_total", "counter", "Segments that got a fallback question, per mode")
 
-Adjust difficulty to "medium" or "hard" to challenge the learner appropriately.
-"""
+SYSTEM_PROMPT = (
+    "You are an expert educational assessment designer who creates thought-provoking questions "
+    "that test deep understanding, not surface-level memorization. You follow Bloom's Taxonomy "
+    "and create questions at the 'Understand' and 'Apply' cognitive levels."
+)
 
-        prompt = f"""
-You are an expert educational assessment designer. Generate {num_questions} high-quality multiple-choice question(s)
-that test UNDERSTANDING and APPLICATION, not just memorization.{adaptive_context}
-
-{video_context}{context_text}
-
-Target Segment (Time: {self._format_time(segment.start_time)} - {self._format_time(segment.end_time)}):
-{segment.text}
-
-CRITICAL QUALITY CRITERIA:
+# Instruction block shared by the per-segment and the batched prompts
+QUALITY_GUIDELINES = """CRITICAL QUALITY CRITERIA:
 
 1. COGNITIVE DEPTH (Bloom's Taxonomy):
    - Focus on "Understand" and "Apply" levels
@@ -93,7 +50,7 @@ CRITICAL QUALITY CRITERIA:
 EXAMPLES OF QUALITY:
 
 GOOD Question:
-{{
+{
   "question_text": "Based on the explanation, why is recursion more suitable than iteration for this problem?",
   "options": [
     "It naturally handles the tree-like structure of the data",
@@ -104,17 +61,116 @@ GOOD Question:
   "correct_answer": 0,
   "explanation": "Recursion is ideal here because the problem has a tree-like structure where each node requires the same operation. While recursion typically uses more memory (not less), it provides cleaner code for hierarchical data.",
   "difficulty": "medium"
-}}
+}
 
 BAD Question (DON'T DO THIS):
-{{
+{
   "question_text": "What word did the speaker use at 2:30?",
   "options": ["recursion", "iteration", "algorithm", "function"],
   "correct_answer": 0,
   "explanation": "The speaker said recursion",
   "difficulty": "easy"
-}}
-^ BAD because: Tests memorization, not understanding. Too trivial.
+}
+^ BAD because: Tests memorization, not understanding. Too trivial."""
+
+QUESTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "question_text": {"type": "string"},
+        "options": {"type": "array", "items": {"type": "string"}},
+        "correct_answer": {"type": "integer"},
+        "explanation": {"type": "string"},
+        "difficulty": {"type": "string", "enum": ["easy", "medium", "hard"]},
+    },
+    "required": ["question_text", "options", "correct_answer", "explanation", "difficulty"],
+    "additionalProperties": False,
+}
+
+# Structured output of a batched request: questions keyed by the segment index given in the prompt
+BATCH_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "segment_questions",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "segments": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "segment_index": {"type": "integer"},
+                            "questions": {"type": "array", "items": QUESTION_SCHEMA},
+                        },
+                        "required": ["segment_index", "questions"],
+                        "additionalProperties": False,
+                    },
+                },
+            },
+            "required": ["segments"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+
+class QuestionGenerator:
+    def __init__(self):
+        self.llm = llm_gateway
+        # Bounds the OpenAI calls in flight; segments are generated concurrently up to it
+        self._calls = asyncio.Semaphore(max(1, settings.question_generation_concurrency))
+        # Segments sent per request by generate_questions_for_segments (1 = one request per segment)
+        self.batch_size = max(1, settings.question_batch_size)
+
+    async def generate_questions_for_segment(
+        self,
+        segment: VideoSegment,
+        num_questions: int = 1,
+        context_segments: List[VideoSegment] = None,
+        video_title: str = None,
+        focus_areas: dict = None,
+        mixed_difficulty: bool = False,
+        fallback: bool = True,
+        refresh: bool = False
+    ) -> List[Question]:
+        """
+        Generate high-quality questions based on a video segment with surrounding context
+
+        If focus_areas is provided (user performance data), generates questions that:
+        - Target topics where the user struggled in flashcards
+        - Reinforce weak areas from previous quizzes
+        - Are slightly more challenging to help improve weak knowledge areas
+
+        mixed_difficulty spreads the questions across easy, medium and hard.
+        With fallback=False a failed generation returns no questions instead
+        of a fallback question. refresh bypasses the LLM cache, for new
+        questions on a prompt that was answered before.
+        """
+
+        # Build context from surrounding segments
+        context_text = ""
+        if context_segments:
+            context_text = "\n\nSurrounding Context:\n"
+            for ctx_seg in context_segments:
+                context_text += f"- {ctx_seg.text[:100]}...\n"
+
+        video_context = f"\nVideo Title: {video_title}\n" if video_title else ""
+
+        # Add adaptive learning context if performance data is available
+        adaptive_context = self._adaptive_context(focus_areas)
+        difficulty_context = self._difficulty_context(mixed_difficulty)
+
+        prompt = f"""
+You are an expert educational assessment designer. Generate {num_questions} high-quality multiple-choice question(s)
+that test UNDERSTANDING and APPLICATION, not just memorization.{adaptive_context}{difficulty_context}
+
+{video_context}{context_text}
+
+Target Segment (Time: {self._format_time(segment.start_time)} - {self._format_time(segment.end_time)}):
+{segment.text}
+
+{QUALITY_GUIDELINES}
 
 FORMAT your response as a JSON array:
 [
@@ -130,27 +186,7 @@ FORMAT your response as a JSON array:
 Generate {num_questions} question(s) that meet ALL quality criteria above.
 """
 
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",  # Better quality than mini
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert educational assessment designer who creates thought-provoking questions "
-                                 "that test deep understanding, not surface-level memorization. You follow Bloom's Taxonomy "
-                                 "and create questions at the 'Understand' and 'Apply' cognitive levels."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.5,  # Lower for more consistent quality
-                response_format={"type": "json_object"}
-            )
-
-            # Parse response
-            content = response.choices[0].message.content
+        def parse(content: str) -> List[Question]:
             questions_data = json.loads(content)
 
             # Handle both array and object responses
@@ -175,35 +211,208 @@ Generate {num_questions} question(s) that meet ALL quality criteria above.
 
             return questions
 
+        try:
+            metrics.inc("question_generation_requests_total", mode="segment")
+            async with self._calls:
+                # Parsed inside the cache, so only a usable answer is cached
+                return await llm_cache.complete(
+                    self.llm.chat,
+                    parse=parse,
+                    refresh=refresh,
+                    model="gpt-4o",  # Better quality than mini
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": SYSTEM_PROMPT
+                        },
+                        {
+                            "role": "user",
+                            "content": prompt
+                        }
+                    ],
+                    temperature=0.5,  # Lower for more consistent quality
+                    response_format={"type": "json_object"}
+                )
+
         except Exception as e:
-            # Fallback question if generation fails
+            # Fallback question if generation fails (transient API errors were already retried)
+            logger.warning(f"Question generation failed for segment at {segment.start_time}s: {str(e)}")
+            if not fallback:
+                return []
+            metrics.inc("question_generation_fallbacks_total", mode="segment")
             return [self._create_fallback_question(segment)]
 
+    async def generate_questions_for_segments(
+        self,
+        segments: List[VideoSegment],
+        num_questions: int = 1,
+        video_title: str = None,
+        focus_areas: dict = None,
+        mixed_difficulty: bool = False,
+        fallback: bool = True,
+        indexes: List[int] = None,
+        refresh: bool = False
+    ) -> List[List[Question]]:
+        """
+        Generate questions for every segment of a video, batch_size segments per request
+
+        A batched request sends the instruction block once for several segments
+        and gets the questions back keyed by segment index (structured output).
+        Segments whose questions are missing or malformed are retried - only
+        those - up to question_batch_retries times, then get a fallback question
+        (or none, with fallback=False).
+
+        indexes limits generation to those segments; the others still serve as
+        their surrounding context. refresh bypasses the LLM cache.
+
+        Returns the questions of each generated segment in order (segments[i]
+        at index i when all are generated).
+        """
+        targets = list(range(len(segments))) if indexes is None else list(indexes)
+        if self.batch_size == 1:
+            return list(await asyncio.gather(*(
+                self.generate_questions_for_segment(
+                    segments[i],
+                    num_questions=num_questions,
+                    context_segments=self._context_segments(segments, i),
+                    video_title=video_title,
+                    focus_areas=focus_areas,
+                    mixed_difficulty=mixed_difficulty,
+                    fallback=fallback,
+                    refresh=refresh
+                )
+                for i in targets
+            )))
+
+        results: Dict[int, List[Question]] = {i: [] for i in targets}
+        pending = list(targets)
+        for attempt in range(settings.question_batch_retries + 1):
+            if attempt:
+                logger.warning(f"Retrying question generation for {len(pending)} segment(s) with malformed output")
+            batches = [pending[i:i + self.batch_size] for i in range(0, len(pending), self.batch_size)]
+            answers = await asyncio.gather(*(
+                self._generate_batch(
+                    segments, batch, num_questions, video_title, focus_areas,
+                    mixed_difficulty=mixed_difficulty, refresh=refresh or attempt > 0
+                )
+                for batch in batches
+            ))
+            for answer in answers:
+                for index, questions in answer.items():
+                    results[index] = questions
+            pending = [i for i in pending if not results[i]]
+            if not pending:
+                break
+
+        if fallback:
+            for index in pending:
+                metrics.inc("question_generation_fallbacks_total", mode="batch")
+                results[index] = [self._create_fallback_question(segments[index])]
+        return [results[i] for i in targets]
+
+    async def _generate_batch(
+        self,
+        segments: List[VideoSegment],
+        indexes: List[int],
+        num_questions: int,
+        video_title: Optional[str],
+        focus_areas: Optional[dict],
+        mixed_difficulty: bool = False,
+        refresh: bool = False
+    ) -> Dict[int, List[Question]]:
+        """
+        One request for segments[i] of every i in indexes; returns the well-formed results by index
+
+        refresh bypasses the LLM cache (retries of malformed output, fresh questions).
+        """
+        # Surrounding context: neighbours of the batch that aren't in it
+        batch = set(indexes)
+        neighbours = sorted({n for i in indexes for n in (i - 1, i + 1) if 0 <= n < len(segments)} - batch)
+        context_text = ""
+        if neighbours:
+            context_text = "\n\nSurrounding Context:\n"
+            for n in neighbours:
+                context_text += f"- {segments[n].text[:100]}...\n"
+
+        video_context = f"\nVideo Title: {video_title}\n" if video_title else ""
+        adaptive_context = self._adaptive_context(focus_areas)
+        difficulty_context = self._difficulty_context(mixed_difficulty)
+
+        target_text = "\n\n".join(
+            f"### Segment {i} (Time: {self._format_time(segments[i].start_time)} - {self._format_time(segments[i].end_time)}):\n"
+            f"{segments[i].text}"
+            for i in indexes
+        )
+
+        prompt = f"""
+You are an expert educational assessment designer. For EACH of the {len(indexes)} target segments below, generate
+{num_questions} high-quality multiple-choice question(s) that test UNDERSTANDING and APPLICATION, not just memorization.{adaptive_context}{difficulty_context}
+
+{video_context}{context_text}
+
+Target Segments:
+
+{target_text}
+
+{QUALITY_GUIDELINES}
+
+Each question has exactly 4 options; correct_answer is the index (0-3) of the right one.
+Return one entry per target segment, with segment_index set to the number after "### Segment".
+Generate {num_questions} question(s) per segment that meet ALL quality criteria above.
+"""
+
+        try:
+            metrics.inc("question_generation_requests_total", mode="batch")
+            async with self._calls:
+                data = await llm_cache.complete(
+                    self.llm.chat,
+                    refresh=refresh,
+                    model="gpt-4o",
+                    messages=[
+                        {"role": "system", "content": SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt}
+                    ],
+                    temperature=0.5,
+                    response_format=BATCH_RESPONSE_FORMAT
+                )
+            entries = data["segments"]
+        except Exception as e:
+            logger.warning(f"Batched question generation failed for segments {indexes}: {str(e)}")
+            return {}
+
+        answer = {}
+        for entry in entries if isinstance(entries, list) else []:
+            index = entry.get("segment_index") if isinstance(entry, dict) else None
+            if index not in batch or index in answer:
+                continue
+            questions = [
+                question
+                for question in (self._parse_question(q_data, segments[index]) for q_data in entry.get("questions") or [])
+                if question is not None
+            ]
+            if questions:
+                answer[index] = questions[:num_questions]
+        return answer
+
     async def generate_flashcards(
         self,
         segments: List[VideoSegment],
         interval: int = 120,
         video_title: str = None
     ) -> List[FlashCard]:
-        """Generate flashcards for video segments with context"""
+        """
+        Generate flashcards for video segments with context
 
-        flashcards = []
-        for i, segment in enumerate(segments):
-            # Get surrounding context (previous and next segments)
-            context_segments = []
-            if i > 0:
-                context_segments.append(segments[i - 1])  # Previous segment
-            if i < len(segments) - 1:
-                context_segments.append(segments[i + 1])  # Next segment
-
-            # Generate one high-quality question per segment
-            questions = await self.generate_questions_for_segment(
-                segment,
-                num_questions=1,
-                context_segments=context_segments,
-                video_title=video_title
-            )
+        All segments are generated concurrently (bounded by
+        question_generation_concurrency), question_batch_size segments per
+        request; flashcards keep segment order.
+        """
 
+        # Generate one high-quality question per segment
+        results = await self.generate_questions_for_segments(segments, num_questions=1, video_title=video_title)
+
+        flashcards = []
+        for segment, questions in zip(segments, results):
             if questions:
                 # Show flashcard at the end of each segment
                 flashcard = FlashCard(
@@ -254,34 +463,26 @@ Generate {num_questions} question(s) that meet ALL quality criteria above.
                 # For now, still use all segments but with performance context
                 questions_per_segment = max(1, weak_area_questions // len(segments))
 
-                for i, segment in enumerate(segments):
-                    context_segments = []
-                    if i > 0:
-                        context_segments.append(segments[i - 1])
-                    if i < len(segments) - 1:
-                        context_segments.append(segments[i + 1])
-
-                    # Pass performance data to make questions more challenging on weak areas
-                    questions = await self.generate_questions_for_segment(
-                        segment,
-                        num_questions=questions_per_segment,
-                        context_segments=context_segments,
-                        video_title=video_title,
-                        focus_areas=performance_analysis  # Tell AI to focus on user's weak areas
-                    )
+                # Pass performance data to make questions more challenging on weak areas
+                results = await self.generate_questions_for_segments(
+                    segments,
+                    num_questions=questions_per_segment,
+                    video_title=video_title,
+                    focus_areas=performance_analysis  # Tell AI to focus on user's weak areas
+                )
+                for questions in results:
                     all_questions.extend(questions)
 
             # Add some review questions for comprehensive coverage
             if review_questions > 0 and len(all_questions) < num_questions:
                 remaining = num_questions - len(all_questions)
-                for segment in segments[:remaining]:
-                    question = await self.generate_questions_for_segment(
-                        segment,
-                        num_questions=1,
-                        context_segments=[],
-                        video_title=video_title
-                    )
-                    all_questions.extend(question)
+                results = await self.generate_questions_for_segments(
+                    segments[:remaining],
+                    num_questions=1,
+                    video_title=video_title
+                )
+                for questions in results:
+                    all_questions.extend(questions)
 
             return all_questions[:num_questions]
 
@@ -290,25 +491,81 @@ Generate {num_questions} question(s) that meet ALL quality criteria above.
             questions_per_segment = max(1, num_questions // len(segments))
             all_questions = []
 
-            for i, segment in enumerate(segments):
-                # Get surrounding context
-                context_segments = []
-                if i > 0:
-                    context_segments.append(segments[i - 1])
-                if i < len(segments) - 1:
-                    context_segments.append(segments[i + 1])
-
-                questions = await self.generate_questions_for_segment(
-                    segment,
-                    num_questions=questions_per_segment,
-                    context_segments=context_segments,
-                    video_title=video_title
-                )
+            results = await self.generate_questions_for_segments(
+                segments,
+                num_questions=questions_per_segment,
+                video_title=video_title
+            )
+            for questions in results:
                 all_questions.extend(questions)
 
             # Return exactly num_questions
             return all_questions[:num_questions]
 
+    def _adaptive_context(self, focus_areas: Optional[dict]) -> str:
+        """Prompt section asking for harder questions on the learner's weak areas"""
+        if not (focus_areas and focus_areas.get('has_previous_data')):
+            return ""
+
+        video_accuracy = focus_areas.get('video_accuracy', 0)
+        weak_count = len(focus_areas.get('weak_flashcard_questions', [])) + len(focus_areas.get('weak_quiz_questions', []))
+
+        return f"""
+
+ADAPTIVE LEARNING MODE:
+The learner has previously studied this content with {video_accuracy}% accuracy.
+They struggled with {weak_count} topics. Generate questions that:
+1. Reinforce concepts they found challenging
+2. Are slightly more challenging than basic recall
+3. Help identify and address remaining knowledge gaps
+4. Focus on deeper understanding of core concepts
+
+Adjust difficulty to "medium" or "hard" to challenge the learner appropriately.
+"""
+
+    def _difficulty_context(self, mixed_difficulty: bool) -> str:
+        """Prompt section spreading each segment's questions across difficulty levels"""
+        if not mixed_difficulty:
+            return ""
+
+        return """
+
+DIFFICULTY MIX:
+Spread each segment's questions across difficulty levels, cycling "easy", "medium", "hard",
+and set "difficulty" to the level of each question:
+- easy: checks that a key idea of the segment was understood
+- medium: applies an idea to a new example or situation
+- hard: connects several ideas or analyses a subtle consequence
+"""
+
+    def _parse_question(self, q_data: dict, segment: VideoSegment) -> Optional[Question]:
+        """Question from one generated item, or None if the item is malformed"""
+        try:
+            options = q_data['options']
+            correct_answer = q_data['correct_answer']
+            if not isinstance(options, list) or len(options) < 2 or not 0 <= correct_answer < len(options):
+                return None
+            return Question(
+                id=str(uuid.uuid4()),
+                question_text=q_data['question_text'],
+                options=options,
+                correct_answer=correct_answer,
+                explanation=q_data['explanation'],
+                difficulty=q_data.get('difficulty', 'medium'),
+                video_segment=segment
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def _context_segments(self, segments: List[VideoSegment], index: int) -> List[VideoSegment]:
+        """Surrounding context of a segment (previous and next segments)"""
+        context_segments = []
+        if index > 0:
+            context_segments.append(segments[index - 1])  # Previous segment
+        if index < len(segments) - 1:
+            context_segments.append(segments[index + 1])  # Next segment
+        return context_segments
+
     def _create_fallback_question(self, segment: VideoSegment) -> Question:
         """Create a fallback question if generation fails"""
         return Question(
@@ -0,0 +1,256 @@
+import asyncio
+import json
+import math
+import random
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Set
+from config import settings
+from database import db
+from models import Question, VideoSegment
+from services.admission import generation_limiter
+from services.metrics import metrics
+from services.question_generator import question_generator
+from services.single_flight import SingleFlight
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+DIFFICULTIES = ("easy", "medium", "hard")
+# Extra weight of a segment per weak question about it, scaled by how far below 100% it was answered
+WEAK_SEGMENT_BOOST = 4.0
+# Adaptive quizzes lean towards harder questions
+ADAPTIVE_DIFFICULTY_WEIGHTS = {"easy": 0.5, "medium": 1.0, "hard": 1.5}
+# The pool is topped up once fewer fresh questions than this many quizzes need are left
+TOP_UP_QUIZZES_AHEAD = 2
+
+metrics.describe("question_pool_quizzes_total", "counter", "Quizzes assembled, per source (pool, generated)")
+metrics.describe("question_pool_questions_generated_total", "counter", "Questions generated into video question pools")
+
+
+class QuestionPool:
+    """
+    Per-video pool of pre-generated quiz questions
+
+    Ingestion fills the pool with per_segment questions per transcript segment
+    at varied difficulty, and quizzes are assembled from it by weighted
+    sampling without an LLM call: questions served in fewer quizzes are
+    preferred, and in adaptive mode so are the segments behind the learner's
+    weak questions. Once a question has been in max_serves quizzes it is only
+    used when nothing fresher is left, and a pool running out of fresh
+    questions is topped up in the background.
+    """
+
+    def __init__(self, per_segment: int, max_serves: int):
+        self.per_segment = per_segment
+        self.max_serves = max(1, max_serves)
+        self._builds = SingleFlight()
+        self._top_ups: Set[asyncio.Task] = set()
+        self._random = random.Random()
+
+    @property
+    def enabled(self) -> bool:
+        return self.per_segment > 0
+
+    async def build(self, video_id: str, segments: List[VideoSegment], video_title: str = None) -> int:
+        """
+        Generate questions for the segments with fewer than per_segment fresh ones
+
+        Concurrent builds of one video share a single run. Returns the number
+        of questions added.
+        """
+        if not self.enabled or not segments:
+            return 0
+        added, _ = await self._builds.do(video_id, lambda: self._build(video_id, segments, video_title))
+        return added
+
+    async def assemble(
+        self,
+        video_id: str,
+        segments: List[VideoSegment],
+        num_questions: int,
+        performance_analysis: dict = None,
+        video_title: str = None
+    ) -> Optional[List[Question]]:
+        """
+        Sample a quiz of num_questions from the pool, in segment order
+
+        Returns None when the pool can't fill the quiz yet; the caller then
+        generates it, and should schedule_top_up() so the next one is sampled.
+        """
+        if not self.enabled:
+            return None
+        rows = await db.get_question_pool(video_id)
+        if len(rows) < num_questions:
+            return None
+
+        fresh = [row for row in rows if row["times_served"] < self.max_serves]
+        candidates = fresh if len(fresh) >= num_questions else rows
+
+        segment_weights = await self._segment_weights(video_id, segments, rows, performance_analysis)
+        difficulty_weights = ADAPTIVE_DIFFICULTY_WEIGHTS if segment_weights else {}
+        picked = self._sample(candidates, num_questions, segment_weights, difficulty_weights)
+
+        served = {row["id"] for row in picked}
+        await db.mark_pool_questions_served(list(served))
+        metrics.inc("question_pool_quizzes_total", source="pool")
+
+        fresh_left = sum(1 for row in fresh if row["id"] not in served or row["times_served"] + 1 < self.max_serves)
+        covered = len({row["segment_index"] for row in rows})
+        if fresh_left < num_questions * TOP_UP_QUIZZES_AHEAD or covered < len(segments):
+            self.schedule_top_up(video_id, segments, video_title)
+
+        return [Question(**_question_data(row)) for row in picked]
+
+    def schedule_top_up(self, video_id: str, segments: List[VideoSegment], video_title: str = None):
+        """Build the pool of a video in the background, unless a build is already running here"""
+        if not self.enabled or not segments or self._builds.in_flight(video_id):
+            return
+        task = asyncio.create_task(self._top_up(video_id, segments, video_title))
+        self._top_ups.add(task)
+        task.add_done_callback(self._top_ups.discard)
+
+    async def _top_up(self, video_id: str, segments: List[VideoSegment], video_title: Optional[str]):
+        try:
+            added = await self.build(video_id, segments, video_title)
+            if added:
+                logger.info(f"Topped up question pool of video {video_id} with {added} questions")
+        except Exception as e:
+            logger.warning(f"Question pool top-up failed for video {video_id}: {str(e)}")
+
+    async def _build(self, video_id: str, segments: List[VideoSegment], video_title: Optional[str]) -> int:
+        rows = await db.get_question_pool(video_id)
+        fresh = Counter(row["segment_index"] for row in rows if row["times_served"] < self.max_serves)
+
+        # Segments grouped by how many fresh questions they are short of
+        deficits: Dict[int, List[int]] = defaultdict(list)
+        for i in range(len(segments)):
+            if fresh[i] < self.per_segment:
+                deficits[self.per_segment - fresh[i]].append(i)
+        if not deficits:
+            return 0
+
+        logger.info(
+            f"Generating pool questions for {sum(len(group) for group in deficits.values())} segments of video {video_id}"
+        )
+        # The whole transcript goes along so each segment keeps its real neighbours as
+        # context; refresh, since a top-up resends prompts whose answers are pooled already
+        async with generation_limiter:
+            results = await asyncio.gather(*(
+                question_generator.generate_questions_for_segments(
+                    segments,
+                    num_questions=count,
+                    video_title=video_title,
+                    mixed_difficulty=True,
+                    fallback=False,
+                    indexes=group,
+                    refresh=True
+                )
+                for count, group in deficits.items()
+            ))
+
+        questions = []
+        generated_by_segment = (
+            (index, generated)
+            for group, group_results in zip(deficits.values(), results)
+            for index, generated in zip(group, group_results)
+        )
+        for index, generated in generated_by_segment:
+            for question in generated:
+                if question.difficulty not in DIFFICULTIES:
+                    question.difficulty = "medium"
+                questions.append({
+                    "id": question.id,
+                    "segment_index": index,
+                    "difficulty": question.difficulty,
+                    "question_data": question.dict(),
+                })
+
+        if questions:
+            await db.store_pool_questions(video_id, questions)
+            metrics.inc("question_pool_questions_generated_total", len(questions))
+        return len(questions)
+
+    async def _segment_weights(
+        self,
+        video_id: str,
+        segments: List[VideoSegment],
+        rows: List[Dict],
+        performance_analysis: Optional[dict]
+    ) -> Dict[int, float]:
+        """Sampling weight of the segments behind weak questions (others weigh 1)"""
+        if not performance_analysis:
+            return {}
+        weak = {
+            item["question_id"]: item["accuracy"]
+            for item in performance_analysis.get("weak_flashcard_questions", [])
+            + performance_analysis.get("weak_quiz_questions", [])
+        }
+        if not weak:
+            return {}
+
+        # Pooled questions know their segment; flashcards (and quiz questions
+        # generated before the pool) are placed by their segment's start time
+        segment_of = {row["id"]: row["segment_index"] for row in rows if row["id"] in weak}
+        if len(segment_of) < len(weak) and segments:
+            starts = [segment.start_time for segment in segments]
+            for row in await db.get_questions(video_id):
+                data = _question_data(row)
+                start_time = (data.get("video_segment") or {}).get("start_time")
+                if data.get("id") in weak and start_time is not None:
+                    segment_of[data["id"]] = max(0, bisect_right(starts, start_time) - 1)
+
+        weights: Dict[int, float] = {}
+        for question_id, index in segment_of.items():
+            weights[index] = weights.get(index, 1.0) + WEAK_SEGMENT_BOOST * (1 - weak[question_id] / 100)
+        return weights
+
+    def _sample(
+        self,
+        rows: List[Dict],
+        num_questions: int,
+        segment_weights: Dict[int, float],
+        difficulty_weights: Dict[str, float]
+    ) -> List[Dict]:
+        """
+        Weighted sample without replacement (Efraimidis-Spirakis keys)
+
+        Every segment weighs the same however many questions it has pooled,
+        times its segment weight; a question's share shrinks with each quiz it
+        was in. Each segment gives at most its fair share of the quiz (scaled
+        by its weight) until the quiz can't be filled otherwise.
+        """
+        pooled = Counter(row["segment_index"] for row in rows)
+
+        def weight(row: Dict) -> float:
+            index = row["segment_index"]
+            return (
+                segment_weights.get(index, 1.0) / pooled[index]
+                * difficulty_weights.get(row["difficulty"], 1.0)
+                / (1 + row["times_served"])
+            )
+
+        ranked = sorted(rows, key=lambda row: self._random.random() ** (1 / weight(row)), reverse=True)
+
+        fair_share = num_questions / len(pooled)
+        taken: Counter = Counter()
+        picked, rest = [], []
+        for row in ranked:
+            index = row["segment_index"]
+            if len(picked) < num_questions and taken[index] < math.ceil(fair_share * segment_weights.get(index, 1.0)):
+                picked.append(row)
+                taken[index] += 1
+            else:
+                rest.append(row)
+        picked += rest[:num_questions - len(picked)]
+
+        return sorted(picked, key=lambda row: (row["segment_index"], DIFFICULTIES.index(row["difficulty"])))
+
+
+def _question_data(row: Dict) -> Dict:
+    # Flashcards are stored as JSON text inside JSONB, pooled questions as objects
+    data = row["question_data"]
+    return json.loads(data) if isinstance(data, str) else data
+
+
+question_pool = QuestionPool(settings.question_pool_per_segment, settings.question_pool_max_serves)
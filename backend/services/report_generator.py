@@ -2,15 +2,15 @@ from typing import List, Dict, Optional
 import re
 from collections import Counter
 import uuid
-from openai import OpenAI
-from config import settings
+from services.llm_cache import llm_cache
+from services.llm_gateway import llm_gateway
 import json
 import asyncio
 
 
 class ReportGenerator:
     def __init__(self):
-        self.client = OpenAI(api_key=settings.openai_api_key)
+        self.llm = llm_gateway
         # Common stop words to filter out
         self.stop_words = {
             'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
@@ -65,7 +65,8 @@ Focus on:
 """
 
         try:
-            response = self.client.chat.completions.create(
+            result = await llm_cache.complete(
+                self.llm.chat,
                 model="gpt-4o-mini",
                 messages=[
                     {
@@ -81,8 +82,6 @@ Focus on:
                 response_format={"type": "json_object"}
             )
 
-            result = json.loads(response.choices[0].message.content)
-
             # Ensure keywords are in the right format
             if 'keywords' in result and isinstance(result['keywords'], dict):
                 # Normalize scores to be between 20 and 100 for better word cloud visualization
@@ -347,7 +346,8 @@ IMPORTANT:
 """
 
         try:
-            response = self.client.chat.completions.create(
+            analysis = await llm_cache.complete(
+                self.llm.chat,
                 model="gpt-4o-mini",
                 messages=[
                     {
@@ -363,8 +363,6 @@ IMPORTANT:
                 response_format={"type": "json_object"}
             )
 
-            analysis = json.loads(response.choices[0].message.content)
-
             # Calculate mastery levels based on performance
             mastery_analysis = self._calculate_mastery_levels(attempts_data, questions_data)
             analysis['mastery_analysis'] = mastery_analysis
@@ -528,7 +526,8 @@ Mark topics they've covered as "completed" or "in_progress" based on weak areas.
 """
 
         try:
-            response = self.client.chat.completions.create(
+            path = await llm_cache.complete(
+                self.llm.chat,
                 model="gpt-4o-mini",
                 messages=[
                     {
@@ -543,8 +542,6 @@ Mark topics they've covered as "completed" or "in_progress" based on weak areas.
                 temperature=0.4,
                 response_format={"type": "json_object"}
             )
-
-            path = json.loads(response.choices[0].message.content)
             return path
 
         except Exception as e:
@@ -681,7 +678,8 @@ Examples of BAD insights (avoid these):
 """
 
         try:
-            response = self.client.chat.completions.create(
+            result = await llm_cache.complete(
+                self.llm.chat,
                 model="gpt-4o-mini",
                 messages=[
                     {"role": "system", "content": "You are a supportive learning coach."},
@@ -690,8 +688,6 @@ Examples of BAD insights (avoid these):
                 temperature=0.5,
                 response_format={"type": "json_object"}
             )
-
-            result = json.loads(response.choices[0].message.content)
             return result.get('takeaways', [])
         except Exception as e:
             print(f"AI takeaways generation failed: {e}")
@@ -749,7 +745,8 @@ IMPORTANT:
 """
 
         try:
-            response = self.client.chat.completions.create(
+            result = await llm_cache.complete(
+                self.llm.chat,
                 model="gpt-4o-mini",
                 messages=[
                     {
@@ -765,8 +762,6 @@ IMPORTANT:
                 response_format={"type": "json_object"}
             )
 
-            result = json.loads(response.choices[0].message.content)
-
             # Enhance recommendations with YouTube search URLs
             recommendations = result.get('recommendations', [])
             for rec in recommendations:
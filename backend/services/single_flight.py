@@ -0,0 +1,48 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key
+
+    The first caller for a key runs the work; callers arriving while it is in
+    flight wait for and share the same result (or exception) instead of
+    running the work again. Once the call finishes the key is forgotten.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run fn() once per in-flight key
+
+        Returns (result, shared) where shared is True if this caller attached
+        to a call started by someone else.
+        """
+        existing = self._calls.get(key)
+        if existing is not None:
+            # shield: a cancelled follower must not cancel the leader's call
+            return await asyncio.shield(existing), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark as retrieved so an error with no followers isn't logged twice
+            future.exception()
+            raise
+        finally:
+            del self._calls[key]
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+
+# Shared by the video routes, keyed by canonical video_id
+video_single_flight = SingleFlight()
@@ -0,0 +1,83 @@
+import time
+from typing import Dict, Optional, Tuple
+from config import settings
+from database import db
+from services.single_flight import SingleFlight
+
+# Fields of a status record, with the values used for a video that has none yet
+STATUS_DEFAULTS = {
+    "processing_status": "processing",
+    "error_message": None,
+    "batch_current": 0,
+    "batch_total": 0,
+    "flashcard_count": 0,
+    "has_transcript": False,
+}
+
+
+class VideoStatusCache:
+    """
+    In-memory processing status records, backed by video_processing_status
+
+    The process running the ingestion pipeline keeps its record current as it
+    goes; other processes learn about changes from progress events. Anything
+    older than the TTL is re-read with a single primary-key lookup, shared by
+    all concurrent readers of the same video.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, Dict]] = {}
+        self._loads = SingleFlight()
+
+    async def get(self, video_id: str) -> Optional[Dict]:
+        """Status record for a video, or None if the video does not exist"""
+        entry = self._entries.get(video_id)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+            return entry[1]
+
+        record, _ = await self._loads.do(video_id, lambda: self._load(video_id))
+        return record
+
+    def peek(self, video_id: str) -> Optional[Dict]:
+        """Cached record regardless of age, without touching the database"""
+        entry = self._entries.get(video_id)
+        return entry[1] if entry is not None else None
+
+    def put(self, video_id: str, record: Dict):
+        if len(self._entries) >= self.max_entries and video_id not in self._entries:
+            self._evict()
+        self._entries[video_id] = (time.monotonic(), {**STATUS_DEFAULTS, **record})
+
+    def update(self, video_id: str, **fields) -> Optional[Dict]:
+        """Merge fields into the cached record, if there is one, and return it"""
+        record = self.peek(video_id)
+        if record is None:
+            return None
+        self.put(video_id, {**record, **fields})
+        return self._entries[video_id][1]
+
+    def invalidate(self, video_id: str):
+        self._entries.pop(video_id, None)
+
+    async def _load(self, video_id: str) -> Optional[Dict]:
+        row = await db.get_video_status(video_id)
+        if not row:
+            self.invalidate(video_id)
+            return None
+
+        self.put(video_id, {key: row.get(key) for key in STATUS_DEFAULTS if row.get(key) is not None})
+        return self._entries[video_id][1]
+
+    def _evict(self):
+        # Drop expired records first; if everything is fresh, drop the oldest
+        now = time.monotonic()
+        for video_id in [v for v, (at, _) in self._entries.items() if now - at >= self.ttl_seconds]:
+            del self._entries[video_id]
+        if len(self._entries) >= self.max_entries:
+            oldest = min(self._entries, key=lambda v: self._entries[v][0])
+            del self._entries[oldest]
+
+
+video_status_cache = VideoStatusCache(ttl_seconds=settings.status_cache_ttl)
@@ -0,0 +1,46 @@
+import json
+import os
+import tempfile
+from typing import Any, Optional
+from config import settings
+from services.disk_cache import DiskCache
+from services.metrics import metrics
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Bump when the cached caption format changes
+CAPTIONS_VERSION = "youtube-transcript-api:1"
+
+metrics.describe("transcript_cache_requests_total", "counter", "Transcript cache lookups, per source and result")
+
+
+class TranscriptCache(DiskCache):
+    """
+    Content-addressed, compressed on-disk cache of caption tracks and Whisper output
+
+    Entries are keyed by (video_id, source, language, engine version, part) -
+    part is the time range of a batch - so re-ingesting a video after a
+    failure or deletion costs no caption fetch or transcription.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        super().__init__("Transcript cache", directory, max_bytes)
+
+    async def get(self, video_id: str, source: str, language: str, version: str, part: str = "") -> Optional[Any]:
+        if not self.enabled:
+            return None
+        value = await self.load(json.dumps([video_id, source, language, version, part]))
+        metrics.inc("transcript_cache_requests_total", source=source, result="hit" if value is not None else "miss")
+        if value is not None:
+            logger.info(f"Transcript cache hit: {video_id} {source} {part}".rstrip())
+        return value
+
+    async def put(self, video_id: str, source: str, language: str, version: str, value: Any, part: str = ""):
+        await self.store(json.dumps([video_id, source, language, version, part]), value)
+
+
+transcript_cache = TranscriptCache(
+    settings.transcript_cache_dir or os.path.join(tempfile.gettempdir(), "transcript-cache"),
+    settings.transcript_cache_max_mb * 1024 * 1024
+)
@@ -0,0 +1,124 @@
+import re
+from typing import List, Optional, Sequence
+import numpy as np
+from models import VideoSegment
+
+_SENTENCE_END_RE = re.compile(r"[.!?][\"')\]]*\s*$")
+
+
+class TranscriptSegmenter:
+    """
+    Groups timed transcript entries (caption lines, Whisper segments) into
+    ~target_segment_duration learning segments
+
+    Works on NumPy arrays of entry start/end times: the running maximum of end
+    times is non-decreasing, so each segment boundary is one searchsorted
+    lookup and the whole track is segmented in O(n) + O(segments * log n).
+    With snap_to_sentence, a boundary moves forward to the next entry that
+    ends a sentence, if there is one within max_snap_seconds.
+    """
+
+    def __init__(
+        self,
+        target_segment_duration: float = 120.0,
+        snap_to_sentence: bool = False,
+        max_snap_seconds: float = 30.0
+    ):
+        self.target_segment_duration = target_segment_duration
+        self.snap_to_sentence = snap_to_sentence
+        self.max_snap_seconds = max_snap_seconds
+
+    def segment(
+        self,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        texts: Sequence[str],
+        offset: float = 0.0,
+        continuous: bool = False,
+        target_segment_duration: Optional[float] = None
+    ) -> List[VideoSegment]:
+        """
+        Segment entries sorted by start time
+
+        Args:
+            starts, ends: Entry start and end times (seconds)
+            texts: Entry texts, same order
+            offset: Added to every timestamp (batch start for Whisper batches)
+            continuous: Start each segment where the previous one ended (Whisper)
+                instead of at its first entry's start (captions)
+            target_segment_duration: Overrides the segmenter's target for this call
+        """
+        n = len(starts)
+        if n == 0:
+            return []
+
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.asarray(ends, dtype=np.float64)
+        max_ends = np.maximum.accumulate(ends)
+        sentence_ends = None
+        if self.snap_to_sentence:
+            sentence_ends = np.fromiter(
+                (bool(_SENTENCE_END_RE.search(text)) for text in texts), dtype=bool, count=n
+            )
+
+        target = target_segment_duration or self.target_segment_duration
+
+        segments = []
+        first = 0
+        segment_start = starts[0]
+        while first < n:
+            last = self._closing_entry(starts, ends, max_ends, sentence_ends, first, segment_start + target)
+            closed = last is not None
+            if not closed:
+                last = n - 1
+
+            segments.append(VideoSegment(
+                start_time=segment_start + offset,
+                end_time=ends[last] + offset,
+                text=" ".join(texts[first:last + 1]).strip()
+            ))
+
+            if not closed:
+                break
+            first = last + 1
+            if first < n:
+                segment_start = ends[last] if continuous else starts[first]
+
+        return segments
+
+    def _closing_entry(self, starts, ends, max_ends, sentence_ends, first: int, threshold: float):
+        """
+        Index of the entry that completes the segment starting at `first`, i.e.
+        ends at or after threshold (None = the segment runs to the end)
+        """
+        # First entry from `first` on whose end reaches the threshold. The running
+        # maximum finds it in O(log n) unless an earlier entry already ends past it.
+        if first > 0 and max_ends[first - 1] >= threshold:
+            reached = np.flatnonzero(ends[first:] >= threshold)
+            if not len(reached):
+                return None
+            last = first + int(reached[0])
+        else:
+            # max_ends first reaches the threshold at an entry that itself ends there
+            last = int(np.searchsorted(max_ends, threshold, side="left"))
+            if last >= len(ends):
+                return None
+
+        if sentence_ends is not None and not sentence_ends[last]:
+            window_end = int(np.searchsorted(starts, ends[last] + self.max_snap_seconds, side="right"))
+            candidates = np.flatnonzero(sentence_ends[last + 1:window_end])
+            if len(candidates):
+                last += 1 + int(candidates[0])
+
+        return last
+
+
+def entry_arrays(entries: Sequence[dict]):
+    """starts, ends and texts of caption entries ({start, duration}) or Whisper segments ({start, end})"""
+    count = len(entries)
+    starts = np.fromiter((entry['start'] for entry in entries), dtype=np.float64, count=count)
+    if count and 'end' in entries[0]:
+        ends = np.fromiter((entry['end'] for entry in entries), dtype=np.float64, count=count)
+    else:
+        ends = starts + np.fromiter((entry['duration'] for entry in entries), dtype=np.float64, count=count)
+    return starts, ends, [entry['text'] for entry in entries]
@@ -0,0 +1,127 @@
+import asyncio
+import io
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Optional
+from config import settings
+from services.admission import transcription_limiter
+from services.llm_gateway import llm_gateway
+from logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class TranscriptionBackend(ABC):
+    """
+    Speech-to-text engine behind WhisperService
+
+    transcribe() takes in-memory Ogg/Opus speech audio and returns a
+    Whisper-style response: .text and .segments as [{start, end, text}] dicts
+    with times relative to the start of the audio.
+    """
+
+    # Identifies the engine and model, so cached output of another engine is not reused
+    version: str = ""
+    # Largest audio accepted in one call (None = no limit); bigger audio is chunked
+    max_upload_bytes: Optional[int] = None
+
+    @abstractmethod
+    async def transcribe(self, audio_data: bytes) -> SimpleNamespace:
+        ...
+
+
+class OpenAIWhisperBackend(TranscriptionBackend):
+    """Hosted whisper-1 API"""
+
+    version = "openai:whisper-1"
+
+    def __init__(self):
+        self.llm = llm_gateway
+        self.max_upload_bytes = settings.whisper_max_upload_mb * 1024 * 1024
+
+    async def transcribe(self, audio_data: bytes) -> SimpleNamespace:
+        # Whisper calls are a shared, process-wide limited resource
+        async with transcription_limiter:
+            response = await self.llm.transcribe(
+                model="whisper-1",
+                file=("audio.ogg", audio_data),
+                response_format="verbose_json",
+                timestamp_granularities=["segment"]
+            )
+
+        segments = [
+            {"start": seg["start"], "end": seg["end"], "text": seg["text"]}
+            if isinstance(seg, dict)
+            else {"start": seg.start, "end": seg.end, "text": seg.text}
+            for seg in getattr(response, "segments", None) or []
+        ]
+        return SimpleNamespace(text=response.text, segments=segments)
+
+
+class LocalWhisperBackend(TranscriptionBackend):
+    """
+    faster-whisper (CTranslate2, int8) on the local CPU
+
+    One model instance serves a pool of worker threads: each transcription
+    runs on its own worker with local_whisper_cpu_threads cores, and the pool
+    is sized so the workers together use every core of the host. CTranslate2
+    releases the GIL, so the workers run truly in parallel.
+    """
+
+    def __init__(self):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise RuntimeError(
+                "TRANSCRIPTION_BACKEND=local requires faster-whisper (pip install faster-whisper)"
+            ) from e
+
+        cpu_threads = max(1, settings.local_whisper_cpu_threads)
+        self.workers = settings.local_whisper_workers or max(1, (os.cpu_count() or 1) // cpu_threads)
+        self.version = transcription_backend_version()
+
+        logger.info(
+            f"Loading local Whisper model {settings.local_whisper_model} "
+            f"({self.workers} workers x {cpu_threads} threads)"
+        )
+        self.model = WhisperModel(
+            settings.local_whisper_model,
+            device="cpu",
+            compute_type="int8",
+            cpu_threads=cpu_threads,
+            num_workers=self.workers
+        )
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="whisper")
+
+    async def transcribe(self, audio_data: bytes) -> SimpleNamespace:
+        def transcribe():
+            segments, _ = self.model.transcribe(io.BytesIO(audio_data), language="en")
+            # segments is a lazy generator - decoding happens while iterating
+            return [
+                {"start": segment.start, "end": segment.end, "text": segment.text}
+                for segment in segments
+            ]
+
+        segments = await asyncio.get_running_loop().run_in_executor(self._executor, transcribe)
+        return SimpleNamespace(
+            text="".join(segment["text"] for segment in segments).strip(),
+            segments=segments
+        )
+
+
+def transcription_backend_version() -> str:
+    """Version of the configured backend, without loading it"""
+    if settings.transcription_backend == "local":
+        return f"faster-whisper:{settings.local_whisper_model}:int8"
+    return OpenAIWhisperBackend.version
+
+
+def create_transcription_backend() -> TranscriptionBackend:
+    """Backend selected by TRANSCRIPTION_BACKEND ("openai" or "local")"""
+    if settings.transcription_backend == "local":
+        return LocalWhisperBackend()
+    if settings.transcription_backend != "openai":
+        raise ValueError(f"Unknown transcription backend: {settings.transcription_backend}")
+    return OpenAIWhisperBackend()
@@ -1,5 +1,5 @@
 import yt_dlp
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 import hashlib
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
@@ -46,6 +46,24 @@ class VideoProcessor:
             'language': info.get('language', ''),
         }
 
+    async def extract_playlist_urls_async(self, playlist_url: str) -> List[str]:
+        """List the video URLs of a playlist without resolving each video"""
+        loop = asyncio.get_event_loop()
+
+        def _extract():
+            opts = {**self.ydl_opts, 'extract_flat': 'in_playlist', 'socket_timeout': 10}
+            with yt_dlp.YoutubeDL(opts) as ydl:
+                return ydl.extract_info(playlist_url, download=False)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            info = await loop.run_in_executor(executor, _extract)
+
+        urls = []
+        for entry in (info or {}).get('entries') or []:
+            if entry and entry.get('id'):
+                urls.append(self.get_video_url(entry['id']))
+        return urls
+
     def get_video_id(self, url: str) -> str:
         """Extract YouTube video ID from URL or generate hash for other URLs"""
         # Try to extract YouTube video ID
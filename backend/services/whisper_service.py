@@ -1,38 +1,68 @@
-from openai import OpenAI
 from config import settings
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from models import VideoSegment, VideoTranscript
 from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound
-import yt_dlp
-import tempfile
-import os
+from fastapi.concurrency import run_in_threadpool
+from services.caption_index import CaptionIndex
+from services.transcription_backends import (
+    TranscriptionBackend,
+    create_transcription_backend,
+    transcription_backend_version,
+)
+from services.transcript_cache import CAPTIONS_VERSION, transcript_cache
+from services.transcript_segmenter import TranscriptSegmenter, entry_arrays
+from services.audio_workdir import AudioWorkdir, fetch_speech_audio
+from services import audio_chunker
+from services.metrics import metrics
+from types import SimpleNamespace
+import asyncio
+import math
 from logging_config import get_logger
 
 logger = get_logger(__name__)
 
+metrics.describe(
+    "transcription_audio_seconds_total", "counter",
+    "Seconds of caption-less audio sent to the transcription backend (speech) or skipped by VAD"
+)
+
 
 class WhisperService:
     def __init__(self):
-        self.client = OpenAI(api_key=settings.openai_api_key)
+        self._backend: Optional[TranscriptionBackend] = None
+        self.segmenter = TranscriptSegmenter(snap_to_sentence=settings.transcript_snap_to_sentence)
+
+    @property
+    def backend(self) -> TranscriptionBackend:
+        """Transcription engine for caption-less audio, created on first use (a local model is large)"""
+        if self._backend is None:
+            self._backend = create_transcription_backend()
+        return self._backend
 
     async def transcribe_video(
         self,
         video_url: str,
         duration: float,
         start_time: Optional[float] = None,
-        end_time: Optional[float] = None
+        end_time: Optional[float] = None,
+        captions: Optional[CaptionIndex] = None,
+        try_captions: bool = True,
+        audio: Optional[AudioWorkdir] = None
     ) -> VideoTranscript:
         """
         Transcribe video using multiple methods:
         1. YouTube Transcript API (primary - fast, free, built-in captions)
-        2. OpenAI Whisper API (fallback - download audio and transcribe)
+        2. Whisper (fallback - stream audio to the TRANSCRIPTION_BACKEND: whisper-1 API or local)
 
         Args:
             video_url: URL of the video to transcribe
             duration: Total duration of the video in seconds
             start_time: Optional start time for batch processing (seconds)
             end_time: Optional end time for batch processing (seconds)
+            captions: Caption index from load_captions, reused across batches
+            try_captions: Set to False when load_captions already found no captions
+            audio: Per-job audio workdir, so Whisper batches share one download
         """
         try:
             # Extract video ID from URL
@@ -44,9 +74,13 @@ class WhisperService:
             else:
                 logger.info(f"Attempting to get YouTube transcript for video ID: {video_id}")
 
+            if not try_captions and captions is None:
+                logger.info("No YouTube captions for this video, using Whisper API")
+                return await self._transcribe_with_whisper(video_url, duration, start_time, end_time, audio)
+
             # Try YouTube Transcript API first (fast and free)
             try:
-                transcript = await self._get_youtube_transcript(video_id, duration, start_time, end_time)
+                transcript = await self._get_youtube_transcript(video_id, duration, start_time, end_time, captions)
                 logger.info(f"✅ Successfully retrieved YouTube transcript with {len(transcript.segments)} segments")
                 return transcript
             except (TranscriptsDisabled, NoTranscriptFound) as e:
@@ -54,12 +88,38 @@ class WhisperService:
                 logger.info("Falling back to Whisper API...")
 
                 # Fall back to Whisper API
-                return await self._transcribe_with_whisper(video_url, duration, start_time, end_time)
+                return await self._transcribe_with_whisper(video_url, duration, start_time, end_time, audio)
 
         except Exception as e:
             logger.error(f"Transcription failed: {str(e)}")
             raise Exception(f"Transcription failed: {str(e)}")
 
+    async def load_captions(self, video_url: str) -> Optional[CaptionIndex]:
+        """
+        Fetch the YouTube caption track once per video
+
+        Batches then slice the returned index instead of re-downloading the track.
+        Returns None if the video has no usable captions (Whisper path).
+        """
+        video_id = self._extract_video_id(video_url)
+        try:
+            captions = await self._fetch_caption_index(video_id)
+            logger.info(f"Loaded {len(captions)} caption entries for video ID: {video_id}")
+            return captions
+        except (TranscriptsDisabled, NoTranscriptFound) as e:
+            logger.warning(f"YouTube transcript not available: {str(e)}")
+            return None
+
+    async def _fetch_caption_index(self, video_id: str) -> CaptionIndex:
+        """Download the caption track (or take it from the transcript cache) and build a time index over it"""
+        entries = await transcript_cache.get(video_id, "captions", "en", CAPTIONS_VERSION)
+        if entries is None:
+            ytt_api = YouTubeTranscriptApi()
+            fetched_transcript = await run_in_threadpool(lambda: ytt_api.fetch(video_id))
+            entries = fetched_transcript.to_raw_data()
+            await transcript_cache.put(video_id, "captions", "en", CAPTIONS_VERSION, entries)
+        return CaptionIndex(entries)
+
     def _extract_video_id(self, video_url: str) -> str:
         """Extract YouTube video ID from URL"""
         if 'youtu.be' in video_url:
@@ -79,7 +139,8 @@ class WhisperService:
         video_id: str,
         duration: float,
         start_time: Optional[float] = None,
-        end_time: Optional[float] = None
+        end_time: Optional[float] = None,
+        captions: Optional[CaptionIndex] = None
     ) -> VideoTranscript:
         """
         Get transcript from YouTube's built-in captions
@@ -90,34 +151,24 @@ class WhisperService:
             duration: Total video duration
             start_time: Optional start time for filtering (seconds)
             end_time: Optional end time for filtering (seconds)
+            captions: Already loaded caption index (fetched here if not given)
         """
         # Get transcript with timestamps
-        ytt_api = YouTubeTranscriptApi()
-        fetched_transcript = ytt_api.fetch(video_id)
-
-        # Convert to our VideoSegment format and create meaningful chunks
-        transcript_list = fetched_transcript.to_raw_data()
+        if captions is None:
+            captions = await self._fetch_caption_index(video_id)
 
-        # Filter transcript by time range if specified
+        # Slice transcript by time range if specified
         if start_time is not None and end_time is not None:
-            filtered_list = []
-            for entry in transcript_list:
-                entry_start = entry['start']
-                entry_end = entry['start'] + entry['duration']
-
-                # Include entries that overlap with the requested time range
-                if entry_end > start_time and entry_start < end_time:
-                    filtered_list.append(entry)
-
-            logger.info(f"Filtered transcript from {len(transcript_list)} to {len(filtered_list)} entries for time range {start_time}s-{end_time}s")
-            transcript_list = filtered_list
+            transcript_list = captions.slice(start_time, end_time)
+            logger.info(f"Sliced {len(transcript_list)} of {len(captions)} entries for time range {start_time}s-{end_time}s")
 
             # Use the filtered duration for segment creation
             segment_duration = end_time - start_time
         else:
+            transcript_list = captions.to_list()
             segment_duration = duration
 
-        segments = self._create_segments_from_youtube_transcript(transcript_list, segment_duration, start_time)
+        segments = self._create_segments_from_youtube_transcript(transcript_list)
 
         # Combine all text
         full_text = " ".join([seg.text for seg in segments])
@@ -132,8 +183,6 @@ class WhisperService:
     def _create_segments_from_youtube_transcript(
         self,
         transcript_list: List[dict],
-        duration: float,
-        start_time_offset: Optional[float] = None,
         target_segment_duration: float = 120.0  # 2 minutes per segment
     ) -> List[VideoSegment]:
         """
@@ -142,45 +191,10 @@ class WhisperService:
 
         Args:
             transcript_list: List of transcript entries from YouTube
-            duration: Duration of the video/segment
-            start_time_offset: Optional offset for batch processing (to preserve original timestamps)
             target_segment_duration: Target duration for each segment
         """
-        if not transcript_list:
-            return []
-
-        segments = []
-        current_segment_text = []
-        current_segment_start = transcript_list[0]['start']
-        current_segment_duration = 0
-
-        for entry in transcript_list:
-            current_segment_text.append(entry['text'])
-            current_segment_duration = (entry['start'] + entry['duration']) - current_segment_start
-
-            # Create a new segment if we've reached target duration
-            if current_segment_duration >= target_segment_duration:
-                segments.append(VideoSegment(
-                    start_time=current_segment_start,
-                    end_time=entry['start'] + entry['duration'],
-                    text=" ".join(current_segment_text)
-                ))
-
-                # Reset for next segment
-                current_segment_text = []
-                # Start next segment at current position
-                if transcript_list.index(entry) + 1 < len(transcript_list):
-                    current_segment_start = transcript_list[transcript_list.index(entry) + 1]['start']
-                current_segment_duration = 0
-
-        # Add remaining text as final segment
-        if current_segment_text:
-            last_entry = transcript_list[-1]
-            segments.append(VideoSegment(
-                start_time=current_segment_start,
-                end_time=last_entry['start'] + last_entry['duration'],
-                text=" ".join(current_segment_text)
-            ))
+        starts, ends, texts = entry_arrays(transcript_list)
+        segments = self.segmenter.segment(starts, ends, texts, target_segment_duration=target_segment_duration)
 
         logger.info(f"Created {len(segments)} segments from YouTube transcript")
         return segments
@@ -190,92 +204,159 @@ class WhisperService:
         video_url: str,
         duration: float,
         start_time: Optional[float] = None,
-        end_time: Optional[float] = None
+        end_time: Optional[float] = None,
+        audio: Optional[AudioWorkdir] = None
     ) -> VideoTranscript:
         """
-        FALLBACK: Use OpenAI Whisper API when YouTube transcripts aren't available
-        This downloads the audio and sends it to Whisper
+        FALLBACK: Use Whisper (API or local backend) when YouTube transcripts aren't available
+        This streams the audio as 16 kHz mono Opus and sends it to Whisper
 
         Args:
             video_url: URL of the video
             duration: Total video duration
             start_time: Optional start time for batch processing (seconds)
             end_time: Optional end time for batch processing (seconds)
+            audio: The job's audio workdir; batches are cut from it instead of downloaded
         """
-        logger.info("Downloading audio for Whisper transcription...")
+        # Determine the actual duration for this segment
+        if start_time is not None and end_time is not None:
+            segment_duration = end_time - start_time
+            part = f"{start_time:g}-{end_time:g}"
+        else:
+            segment_duration = duration
+            part = "full"
 
-        # Download audio using yt-dlp
-        audio_path = None
-        try:
-            # Create temporary file for audio
-            with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as tmp_file:
-                audio_path = tmp_file.name
-
-            # Build download options
-            ydl_opts = {
-                'format': 'bestaudio/best',
-                'postprocessors': [{
-                    'key': 'FFmpegExtractAudio',
-                    'preferredcodec': 'mp3',
-                    'preferredquality': '192',
-                }],
-                'outtmpl': audio_path.replace('.mp3', ''),
-                'quiet': True,
-                'no_warnings': True,
-            }
-
-            # Add time range for batch processing
-            if start_time is not None and end_time is not None:
-                ydl_opts['download_ranges'] = lambda info_dict, *args: [{
-                    'start_time': start_time,
-                    'end_time': end_time,
-                }]
-                logger.info(f"Downloading audio segment {start_time}s-{end_time}s")
-
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([video_url])
-
-            logger.info(f"Audio downloaded to: {audio_path}")
-
-            # Transcribe with Whisper API
-            logger.info("Sending audio to Whisper API...")
-            with open(audio_path, 'rb') as audio_file:
-                transcript_response = self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    response_format="verbose_json",
-                    timestamp_granularities=["segment"]
-                )
+        # An earlier run (failed job, deleted video) may already have transcribed this range
+        video_id = self._extract_video_id(video_url)
+        version = transcription_backend_version()
+        cached = await transcript_cache.get(video_id, "whisper", "en", version, part)
 
-            # Determine the actual duration for this segment
-            if start_time is not None and end_time is not None:
-                segment_duration = end_time - start_time
+        if cached is not None:
+            transcript_response = SimpleNamespace(**cached)
+        else:
+            # Stream the audio as speech-grade Opus (or cut this batch out of the job's audio)
+            if audio is not None:
+                if start_time is not None and end_time is not None:
+                    audio_data = await audio.cut(start_time, end_time)
+                else:
+                    audio_data = await audio.read()
             else:
-                segment_duration = duration
+                logger.info("Streaming audio for Whisper transcription...")
+                audio_data = await fetch_speech_audio(video_url, start_time, end_time)
 
-            # Convert Whisper response to our format
-            segments = self._create_segments_from_whisper_response(
-                transcript_response,
-                segment_duration,
-                start_time
+            logger.info(f"Audio ready for Whisper: {len(audio_data) / 1024:.0f} KB")
+
+            # Transcribe with Whisper
+            transcript_response = await self._transcribe_audio(audio_data, segment_duration)
+            await transcript_cache.put(
+                video_id, "whisper", "en", version,
+                {"text": transcript_response.text, "segments": transcript_response.segments},
+                part=part
             )
 
-            full_text = " ".join([seg.text for seg in segments])
+        # Convert Whisper response to our format
+        segments = self._create_segments_from_whisper_response(
+            transcript_response,
+            segment_duration,
+            start_time
+        )
+
+        full_text = " ".join([seg.text for seg in segments])
 
-            logger.info(f"✅ Whisper transcription complete with {len(segments)} segments")
+        logger.info(f"✅ Whisper transcription complete with {len(segments)} segments")
 
-            return VideoTranscript(
-                segments=segments,
-                full_text=full_text,
-                duration=segment_duration,
-                detected_language="en"
-            )
+        return VideoTranscript(
+            segments=segments,
+            full_text=full_text,
+            duration=segment_duration,
+            detected_language="en"
+        )
+
+    async def _transcribe_audio(self, audio_data: bytes, audio_duration: float) -> SimpleNamespace:
+        """
+        Transcribe in-memory Ogg/Opus audio with the transcription backend
+
+        With WHISPER_VAD, long silences are found first and only the speech
+        between them is transcribed; segment times are mapped back to the
+        original timeline. Returns the response as text + segments relative
+        to the audio start.
+        """
+        silences = None
+        if settings.whisper_vad:
+            silences = await audio_chunker.detect_silences(audio_data)
+            regions = audio_chunker.speech_regions(audio_duration, silences, settings.whisper_vad_min_silence)
+            speech_seconds = sum(end - start for start, end in regions)
+
+            metrics.inc("transcription_audio_seconds_total", speech_seconds, kind="speech")
+            metrics.inc("transcription_audio_seconds_total", audio_duration - speech_seconds, kind="skipped")
+
+            if not regions:
+                logger.info(f"VAD: no speech in {audio_duration:.0f}s of audio, skipping transcription")
+                return SimpleNamespace(text="", segments=[])
+
+            if speech_seconds < audio_duration - settings.whisper_vad_min_silence:
+                logger.info(
+                    f"VAD: {speech_seconds:.0f}s of speech in {audio_duration:.0f}s of audio "
+                    f"({len(regions)} regions), skipping {audio_duration - speech_seconds:.0f}s"
+                )
+                speech_data = await audio_chunker.condense_audio(audio_data, regions)
+                response = await self._transcribe_speech(speech_data, speech_seconds)
+                return SimpleNamespace(
+                    text=response.text,
+                    segments=audio_chunker.map_to_timeline(response.segments, regions)
+                )
+        else:
+            metrics.inc("transcription_audio_seconds_total", audio_duration, kind="speech")
 
-        finally:
-            # Clean up temporary audio file
-            if audio_path and os.path.exists(audio_path):
-                os.remove(audio_path)
-                logger.info("Cleaned up temporary audio file")
+        return await self._transcribe_speech(audio_data, audio_duration, silences)
+
+    async def _transcribe_speech(
+        self,
+        audio_data: bytes,
+        audio_duration: float,
+        silences: Optional[List[Tuple[float, float]]] = None
+    ) -> SimpleNamespace:
+        """
+        Long audio, or audio over the backend's upload limit, is split on silences
+        into overlapping chunks that are transcribed concurrently (bounded by the
+        backend) and stitched back into one timeline.
+        """
+        max_upload_bytes = self.backend.max_upload_bytes
+
+        chunk_seconds = float(settings.whisper_chunk_seconds)
+        if max_upload_bytes and len(audio_data) > max_upload_bytes:
+            # Leave headroom for uneven bitrate across the audio
+            chunk_seconds = min(chunk_seconds, audio_duration * max_upload_bytes / len(audio_data) * 0.9)
+
+        if audio_duration <= chunk_seconds * 1.25:
+            logger.info(f"Sending audio to {self.backend.version}...")
+            return await self.backend.transcribe(audio_data)
+
+        if silences is None:
+            silences = await audio_chunker.detect_silences(audio_data)
+        chunks = audio_chunker.plan_chunks(
+            audio_duration,
+            silences,
+            chunk_seconds,
+            settings.whisper_chunk_overlap
+        )
+        logger.info(
+            f"Sending audio to {self.backend.version} in {len(chunks)} chunks "
+            f"(~{math.ceil(chunk_seconds)}s each, {len(silences)} silences detected)"
+        )
+
+        async def transcribe_chunk(chunk: audio_chunker.AudioChunk):
+            chunk_data = await audio_chunker.cut_audio(audio_data, chunk.start, chunk.end)
+            response = await self.backend.transcribe(chunk_data)
+            return chunk, response.segments
+
+        results = await asyncio.gather(*(transcribe_chunk(chunk) for chunk in chunks))
+
+        segments = audio_chunker.stitch_segments(results)
+        return SimpleNamespace(
+            text="".join(segment["text"] for segment in segments).strip(),
+            segments=segments
+        )
 
     def _create_segments_from_whisper_response(
         self,
@@ -305,36 +386,13 @@ class WhisperService:
                 text=whisper_response.text
             )]
 
-        segments = []
-        current_segment_text = []
-        current_segment_start = whisper_response.segments[0]['start']
-        current_segment_duration = 0
-
-        for seg in whisper_response.segments:
-            current_segment_text.append(seg['text'])
-            current_segment_duration = seg['end'] - current_segment_start
-
-            # Create new segment at target duration
-            if current_segment_duration >= target_segment_duration:
-                segments.append(VideoSegment(
-                    start_time=current_segment_start + offset,
-                    end_time=seg['end'] + offset,
-                    text=" ".join(current_segment_text).strip()
-                ))
-
-                # Reset for next segment
-                current_segment_text = []
-                current_segment_start = seg['end']
-                current_segment_duration = 0
-
-        # Add remaining as final segment
-        if current_segment_text:
-            last_seg = whisper_response.segments[-1]
-            segments.append(VideoSegment(
-                start_time=current_segment_start + offset,
-                end_time=last_seg['end'] + offset,
-                text=" ".join(current_segment_text).strip()
-            ))
+        starts, ends, texts = entry_arrays(whisper_response.segments)
+        segments = self.segmenter.segment(
+            starts, ends, texts,
+            offset=offset,
+            continuous=True,
+            target_segment_duration=target_segment_duration
+        )
 
         logger.info(f"Created {len(segments)} segments from Whisper response (offset: {offset}s)")
         return segments
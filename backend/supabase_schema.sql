@@ -30,7 +30,7 @@ CREATE TABLE IF NOT EXISTS videos (
     id VARCHAR(255) PRIMARY KEY, -- YouTube video ID (e.g., AL2GL2GUfHk)
     title TEXT NOT NULL,
     video_length FLOAT NOT NULL, -- duration in seconds
-    transcript JSONB, -- NULL during processing
+    transcript JSONB, -- Legacy: transcripts are stored in video_transcripts (moved there on first read)
     url TEXT NOT NULL,
     processing_status VARCHAR(50) DEFAULT 'processing', -- processing, transcribing, generating_flashcards, completed, failed
     error_message TEXT, -- Error details if processing failed
@@ -788,3 +788,473 @@ CREATE TRIGGER apply_credit_purchase_trigger
     AFTER INSERT OR UPDATE ON credit_purchases
     FOR EACH ROW
     EXECUTE FUNCTION apply_credit_purchase();
+
+-- ============================================================================
+-- INGESTION JOB QUEUE
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS ingestion_jobs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    video_id VARCHAR(255) NOT NULL REFERENCES videos(id) ON DELETE CASCADE,
+    video_url TEXT NOT NULL,
+    title TEXT,
+    user_id UUID,
+    project_id UUID,
+    status VARCHAR(20) NOT NULL DEFAULT 'queued', -- queued, running, completed, failed
+    lane VARCHAR(20) NOT NULL DEFAULT 'standard', -- priority (plans with priority_processing), standard
+    attempts INTEGER NOT NULL DEFAULT 0, -- Number of times the job has been claimed
+    max_attempts INTEGER NOT NULL DEFAULT 3, -- Lease expiries tolerated before giving up
+    worker_id TEXT, -- Worker currently holding the lease
+    lease_expires_at TIMESTAMP WITH TIME ZONE, -- Job is reclaimable once this passes
+    last_error TEXT,
+    enqueued_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    started_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_status_enqueued ON ingestion_jobs(status, enqueued_at);
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_video_id ON ingestion_jobs(video_id);
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_user_status ON ingestion_jobs(user_id, status);
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_completed_finished ON ingestion_jobs(finished_at)
+    WHERE status = 'completed';
+
+-- At most one active job per video, so concurrent submissions of the same URL
+-- (from any API process) coalesce onto a single ingestion run
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ingestion_jobs_active_video ON ingestion_jobs(video_id)
+    WHERE status IN ('queued', 'running');
+
+ALTER TABLE ingestion_jobs ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "System can manage ingestion jobs" ON ingestion_jobs;
+CREATE POLICY "System can manage ingestion jobs" ON ingestion_jobs
+    FOR ALL WITH CHECK (true);
+
+-- Claim the next job for a worker.
+-- Runnable = queued, or running with an expired lease (the worker died).
+-- Order: reclaims first, then the priority lane (standard jobs join it once
+-- they have waited p_aging_seconds), then round-robin across users weighted by
+-- how many jobs each started in the last p_aging_seconds, then oldest first.
+-- Users already running p_max_running_per_user jobs are skipped until one finishes.
+-- SKIP LOCKED lets concurrent workers claim different jobs without blocking; a
+-- per-user advisory lock serializes claims of one user's jobs, so workers
+-- claiming at the same moment can't both take that user's last free slot.
+CREATE OR REPLACE FUNCTION claim_ingestion_job(
+    p_worker_id TEXT,
+    p_lease_seconds INTEGER,
+    p_max_running_per_user INTEGER DEFAULT 2,
+    p_aging_seconds INTEGER DEFAULT 600
+)
+RETURNS SETOF ingestion_jobs AS $$
+DECLARE
+    v_job_id UUID;
+    v_user_id UUID;
+    v_status VARCHAR(20);
+    v_full_users UUID[] := '{}';
+BEGIN
+    -- Jobs whose lease expired too many times are given up on
+    WITH exhausted AS (
+        UPDATE ingestion_jobs
+        SET status = 'failed',
+            last_error = 'Lease expired after ' || attempts || ' attempts',
+            finished_at = NOW(),
+            updated_at = NOW()
+        WHERE status = 'running'
+          AND lease_expires_at < NOW()
+          AND attempts >= max_attempts
+        RETURNING video_id, last_error
+    )
+    UPDATE videos
+    SET processing_status = 'failed',
+        error_message = exhausted.last_error,
+        updated_at = NOW()
+    FROM exhausted
+    WHERE videos.id = exhausted.video_id;
+
+    LOOP
+        v_job_id := NULL;
+
+        WITH usage AS (
+            SELECT user_id,
+                   COUNT(*) FILTER (WHERE status = 'running' AND lease_expires_at >= NOW()) AS running,
+                   COUNT(*) FILTER (WHERE started_at >= NOW() - make_interval(secs => p_aging_seconds)) AS recent
+            FROM ingestion_jobs
+            WHERE user_id IS NOT NULL
+              AND (status = 'running' OR started_at >= NOW() - make_interval(secs => p_aging_seconds))
+            GROUP BY user_id
+        ),
+        ranked AS (
+            -- share: the job's place in its user's queue plus the user's recent starts,
+            -- so users take turns instead of the oldest upload draining first
+            SELECT c.id,
+                   c.status = 'running' AS reclaim,
+                   c.lane = 'priority' OR c.enqueued_at < NOW() - make_interval(secs => p_aging_seconds) AS prioritized,
+                   ROW_NUMBER() OVER (PARTITION BY COALESCE(c.user_id::TEXT, c.id::TEXT) ORDER BY c.enqueued_at)
+                       + COALESCE(usage.recent, 0) AS share
+            FROM ingestion_jobs c
+            LEFT JOIN usage ON usage.user_id = c.user_id
+            WHERE (c.status = 'queued'
+                   AND COALESCE(usage.running, 0) < p_max_running_per_user
+                   AND (c.user_id IS NULL OR c.user_id <> ALL(v_full_users)))
+               OR (c.status = 'running' AND c.lease_expires_at < NOW())
+        )
+        SELECT q.id, q.user_id, q.status
+        INTO v_job_id, v_user_id, v_status
+        FROM ingestion_jobs q
+        JOIN ranked ON ranked.id = q.id
+        -- Repeated on q so it is rechecked after the row lock (ranked is a snapshot)
+        WHERE q.status = 'queued'
+           OR (q.status = 'running' AND q.lease_expires_at < NOW())
+        ORDER BY ranked.reclaim DESC, ranked.prioritized DESC, ranked.share, q.enqueued_at
+        LIMIT 1
+        FOR UPDATE OF q SKIP LOCKED;
+
+        IF v_job_id IS NULL THEN
+            RETURN;
+        END IF;
+
+        -- The running count above is a snapshot too: take the user's lock (held until
+        -- commit, so concurrent claims for them wait here) and count again
+        IF v_status = 'queued' AND v_user_id IS NOT NULL THEN
+            PERFORM pg_advisory_xact_lock(hashtext(v_user_id::TEXT));
+            IF (
+                SELECT COUNT(*) FROM ingestion_jobs
+                WHERE user_id = v_user_id AND status = 'running' AND lease_expires_at >= NOW()
+            ) >= p_max_running_per_user THEN
+                v_full_users := array_append(v_full_users, v_user_id);
+                CONTINUE;
+            END IF;
+        END IF;
+
+        RETURN QUERY
+        UPDATE ingestion_jobs AS j
+        SET status = 'running',
+            worker_id = p_worker_id,
+            attempts = j.attempts + 1,
+            lease_expires_at = NOW() + make_interval(secs => p_lease_seconds),
+            started_at = COALESCE(j.started_at, NOW()),
+            updated_at = NOW()
+        WHERE j.id = v_job_id
+        RETURNING j.*;
+        RETURN;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Extend the lease of a running job. Returns false if the worker lost the lease.
+CREATE OR REPLACE FUNCTION heartbeat_ingestion_job(p_job_id UUID, p_worker_id TEXT, p_lease_seconds INTEGER)
+RETURNS BOOLEAN AS $$
+BEGIN
+    UPDATE ingestion_jobs
+    SET lease_expires_at = NOW() + make_interval(secs => p_lease_seconds),
+        updated_at = NOW()
+    WHERE id = p_job_id
+      AND worker_id = p_worker_id
+      AND status = 'running';
+    RETURN FOUND;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Mark a job finished (p_status = 'completed' or 'failed')
+CREATE OR REPLACE FUNCTION finish_ingestion_job(p_job_id UUID, p_worker_id TEXT, p_status TEXT, p_error TEXT DEFAULT NULL)
+RETURNS BOOLEAN AS $$
+BEGIN
+    UPDATE ingestion_jobs
+    SET status = p_status,
+        last_error = p_error,
+        lease_expires_at = NULL,
+        finished_at = NOW(),
+        updated_at = NOW()
+    WHERE id = p_job_id
+      AND worker_id = p_worker_id
+      AND status = 'running';
+    RETURN FOUND;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Queue depth and wait time per lane, for the /metrics endpoint.
+-- Wait = time from enqueue to first claim, over jobs claimed in the last p_window_seconds.
+CREATE OR REPLACE FUNCTION ingestion_queue_stats(p_window_seconds INTEGER DEFAULT 900)
+RETURNS TABLE (
+    lane VARCHAR(20),
+    queued BIGINT,
+    running BIGINT,
+    oldest_queued_seconds DOUBLE PRECISION,
+    started_recently BIGINT,
+    avg_wait_seconds DOUBLE PRECISION,
+    p95_wait_seconds DOUBLE PRECISION
+) AS $$
+    SELECT
+        j.lane,
+        COUNT(*) FILTER (WHERE j.status = 'queued'),
+        COUNT(*) FILTER (WHERE j.status = 'running'),
+        COALESCE(EXTRACT(EPOCH FROM NOW() - MIN(j.enqueued_at) FILTER (WHERE j.status = 'queued')), 0)::DOUBLE PRECISION,
+        COUNT(*) FILTER (WHERE j.started_at >= NOW() - make_interval(secs => p_window_seconds)),
+        COALESCE(AVG(EXTRACT(EPOCH FROM j.started_at - j.enqueued_at))
+            FILTER (WHERE j.started_at >= NOW() - make_interval(secs => p_window_seconds)), 0)::DOUBLE PRECISION,
+        COALESCE(percentile_cont(0.95) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM j.started_at - j.enqueued_at))
+            FILTER (WHERE j.started_at >= NOW() - make_interval(secs => p_window_seconds)), 0)::DOUBLE PRECISION
+    FROM ingestion_jobs j
+    WHERE j.status IN ('queued', 'running')
+       OR j.started_at >= NOW() - make_interval(secs => p_window_seconds)
+    GROUP BY j.lane;
+$$ LANGUAGE sql STABLE;
+
+-- Queue backlog, globally and for one user, plus the mean run time of jobs
+-- finished in the last hour (NULL if none) for Retry-After estimates
+CREATE OR REPLACE FUNCTION ingestion_admission_stats(p_user_id UUID DEFAULT NULL)
+RETURNS TABLE (
+    queued BIGINT,
+    running BIGINT,
+    user_queued BIGINT,
+    avg_run_seconds DOUBLE PRECISION
+) AS $$
+    SELECT
+        (SELECT COUNT(*) FROM ingestion_jobs WHERE status = 'queued'),
+        (SELECT COUNT(*) FROM ingestion_jobs WHERE status = 'running'),
+        (SELECT COUNT(*) FROM ingestion_jobs WHERE status = 'queued' AND user_id = p_user_id),
+        (SELECT AVG(EXTRACT(EPOCH FROM finished_at - started_at))::DOUBLE PRECISION
+         FROM ingestion_jobs
+         WHERE status = 'completed' AND finished_at >= NOW() - INTERVAL '1 hour');
+$$ LANGUAGE sql STABLE;
+
+-- Checkpoints of completed batches, so retried jobs resume where they stopped
+CREATE TABLE IF NOT EXISTS ingestion_batches (
+    video_id VARCHAR(255) NOT NULL REFERENCES videos(id) ON DELETE CASCADE,
+    batch_index INTEGER NOT NULL, -- 1-based, matches videos.batch_current
+    start_time FLOAT NOT NULL,
+    end_time FLOAT NOT NULL,
+    segments JSONB NOT NULL, -- Transcript segments of this batch
+    full_text TEXT NOT NULL DEFAULT '',
+    flashcard_count INTEGER NOT NULL DEFAULT 0,
+    completed_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (video_id, batch_index)
+);
+
+ALTER TABLE ingestion_batches ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "System can manage ingestion batches" ON ingestion_batches;
+CREATE POLICY "System can manage ingestion batches" ON ingestion_batches
+    FOR ALL WITH CHECK (true);
+
+-- Store a batch's flashcards and its checkpoint atomically.
+-- p_questions is a JSON array of question_data values, stored as-is.
+-- Returns false (and stores nothing) if the batch was already checkpointed,
+-- so retrying a commit whose response was lost is harmless.
+CREATE OR REPLACE FUNCTION checkpoint_ingestion_batch(
+    p_video_id VARCHAR(255),
+    p_batch_index INTEGER,
+    p_start_time FLOAT,
+    p_end_time FLOAT,
+    p_segments JSONB,
+    p_full_text TEXT,
+    p_questions JSONB
+)
+RETURNS BOOLEAN AS $$
+BEGIN
+    INSERT INTO ingestion_batches (
+        video_id, batch_index, start_time, end_time, segments, full_text, flashcard_count
+    )
+    VALUES (
+        p_video_id, p_batch_index, p_start_time, p_end_time, p_segments, p_full_text,
+        jsonb_array_length(p_questions)
+    )
+    ON CONFLICT (video_id, batch_index) DO NOTHING;
+
+    IF NOT FOUND THEN
+        RETURN FALSE;
+    END IF;
+
+    INSERT INTO questions (video_id, question_data, created_at)
+    SELECT p_video_id, question, NOW()
+    FROM jsonb_array_elements(p_questions) AS question;
+
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Bulk / playlist submissions, followed as one group in the UI
+CREATE TABLE IF NOT EXISTS ingestion_bulks (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    project_id UUID NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    user_id UUID REFERENCES users(id) ON DELETE SET NULL,
+    source_url TEXT, -- Playlist URL, if the bulk came from one
+    videos JSONB NOT NULL DEFAULT '[]'::jsonb, -- [{video_id, url}] in submission order
+    skipped JSONB NOT NULL DEFAULT '[]'::jsonb, -- [{url, reason}] rejected at submission
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingestion_bulks_project ON ingestion_bulks(project_id, created_at DESC);
+
+ALTER TABLE ingestion_bulks ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "System can manage ingestion bulks" ON ingestion_bulks;
+CREATE POLICY "System can manage ingestion bulks" ON ingestion_bulks
+    FOR ALL WITH CHECK (true);
+
+-- ============================================================================
+-- VIDEO PROCESSING STATUS
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS video_processing_status (
+    video_id VARCHAR(255) PRIMARY KEY REFERENCES videos(id) ON DELETE CASCADE,
+    processing_status VARCHAR(50) NOT NULL DEFAULT 'processing',
+    error_message TEXT,
+    batch_current INTEGER NOT NULL DEFAULT 0,
+    batch_total INTEGER NOT NULL DEFAULT 0,
+    flashcard_count INTEGER NOT NULL DEFAULT 0, -- Number of questions stored for the video
+    has_transcript BOOLEAN NOT NULL DEFAULT FALSE,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE video_processing_status ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Anyone can view video processing status" ON video_processing_status;
+CREATE POLICY "Anyone can view video processing status" ON video_processing_status
+    FOR SELECT USING (true);
+
+DROP POLICY IF EXISTS "System can manage video processing status" ON video_processing_status;
+CREATE POLICY "System can manage video processing status" ON video_processing_status
+    FOR ALL WITH CHECK (true);
+
+-- Mirror status columns of videos into the narrow record
+CREATE OR REPLACE FUNCTION sync_video_processing_status()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO video_processing_status (
+        video_id, processing_status, error_message, batch_current, batch_total, has_transcript, updated_at
+    )
+    VALUES (
+        NEW.id,
+        COALESCE(NEW.processing_status, 'processing'),
+        NEW.error_message,
+        COALESCE(NEW.batch_current, 0),
+        COALESCE(NEW.batch_total, 0),
+        NEW.transcript IS NOT NULL OR EXISTS (SELECT 1 FROM video_transcripts t WHERE t.video_id = NEW.id),
+        NOW()
+    )
+    ON CONFLICT (video_id) DO UPDATE
+    SET processing_status = EXCLUDED.processing_status,
+        error_message = EXCLUDED.error_message,
+        batch_current = EXCLUDED.batch_current,
+        batch_total = EXCLUDED.batch_total,
+        has_transcript = EXCLUDED.has_transcript,
+        updated_at = NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS sync_video_processing_status_trigger ON videos;
+CREATE TRIGGER sync_video_processing_status_trigger
+    AFTER INSERT OR UPDATE OF processing_status, error_message, batch_current, batch_total, transcript ON videos
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_video_processing_status();
+
+-- Keep flashcard_count in step with questions. Statement-level, so a batch of
+-- questions stored in one insert costs one counter update per video.
+CREATE OR REPLACE FUNCTION count_video_flashcards()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE video_processing_status s
+        SET flashcard_count = s.flashcard_count + n.added,
+            updated_at = NOW()
+        FROM (SELECT video_id, COUNT(*) AS added FROM new_questions GROUP BY video_id) n
+        WHERE s.video_id = n.video_id;
+    ELSE
+        UPDATE video_processing_status s
+        SET flashcard_count = GREATEST(s.flashcard_count - o.removed, 0),
+            updated_at = NOW()
+        FROM (SELECT video_id, COUNT(*) AS removed FROM old_questions GROUP BY video_id) o
+        WHERE s.video_id = o.video_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS count_video_flashcards_insert_trigger ON questions;
+CREATE TRIGGER count_video_flashcards_insert_trigger
+    AFTER INSERT ON questions
+    REFERENCING NEW TABLE AS new_questions
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION count_video_flashcards();
+
+DROP TRIGGER IF EXISTS count_video_flashcards_delete_trigger ON questions;
+CREATE TRIGGER count_video_flashcards_delete_trigger
+    AFTER DELETE ON questions
+    REFERENCING OLD TABLE AS old_questions
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION count_video_flashcards();
+
+-- ============================================================================
+-- VIDEO TRANSCRIPTS
+-- ============================================================================
+
+-- One compressed transcript per video, kept out of the videos row so metadata
+-- reads (status, listings, analytics) don't carry it
+CREATE TABLE IF NOT EXISTS video_transcripts (
+    video_id VARCHAR(255) PRIMARY KEY REFERENCES videos(id) ON DELETE CASCADE,
+    format_version SMALLINT NOT NULL, -- Encoding of data (1 = zstd-compressed columnar binary)
+    data BYTEA NOT NULL,
+    segment_count INTEGER NOT NULL DEFAULT 0,
+    text_length INTEGER NOT NULL DEFAULT 0, -- Characters of the full text
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE video_transcripts ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "System can manage video transcripts" ON video_transcripts;
+CREATE POLICY "System can manage video transcripts" ON video_transcripts
+    FOR ALL WITH CHECK (true);
+
+-- Keep has_transcript in step with video_transcripts
+CREATE OR REPLACE FUNCTION sync_video_transcript_status()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE video_processing_status
+    SET has_transcript = TG_OP <> 'DELETE',
+        updated_at = NOW()
+    WHERE video_id = COALESCE(NEW.video_id, OLD.video_id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS sync_video_transcript_status_trigger ON video_transcripts;
+CREATE TRIGGER sync_video_transcript_status_trigger
+    AFTER INSERT OR DELETE ON video_transcripts
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_video_transcript_status();
+
+-- ============================================================================
+-- QUESTION POOL
+-- ============================================================================
+
+-- Quiz questions pre-generated per video at ingestion: several per transcript
+-- segment at varied difficulty. Quizzes are sampled from here instead of
+-- generated while the user waits.
+CREATE TABLE IF NOT EXISTS question_pool (
+    id VARCHAR(255) PRIMARY KEY, -- Question id, as referenced by user_attempts.question_id
+    video_id VARCHAR(255) NOT NULL REFERENCES videos(id) ON DELETE CASCADE,
+    segment_index INTEGER NOT NULL, -- Transcript segment the question is about
+    difficulty VARCHAR(10) NOT NULL DEFAULT 'medium', -- easy, medium, hard
+    question_data JSONB NOT NULL,
+    times_served INTEGER NOT NULL DEFAULT 0, -- Quizzes the question was put in
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_question_pool_video_id ON question_pool(video_id, segment_index);
+
+ALTER TABLE question_pool ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "System can manage question pool" ON question_pool;
+CREATE POLICY "System can manage question pool" ON question_pool
+    FOR ALL WITH CHECK (true);
+
+-- Count one more quiz for each of these pooled questions
+CREATE OR REPLACE FUNCTION mark_question_pool_served(p_question_ids TEXT[])
+RETURNS VOID AS $$
+    UPDATE question_pool
+    SET times_served = times_served + 1
+    WHERE id = ANY(p_question_ids);
+$$ LANGUAGE sql;
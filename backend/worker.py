@@ -0,0 +1,46 @@
+"""
+Ingestion worker process
+
+Pulls video ingestion jobs from the ingestion_jobs table and runs them.
+Start as many of these as needed, on any node:
+
+    python worker.py --concurrency 2
+"""
+
+import argparse
+import asyncio
+import signal
+
+from config import settings
+from logging_config import setup_logging, get_logger
+from services.ingestion_worker import run_workers
+from services.llm_gateway import llm_gateway
+
+setup_logging()
+logger = get_logger(__name__)
+
+
+async def main(concurrency: int):
+    stop_event = asyncio.Event()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    logger.info("=" * 80)
+    logger.info(f"🛠️  Ingestion worker process starting with {concurrency} worker(s)")
+    logger.info(f"Lease: {settings.ingestion_lease_seconds}s, heartbeat: {settings.ingestion_heartbeat_interval}s")
+    logger.info("=" * 80)
+
+    try:
+        await run_workers(concurrency, stop_event)
+    finally:
+        await llm_gateway.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run video ingestion workers")
+    parser.add_argument("--concurrency", type=int, default=1, help="Jobs to run concurrently in this process")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.concurrency))
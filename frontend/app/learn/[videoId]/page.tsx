@@ -1,6 +1,6 @@
 'use client';
 
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { useParams, useRouter } from 'next/navigation';
 import dynamic from 'next/dynamic';
 import { useAuth } from '@/contexts/AuthContext';
@@ -70,6 +70,15 @@ export default function LearnPage() {
   const [loadingQuiz, setLoadingQuiz] = useState(false);
   const [showReport, setShowReport] = useState(false); // Control report visibility
 
+  // Latest playback position for callbacks that outlive a render (progress stream)
+  const currentTimeRef = useRef(0);
+  useEffect(() => {
+    currentTimeRef.current = currentTime;
+  }, [currentTime]);
+
+  // Ids of the flashcards loaded so far, so pushed and refetched ones are merged once
+  const knownFlashcardIds = useRef<Set<string>>(new Set());
+
   useEffect(() => {
     loadVideo();
   }, [videoId]);
@@ -163,34 +172,58 @@ export default function LearnPage() {
     loadQuizReport();
   }, [userId, videoId]); // Re-run when userId or videoId changes
 
-  // Poll for processing status if not completed
+  // Subscribe to server-pushed processing progress while the video is processing
+  const isProcessing = !!processingStatus && processingStatus !== 'completed' && processingStatus !== 'failed';
+
   useEffect(() => {
-    if (processingStatus && processingStatus !== 'completed' && processingStatus !== 'failed') {
-      const interval = setInterval(async () => {
-        try {
-          const status = await videoApi.getVideoStatus(videoId);
-          setProcessingStatus(status.processing_status);
-          setBatchCurrent(status.batch_current || 0);
-          setBatchTotal(status.batch_total || 0);
-
-          // For batch processing, reload flashcards continuously as new ones are generated
-          const isBatchProcessing = status.processing_status?.includes('batch') || (status.batch_total > 0);
-
-          if (isBatchProcessing) {
-            // Reload flashcards during batch processing to show new ones as they arrive
-            await loadFlashcardsOnly();
-          } else if (status.processing_status === 'completed') {
-            // Load flashcards when completed (without reloading page)
-            await loadFlashcardsOnly();
-          }
-        } catch (err) {
-          console.error('Failed to fetch processing status:', err);
+    if (!isProcessing) return;
+
+    const mergeFlashcards = (incoming: FlashCard[]) => {
+      const newFlashcards = incoming.filter((fc) => !knownFlashcardIds.current.has(fc.question.id));
+      if (newFlashcards.length === 0) return;
+      newFlashcards.forEach((fc) => knownFlashcardIds.current.add(fc.question.id));
+      setFlashcards((prev) => [...prev, ...newFlashcards]);
+
+      // Detect missed flashcards (generated after user passed their timestamp)
+      const missed = newFlashcards.filter(
+        (fc) => fc.show_at_timestamp < currentTimeRef.current && !answeredFlashcards.has(fc.question.id)
+      );
+      if (missed.length > 0) {
+        setMissedFlashcards((prev) => [...prev, ...missed]);
+        console.log(`Detected ${missed.length} missed flashcards`);
+      }
+    };
+
+    // The stream only carries flashcards stored while this page was connected and the
+    // server was relaying events, so catch up from the database on every (re)connect
+    // and once processing ends
+    const refreshFlashcards = async () => {
+      try {
+        const questionsData = await questionsApi.getFlashcards(videoId);
+        mergeFlashcards(questionsData.flashcards || []);
+      } catch (err) {
+        console.error('Failed to refresh flashcards:', err);
+      }
+    };
+
+    const source = videoApi.subscribeToProgress(videoId, {
+      onStatus: (status, snapshot) => {
+        setProcessingStatus(status.processing_status);
+        setBatchCurrent(status.batch_current || 0);
+        setBatchTotal(status.batch_total || 0);
+        const finished = status.processing_status === 'completed' || status.processing_status === 'failed';
+        if (snapshot || finished) {
+          refreshFlashcards();
+        }
+        if (finished) {
+          setFlashcardsLoading(false);
         }
-      }, 3000); // Poll every 3 seconds
+      },
+      onFlashcards: mergeFlashcards,
+    });
 
-      return () => clearInterval(interval);
-    }
-  }, [processingStatus, videoId]);
+    return () => source.close();
+  }, [isProcessing, videoId]);
 
   useEffect(() => {
     // Check if any flashcard should be shown at current time
@@ -226,18 +259,18 @@ export default function LearnPage() {
       const data = await videoApi.getVideo(videoId);
       setVideoData(data);
 
-      // Set processing status
-      setProcessingStatus(data.processing_status || 'completed');
+      // Parse flashcards from questions. While processing, load the ones stored so far;
+      // the progress stream pushes the rest as they are generated.
+      const stillProcessing = data.processing_status !== 'completed' && data.processing_status !== 'failed';
+      const questionsData = await questionsApi.getFlashcards(videoId);
+      const loadedFlashcards: FlashCard[] = questionsData.flashcards || [];
+      knownFlashcardIds.current = new Set(loadedFlashcards.map((fc) => fc.question.id));
+      setFlashcards(loadedFlashcards);
+      setFlashcardsLoading(stillProcessing);
 
-      // Parse flashcards from questions
-      if (data.processing_status === 'completed' || data.processing_status === 'generating_flashcards') {
-        setFlashcardsLoading(data.processing_status === 'generating_flashcards');
-        const questionsData = await questionsApi.getFlashcards(videoId);
-        setFlashcards(questionsData.flashcards || []);
-        setFlashcardsLoading(false);
-      } else {
-        setFlashcardsLoading(true);
-      }
+      // Set processing status only now: it starts the progress stream, whose
+      // refetches merge into the flashcards loaded above
+      setProcessingStatus(data.processing_status || 'completed');
 
       // Note: Flashcard progress restoration is now handled by a separate useEffect
       // that watches for userId changes (see useEffect with [userId, videoId] dependency)
@@ -248,31 +281,6 @@ export default function LearnPage() {
     }
   };
 
-  // Load flashcards only without reloading the page (for background updates)
-  const loadFlashcardsOnly = async () => {
-    try {
-      setFlashcardsLoading(true);
-      const questionsData = await questionsApi.getFlashcards(videoId);
-      const newFlashcards = questionsData.flashcards || [];
-      setFlashcards(newFlashcards);
-
-      // Detect missed flashcards (generated after user passed their timestamp)
-      const missed = newFlashcards.filter(
-        fc => fc.show_at_timestamp < currentTime && !answeredFlashcards.has(fc.question.id)
-      );
-
-      if (missed.length > 0) {
-        setMissedFlashcards(missed);
-        console.log(`Detected ${missed.length} missed flashcards`);
-      }
-
-      setFlashcardsLoading(false);
-    } catch (err: any) {
-      console.error('Failed to load flashcards:', err);
-      setFlashcardsLoading(false);
-    }
-  };
-
   const handleFlashcardAnswer = async (questionId: string, selectedAnswer: number) => {
     setAnsweredFlashcards((prev) => new Set([...prev, questionId]));
 
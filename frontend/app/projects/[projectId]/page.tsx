@@ -89,7 +89,7 @@ export default function ProjectPage() {
       // Fetch video details
       const { data: videosData, error: videosError } = await supabase
         .from('videos')
-        .select('*')
+        .select('id, title, video_length, url, created_at')
         .in('id', videoIds);
 
       if (videosError) {
@@ -470,8 +470,8 @@ function AddVideoModal({ projectId, projectName, onClose, onVideoAdded }: AddVid
       // Redirect to learning page immediately (video will process in background)
       router.push(`/learn/${response.video_id}`);
     } catch (err: any) {
-      // Handle credit errors (402) specially
-      if (err.response?.status === 402 && err.response?.data?.detail) {
+      // Handle credit (402) and capacity (429/503) errors specially
+      if ([402, 429, 503].includes(err.response?.status) && err.response?.data?.detail) {
         const detail = err.response.data.detail;
         if (typeof detail === 'object' && detail.message) {
           setError(detail.message);
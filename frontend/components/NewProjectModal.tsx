@@ -108,8 +108,8 @@ export default function NewProjectModal({ isOpen, onClose, onProjectCreated }: N
         // Project created but video processing failed
         let errorMsg = 'Unknown error';
 
-        // Handle credit errors (402) specially
-        if (videoError.response?.status === 402 && videoError.response?.data?.detail) {
+        // Handle credit (402) and capacity (429/503) errors specially
+        if ([402, 429, 503].includes(videoError.response?.status) && videoError.response?.data?.detail) {
           const detail = videoError.response.data.detail;
           if (typeof detail === 'object' && detail.message) {
             errorMsg = detail.message;
@@ -8,6 +8,13 @@ export interface VideoSegment {
   text: string;
 }
 
+export interface TranscriptWindow {
+  video_id: string;
+  duration: number;
+  next_cursor: number | null;
+  segments: Array<VideoSegment & { index: number }>;
+}
+
 export interface Question {
   id: string;
   question_text: string;
@@ -23,6 +30,15 @@ export interface FlashCard {
   show_at_timestamp: number;
 }
 
+export interface ProcessingStatusEvent {
+  processing_status: string;
+  error_message?: string | null;
+  batch_current: number;
+  batch_total: number;
+  flashcard_count: number;
+  has_transcript: boolean;
+}
+
 export interface VideoProcessResponse {
   video_id: string;
   title: string;
@@ -270,13 +286,75 @@ export const videoApi = {
     return response.data;
   },
 
+  // Add a playlist and/or several videos to a project; progress via getBulkStatus
+  processVideosBulk: async (projectId: string, options: { playlistUrl?: string; videoUrls?: string[]; userId?: string }) => {
+    const response = await api.post('/api/video/process-bulk', {
+      project_id: projectId,
+      playlist_url: options.playlistUrl,
+      video_urls: options.videoUrls || [],
+      user_id: options.userId,
+    });
+    return response.data;
+  },
+
+  getBulkStatus: async (bulkId: string) => {
+    const response = await api.get(`/api/video/bulk/${bulkId}`);
+    return response.data;
+  },
+
   getVideoStatus: async (videoId: string) => {
     const response = await api.get(`/api/video/${videoId}/status`);
     return response.data;
   },
 
-  getVideo: async (videoId: string) => {
-    const response = await api.get(`/api/video/${videoId}`);
+  // Server-sent processing progress: stage changes, batch progress and new flashcards.
+  // onStatus gets snapshot = true for the first status after each (re)connect.
+  subscribeToProgress: (
+    videoId: string,
+    handlers: {
+      onStatus: (status: ProcessingStatusEvent, snapshot: boolean) => void;
+      onFlashcards: (flashcards: FlashCard[]) => void;
+    }
+  ): EventSource => {
+    const source = new EventSource(`${API_URL}/api/video/${videoId}/events`);
+    let snapshot = true;
+
+    source.addEventListener('open', () => {
+      snapshot = true;
+    });
+
+    source.addEventListener('status', (e) => {
+      const status: ProcessingStatusEvent = JSON.parse((e as MessageEvent).data);
+      handlers.onStatus(status, snapshot);
+      snapshot = false;
+      // Stream ends once processing finishes - don't let EventSource reconnect
+      if (status.processing_status === 'completed' || status.processing_status === 'failed') {
+        source.close();
+      }
+    });
+
+    source.addEventListener('flashcards', (e) => {
+      const data = JSON.parse((e as MessageEvent).data);
+      handlers.onFlashcards(data.flashcards || []);
+    });
+
+    return source;
+  },
+
+  // The transcript is left out unless asked for - read it in windows with getTranscriptWindow
+  getVideo: async (videoId: string, includeTranscript = false) => {
+    const response = await api.get(`/api/video/${videoId}`, {
+      params: { include_transcript: includeTranscript },
+    });
+    return response.data;
+  },
+
+  // Transcript segments overlapping [start, end); continue with next_cursor while it is set
+  getTranscriptWindow: async (
+    videoId: string,
+    options: { start?: number; end?: number; cursor?: number; limit?: number } = {}
+  ): Promise<TranscriptWindow> => {
+    const response = await api.get(`/api/video/${videoId}/transcript`, { params: options });
     return response.data;
   },
 